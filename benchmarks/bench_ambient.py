@@ -0,0 +1,70 @@
+# benchmarks/bench_ambient.py
+#
+# Adaptive brightness: cost of one sensor reading through the filter and the lux curve,
+# and how many level changes reach the scheduler over a simulated noisy day at 10 Hz.
+
+import math
+import random
+
+from benchmarks.common import measure
+from model.ambient_model import AdaptiveSettings, blend_levels
+
+SAMPLE_HZ = 10
+
+
+def simulated_day(hours):
+    # Daylight following a sine over the day, with sensor noise and passing clouds
+    random_source = random.Random(42)
+    readings = []
+    for index in range(int(hours * 3600 * SAMPLE_HZ)):
+        seconds = index / SAMPLE_HZ
+        daylight = max(math.sin(math.pi * seconds / (hours * 3600)), 0) * 2000
+        cloud = 0.5 if (seconds // 600) % 5 == 0 else 1.0
+        readings.append(max(daylight * cloud * random_source.gauss(1, 0.05) + 20, 0))
+    return readings
+
+
+def run(quick=False):
+    hours = 1 if quick else 12
+    readings = simulated_day(hours)
+    settings = AdaptiveSettings(enabled=True)
+    curve = settings.build_curve()
+    ambient_filter = settings.build_filter()
+    samples = iter(enumerate(readings))
+
+    def process_reading():
+        index, lux = next(samples)
+        smoothed = ambient_filter.update(lux, index / SAMPLE_HZ)
+        if smoothed is not None:
+            curve.level_at(smoothed)
+
+    number = min(len(readings) // 5, 10000)
+    per_reading = measure(process_reading, repeat=5, number=number)
+
+    # Full replay: level updates handed to the scheduler and resulting setter calls
+    ambient_filter.reset()
+    ambient_level = None
+    applied_level = None
+    level_updates = setter_calls = 0
+    for index, lux in enumerate(readings):
+        smoothed = ambient_filter.update(lux, index / SAMPLE_HZ)
+        if smoothed is None:
+            continue
+        level = curve.level_at(smoothed)
+        if level == ambient_level:
+            continue
+        ambient_level = level
+        level_updates += 1
+        blended = blend_levels(40, ambient_level, settings.weight, settings.step)
+        if blended != applied_level:
+            applied_level = blended
+            setter_calls += 1
+
+    return {
+        "sample_hz": SAMPLE_HZ,
+        "readings": len(readings),
+        "per_reading": per_reading,
+        "cpu_percent_at_sample_hz": round(per_reading["median_us"] * SAMPLE_HZ / 1e4, 5),
+        "level_updates": level_updates,
+        "setter_calls": setter_calls,
+    }
@@ -0,0 +1,132 @@
+# benchmarks/bench_config.py
+#
+# ConfigManager.load_config/save_config and load_language_strings on a realistic
+# project and on a large one (many periods, displays and locales).
+
+import json
+import os
+import shutil
+import tempfile
+
+from benchmarks.common import PROJECT_ROOT, measure, measure_once
+from model.data_model import ConfigManager
+from model.schedule_model import format_time
+
+LARGE_PERIOD_COUNT = 48
+LARGE_DISPLAY_COUNT = 16
+LARGE_LOCALE_COUNT = 80
+LARGE_KEYS_PER_LOCALE = 500
+
+
+def build_schedule(period_count):
+    length = 24 * 60 // period_count
+    periods = [
+        {
+            "Key": f"B{index + 1}",
+            "Name": f"Period {index + 1}",
+            "Start": format_time(index * length),
+            "End": format_time(((index + 1) * length) % (24 * 60)),
+        }
+        for index in range(period_count)
+    ]
+    levels = {period["Key"]: (index * 7) % 101 for index, period in enumerate(periods)}
+    return {"Periods": periods}, levels
+
+
+def build_large_config():
+    schedule, levels = build_schedule(LARGE_PERIOD_COUNT)
+    displays = [
+        {"Id": f"DISPLAY{index + 1}", "Schedule": schedule, "BrightnessLevels": levels}
+        for index in range(LARGE_DISPLAY_COUNT)
+    ]
+    return {
+        "Language": "EN",
+        "BrightnessLevels": levels,
+        "Schedule": schedule,
+        "Displays": displays,
+    }
+
+
+def create_project(large):
+    # Temporary project root laid out like the real one (ConfigManager reads data/ under the cwd)
+    root = tempfile.mkdtemp(prefix="brightness-bench-")
+    data_dir = os.path.join(root, "data")
+    os.makedirs(data_dir)
+    shutil.copy(os.path.join(PROJECT_ROOT, "data", "lang.json"), data_dir)
+    if large:
+        config = build_large_config()
+        lang_dir = os.path.join(data_dir, "lang")
+        os.makedirs(lang_dir)
+        for index in range(LARGE_LOCALE_COUNT):
+            strings = {
+                f"MSG_{key:03d}": f"Locale {index} string {key}"
+                for key in range(LARGE_KEYS_PER_LOCALE)
+            }
+            lang_path = os.path.join(lang_dir, f"L{index:02d}.json")
+            with open(lang_path, "w", encoding="utf-8") as lang_file:
+                json.dump(strings, lang_file)
+    else:
+        config_path = os.path.join(PROJECT_ROOT, "data", "config.json")
+        with open(config_path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+    with open(os.path.join(data_dir, "config.json"), "w", encoding="utf-8") as config_file:
+        json.dump(config, config_file, indent=4)
+    return root
+
+
+def bench_project(large, quick):
+    number = 20 if quick else 200
+    results = {}
+    config_manager = ConfigManager()
+
+    results["load_config_cached"] = measure(config_manager.load_config, number=number)
+
+    def invalidate():
+        config_manager._signature = None
+
+    def load_uncached():
+        invalidate()
+        config_manager.load_config()
+
+    results["load_config_uncached"] = measure(load_uncached, number=max(number // 10, 5))
+
+    counter = [0]
+
+    def save():
+        # Change one value so the write is not skipped as unchanged
+        counter[0] += 1
+        config_manager.config["BenchmarkCounter"] = counter[0]
+        config_manager.save_config(immediate=True)
+
+    results["save_config_immediate"] = measure(save, number=max(number // 10, 5))
+
+    language = "L42" if large else "PT"
+
+    def load_language_cold():
+        config_manager.language_catalog = type(config_manager.language_catalog)(
+            config_manager.LANG_PATH, config_manager.LANG_DIR, config_manager.DEFAULT_LANG
+        )
+        config_manager.load_language_strings(language)
+
+    results["load_language_strings_cold"] = measure_once(
+        load_language_cold, repeat=5 if quick else 20
+    )
+    results["load_language_strings_cached"] = measure(
+        lambda: config_manager.load_language_strings(language), number=number
+    )
+    config_manager.stop_watching()
+    return results
+
+
+def run(quick=False):
+    previous_cwd = os.getcwd()
+    results = {}
+    for size in ("realistic", "large"):
+        root = create_project(size == "large")
+        try:
+            os.chdir(root)
+            results[size] = bench_project(size == "large", quick)
+        finally:
+            os.chdir(previous_cwd)
+            shutil.rmtree(root, ignore_errors=True)
+    return results
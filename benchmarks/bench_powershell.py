@@ -0,0 +1,69 @@
+# benchmarks/bench_powershell.py
+#
+# PowerShellService against services/stub_worker.py: worker start/stop cycle and
+# setter-call throughput over the stdin/stdout protocol, plus the in-process
+# backends for comparison.
+
+import os
+import sys
+import time
+
+from benchmarks.common import PROJECT_ROOT, measure, measure_once
+from services.brightness_backend import RecordingBackend
+from services.brightness_state import BrightnessStateTracker
+from services.powershell_service import PowerShellService
+
+STUB_COMMAND = [sys.executable, os.path.join(PROJECT_ROOT, "services", "stub_worker.py")]
+
+
+def bench_worker(quick):
+    script_path = os.path.join(PROJECT_ROOT, "controller", "adjust_brightness.ps1")
+    service = PowerShellService(script_path, command=STUB_COMMAND)
+
+    def cycle():
+        service.start_powershell()
+        service.health_check()
+        service.stop_powershell()
+
+    results = {"start_stop_cycle": measure_once(cycle, repeat=3 if quick else 10)}
+
+    service.start_powershell()
+    try:
+        calls = 200 if quick else 2000
+        levels = [level % 101 for level in range(calls)]
+        started = time.perf_counter()
+        for level in levels:
+            service.set_brightness(level)
+        elapsed = time.perf_counter() - started
+        results["set_brightness"] = {
+            "calls": calls,
+            "calls_per_second": round(calls / elapsed, 1),
+            "mean_us": round(elapsed / calls * 1e6, 3),
+        }
+    finally:
+        service.stop_powershell()
+    return results
+
+
+def bench_in_process(quick):
+    number = 1000 if quick else 20000
+    level = [0]
+
+    def changing_level():
+        level[0] = (level[0] + 1) % 101
+        return level[0]
+
+    backend = RecordingBackend()
+    tracker = BrightnessStateTracker(RecordingBackend())
+    return {
+        "recording_backend": measure(
+            lambda: backend.set_brightness(changing_level()), number=number
+        ),
+        "state_tracker_repeated_level": measure(
+            lambda: tracker.set_brightness(50), number=number
+        ),
+    }
+
+
+def run(quick=False):
+    return {"worker": bench_worker(quick), "in_process": bench_in_process(quick)}
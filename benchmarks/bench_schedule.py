@@ -0,0 +1,162 @@
+# benchmarks/bench_schedule.py
+#
+# SettingsController.validate_schedule across growing period counts, level
+# resolution for a simulated 24h / 7-day clock sweep, sunrise/sunset-relative
+# schedules (solar table build and per-day resolution) and profile rule lookups.
+
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+
+from benchmarks.bench_config import build_schedule
+from benchmarks.common import BenchmarkSkipped, measure, measure_once
+from model.compiled_schedule import CompiledSchedule, _compile_serialized, compile_schedule
+from model.profile_model import (
+    ProfileCalendar,
+    ProfileRule,
+    active_profile,
+    profile_calendar,
+)
+from model.solar_model import SolarTable, solar_table
+
+PERIOD_COUNTS = (4, 24, 96, 288, 720)
+
+
+def make_settings_controller(brightness_levels):
+    # validate_schedule only needs the model and the logger, so skip the window set-up
+    try:
+        from controller.settings_controller import SettingsController
+    except ImportError as e:
+        raise BenchmarkSkipped(f"SettingsController cannot be imported: {e}")
+    from services.log_service import LogService
+
+    controller = SettingsController.__new__(SettingsController)
+    controller.log_service = LogService()
+    controller.model = {"BrightnessLevels": brightness_levels}
+    controller.profile = None
+    return controller
+
+
+def bench_validate(quick):
+    results = {}
+    for period_count in PERIOD_COUNTS:
+        schedule, levels = build_schedule(period_count)
+        controller = make_settings_controller(levels)
+        number = 2 if quick else max(2000 // period_count, 5)
+
+        def validate_uncached():
+            _compile_serialized.cache_clear()
+            controller.validate_schedule(schedule)
+
+        results[str(period_count)] = {
+            "uncached": measure(validate_uncached, number=number),
+            "cached": measure(
+                lambda: controller.validate_schedule(schedule), number=number * 10
+            ),
+        }
+    return results
+
+
+def bench_sweep(days, quick):
+    # One lookup per simulated minute, like a clock running through the whole range
+    schedule, levels = build_schedule(24)
+    compiled = compile_schedule(schedule, levels)
+    start = datetime(2024, 1, 1)
+    moments = [start + timedelta(minutes=minute) for minute in range(days * 24 * 60)]
+
+    def sweep_levels():
+        for moment in moments:
+            compiled.level_at(moment)
+
+    def sweep_transitions():
+        for moment in moments:
+            compiled.next_transition(moment)
+
+    repeat = 3 if quick else 10
+    return {
+        "lookups": len(moments),
+        "level_at_sweep": measure(sweep_levels, repeat=repeat, number=1),
+        "next_transition_sweep": measure(sweep_transitions, repeat=repeat, number=1),
+    }
+
+
+def bench_solar(quick):
+    location = {"Latitude": 48.8566, "Longitude": 2.3522}
+    config = {
+        "Location": location,
+        "Schedule": {
+            "Periods": [
+                {"Key": "B1", "Start": "sunrise", "End": "12:00"},
+                {"Key": "B2", "Start": "12:00", "End": "sunset-30"},
+                {"Key": "B3", "Start": "sunset-30", "End": "23:00"},
+                {"Key": "B4", "Start": "23:00", "End": "sunrise"},
+            ]
+        },
+        "BrightnessLevels": {"B1": 30, "B2": 40, "B3": 15, "B4": 10},
+    }
+    repeat = 3 if quick else 10
+    cache_dir = tempfile.mkdtemp(prefix="solar-bench-")
+    SolarTable.load_or_build(48.8566, 2.3522, 2024, cache_dir)
+    today = date(2024, 6, 21)
+    solar_table(48.8566, 2.3522, 2024).local_events(today)
+    days = [date(2024, 1, 1) + timedelta(days=index) for index in range(366)]
+
+    def resolve_year():
+        for day in days:
+            CompiledSchedule.from_config(config, day)
+
+    results = {
+        "table_build": measure(
+            lambda: SolarTable.build(48.8566, 2.3522, 2024), repeat=repeat, number=1
+        ),
+        "table_load_cached": measure(
+            lambda: SolarTable.load_or_build(48.8566, 2.3522, 2024, cache_dir),
+            repeat=repeat,
+            number=10,
+        ),
+        "from_config_same_day": measure(
+            lambda: CompiledSchedule.from_config(config, today), number=1000
+        ),
+        "from_config_every_day_of_year": measure_once(resolve_year, repeat=repeat),
+    }
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def bench_profiles(quick):
+    # A holiday calendar of ~300 dated rules plus a weekend rule: building a year once
+    # against looking a day up, uncached (rules serialized) and with the kept calendar
+    rules = [
+        {"Profile": "holiday", "Dates": [f"{month:02d}-{day:02d}"]}
+        for month in range(1, 13)
+        for day in range(1, 26)
+    ]
+    rules.append({"Profile": "weekend", "Weekdays": ["Sat", "Sun"]})
+    config = {"ProfileRules": rules}
+    repeat = 3 if quick else 10
+    parsed = [ProfileRule.from_dict(rule) for rule in rules]
+    calendar = profile_calendar(config)
+    day = date(2024, 6, 22)
+
+    return {
+        "rules": len(rules),
+        "year_build": measure(
+            lambda: ProfileCalendar(parsed)._year(2024), repeat=repeat, number=1
+        ),
+        "lookup_serialized_rules": measure(
+            lambda: active_profile(config, day), repeat=repeat, number=100
+        ),
+        "lookup_kept_calendar": measure(
+            lambda: active_profile(config, day, calendar), repeat=repeat, number=10000
+        ),
+    }
+
+
+def run(quick=False):
+    return {
+        "validate_schedule": bench_validate(quick),
+        "level_resolution_24h": bench_sweep(1, quick),
+        "level_resolution_7d": bench_sweep(7, quick),
+        "solar_schedule": bench_solar(quick),
+        "profiles": bench_profiles(quick),
+    }
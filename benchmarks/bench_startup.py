@@ -0,0 +1,126 @@
+# benchmarks/bench_startup.py
+#
+# Cold start: time from interpreter launch to the first brightness application,
+# and an `-X importtime` breakdown of the scheduler path, of a logon start (tray
+# icon only) and of the UI path.
+
+import shutil
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_config import create_project
+from benchmarks.common import PROJECT_ROOT
+
+# Modules main.py imports before the first brightness application
+SCHEDULER_MODULES = (
+    "services.log_service",
+    "model.data_model",
+    "services.brightness_backend",
+    "services.brightness_state",
+    "services.scheduler_service",
+)
+# Modules a logon start loads for its tray icon
+TRAY_MODULES = (
+    "services.tray_service",
+    "PIL.Image",
+    "pystray",
+)
+# Modules only needed once the window or the tray icon is used
+UI_MODULES = (
+    "tkinter",
+    "controller.brightness_controller",
+    "views.brightness_view",
+    "controller.settings_controller",
+    "PIL.Image",
+    "pystray",
+)
+
+FIRST_APPLY_SCRIPT = """
+import sys
+sys.path.insert(0, {project_root!r})
+from model.data_model import ConfigManager
+from services.brightness_backend import RecordingBackend
+from services.brightness_state import BrightnessStateTracker
+from services.scheduler_service import SchedulerService
+backend = BrightnessStateTracker(RecordingBackend())
+SchedulerService(ConfigManager(), backend).apply_now()
+print("applied" if backend.stats()["applied"] else "not applied", flush=True)
+"""
+
+
+def parse_importtime(stderr, top=10):
+    # Lines look like "import time:       412 |       1310 |   model.data_model", where
+    # the indentation of the name gives the nesting depth
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        modules.append((raw_name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    top_level = [module for module in modules if module[1] == 0]
+    return {
+        "modules": len(modules),
+        "total_ms": round(sum(module[3] for module in top_level) / 1000, 3),
+        "top_level_ms": {
+            name: round(cumulative_us / 1000, 3) for name, _, _, cumulative_us in top_level
+        },
+        "slowest_self_ms": {
+            name: round(self_us / 1000, 3)
+            for name, _, self_us, _ in sorted(modules, key=lambda module: -module[2])[:top]
+        },
+    }
+
+
+def importtime(modules):
+    # Import the modules one by one in a fresh interpreter, skipping missing optional ones
+    code = "\n".join(
+        f"try:\n    import {module}\nexcept ImportError:\n    pass" for module in modules
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def first_apply(repeat):
+    # Wall time from spawning the interpreter to the first level reaching the backend
+    root = create_project(large=False)
+    samples = []
+    try:
+        script = FIRST_APPLY_SCRIPT.format(project_root=PROJECT_ROOT)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, "-c", script], cwd=root, capture_output=True, text=True
+            )
+            elapsed = time.perf_counter() - started
+            if completed.stdout.strip() != "applied":
+                return {"error": completed.stderr.strip().splitlines()[-1:]}
+            samples.append(elapsed * 1000)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(samples[len(samples) // 2], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def run(quick=False):
+    return {
+        "process_start_to_first_apply": first_apply(3 if quick else 10),
+        "importtime_scheduler_path": importtime(SCHEDULER_MODULES),
+        "importtime_logon_path": importtime(SCHEDULER_MODULES + TRAY_MODULES),
+        "importtime_ui_path": importtime(SCHEDULER_MODULES + UI_MODULES),
+    }
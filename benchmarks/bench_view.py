@@ -0,0 +1,70 @@
+# benchmarks/bench_view.py
+#
+# BrightnessView refresh time (update_brightness_inputs followed by the batched
+# idle pass). Needs a display and the Windows API used by ViewHelper.setup_window.
+
+import copy
+import sys
+
+from benchmarks.bench_config import build_schedule
+from benchmarks.common import BenchmarkSkipped, measure
+
+
+class ViewControllerStub:
+    # The parts of BrightnessController that BrightnessView calls back into
+    def __init__(self, schedule, brightness_levels):
+        self.brightness_levels = brightness_levels
+        self.config = {"Schedule": schedule, "BrightnessLevels": brightness_levels}
+
+    def get_compiled_schedule(self):
+        from model.compiled_schedule import CompiledSchedule
+
+        return CompiledSchedule.from_config(self.config)
+
+    def convert_to_12_hour_format(self, hour_24):
+        return (hour_24 % 12 or 12), ("AM" if hour_24 < 12 else "PM")
+
+    def apply_settings(self):
+        pass
+
+    minimize_to_tray = exit_application = open_settings = apply_settings
+
+
+def run(quick=False):
+    if sys.platform != "win32":
+        raise BenchmarkSkipped("BrightnessView needs the Windows API (ctypes.windll).")
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception as e:
+        raise BenchmarkSkipped(f"Tk is not available: {e}")
+
+    from views.brightness_view import BrightnessView
+
+    results = {}
+    try:
+        for period_count in (4, 12, 24):
+            schedule, levels = build_schedule(period_count)
+            controller = ViewControllerStub(schedule, levels)
+            view = BrightnessView({"Language": "EN"}, root, controller)
+            view.create_widgets(levels, schedule)
+            root.update_idletasks()
+
+            renamed = copy.deepcopy(schedule)
+            renamed["Periods"][0]["Name"] = "Renamed"
+            schedules = [schedule, renamed]
+            toggle = [0]
+
+            def refresh():
+                # Alternate between two schedules so every pass has one label to change
+                toggle[0] ^= 1
+                view.update_brightness_inputs(schedules[toggle[0]])
+                root.update_idletasks()
+
+            results[str(period_count)] = measure(refresh, number=5 if quick else 50)
+            for widget in root.winfo_children():
+                widget.destroy()
+    finally:
+        root.destroy()
+    return results
@@ -0,0 +1,39 @@
+# benchmarks/common.py
+
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+class BenchmarkSkipped(Exception):
+    # Raised by a benchmark that cannot run here (no display, no Windows API, ...)
+    pass
+
+
+def measure(function, repeat=5, number=100, setup=None):
+    # Run function `number` times per sample, `repeat` samples; timings are per call.
+    # setup() runs before each sample and is not timed.
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - started) / number)
+    return {
+        "calls": repeat * number,
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "max_us": round(max(samples) * 1e6, 3),
+    }
+
+
+def measure_once(function, repeat=5, setup=None):
+    # For operations too slow or stateful to loop: one call per sample
+    return measure(function, repeat=repeat, number=1, setup=setup)
@@ -0,0 +1,100 @@
+# benchmarks/run.py
+#
+# Run the benchmark suite and print (or write) the results as JSON:
+#
+#   python -m benchmarks.run [--quick] [--only config,schedule] [--output results.json]
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import PROJECT_ROOT, BenchmarkSkipped
+from services.log_service import LogService
+
+BENCHMARKS = {
+    "config": "benchmarks.bench_config",
+    "schedule": "benchmarks.bench_schedule",
+    "powershell": "benchmarks.bench_powershell",
+    "view": "benchmarks.bench_view",
+    "startup": "benchmarks.bench_startup",
+    "ambient": "benchmarks.bench_ambient",
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names, quick=False):
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "results": {},
+        "skipped": {},
+    }
+    for name in names:
+        module = importlib.import_module(BENCHMARKS[name])
+        started = time.perf_counter()
+        try:
+            report["results"][name] = module.run(quick=quick)
+        except BenchmarkSkipped as e:
+            report["skipped"][name] = str(e)
+            continue
+        print(f"{name}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brightness Control benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    parser.add_argument(
+        "--only", help="comma-separated subset of: " + ", ".join(BENCHMARKS)
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS)
+    if args.only:
+        names = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    # Only warnings and errors, and no running_app.log in the working directory
+    log_service = LogService(log_level=logging.WARNING, log_to_file=False)
+    try:
+        report = run_benchmarks(names, quick=args.quick)
+    finally:
+        log_service.stop_listener()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,10 @@
+param (
+    # Apply this brightness level once and exit
+    [int]$Level = -1,
+    # Stay alive and apply "set <level>" commands read from stdin (see PowerShellService)
+    [switch]$Worker
+)
+
 Add-Type -TypeDefinition @"
 using System;
 using System.Runtime.InteropServices;
@@ -24,9 +31,14 @@ function Load-LanguageStrings {
 
         if ($langData.$language) {
             return $langData.$language
-        } else {
-            throw "Language '$language' not supported."
         }
+
+        # Languages can also ship as data\lang\<CODE>.json; fall back to English otherwise
+        $perLanguageFile = Join-Path -Path $PSScriptRoot -ChildPath "..\data\lang\$language.json"
+        if (Test-Path $perLanguageFile) {
+            return Get-Content -Raw -Path $perLanguageFile | ConvertFrom-Json
+        }
+        return $langData.EN
     } else {
         throw "Language file 'lang.json' not found at path $languageFile."
     }
@@ -43,73 +55,78 @@ function Load-Config {
     }
 }
 
+# Delegate for dwmapi.dll #171, resolved on the first Set-Brightness call
+$script:changeBrightness = $null
+
 function Set-Brightness {
     param ([int]$brightness)
 
     $mappedBrightness = [math]::Round(1.0 + ($brightness * 5.0 / 100), 1)
-    
-    $primaryMonitor = [ScreenBrightnessSetter]::MonitorFromWindow([IntPtr]::Zero, 1)
-    $hmodule_dwmapi = [ScreenBrightnessSetter]::LoadLibrary("dwmapi.dll")
-    $procAddress = [ScreenBrightnessSetter]::GetProcAddress($hmodule_dwmapi, 171)
 
-    $changeBrightness = [System.Runtime.InteropServices.Marshal]::GetDelegateForFunctionPointer(
-        $procAddress,
-        [ScreenBrightnessSetter+DwmpSDRToHDRBoostPtr]
-    )
-    $changeBrightness.Invoke($primaryMonitor, $mappedBrightness)
+    # Resolve dwmapi.dll #171 once per process; the worker reuses the delegate for every command
+    if ($null -eq $script:changeBrightness) {
+        $hmodule_dwmapi = [ScreenBrightnessSetter]::LoadLibrary("dwmapi.dll")
+        $procAddress = [ScreenBrightnessSetter]::GetProcAddress($hmodule_dwmapi, 171)
 
-    $message = "$($script:strings.MSG_01): $brightness ($($script:strings.MSG_02) $mappedBrightness)"
-    Write-Output $message
-}
+        $script:changeBrightness = [System.Runtime.InteropServices.Marshal]::GetDelegateForFunctionPointer(
+            $procAddress,
+            [ScreenBrightnessSetter+DwmpSDRToHDRBoostPtr]
+        )
+    }
+
+    $primaryMonitor = [ScreenBrightnessSetter]::MonitorFromWindow([IntPtr]::Zero, 1)
+    $script:changeBrightness.Invoke($primaryMonitor, $mappedBrightness)
 
-function Adjust-BrightnessBasedOnTime {
-    $config = Load-Config
-    $currentHour = (Get-Date).Hour
+    return $mappedBrightness
+}
 
-    $schedule = $config.Schedule
+function Start-Worker {
+    # Requests: "<id> set <level>" | "<id> ping" | "quit"
+    # Responses: "<id> ok [detail]" | "<id> err <message>"
+    while ($true) {
+        $line = [Console]::In.ReadLine()
+        if ($null -eq $line -or $line.Trim() -eq "quit") {
+            break
+        }
 
-    $morningStart = [int]$schedule.MorningStart
-    $morningEnd = [int]$schedule.MorningEnd
-    $afternoonStart = [int]$schedule.AfternoonStart
-    $afternoonEnd = [int]$schedule.AfternoonEnd
-    $eveningStart = [int]$schedule.EveningStart
-    $eveningEnd = [int]$schedule.EveningEnd
-    $nightStart = [int]$schedule.NightStart
-    $nightEnd = [int]$schedule.NightEnd
+        $parts = $line.Trim() -split "\s+"
+        $requestId = $parts[0]
+        try {
+            switch ($parts[1]) {
+                "set" {
+                    $brightness = [int]$parts[2]
+                    $mappedBrightness = Set-Brightness -brightness $brightness
+                    $response = "$requestId ok $mappedBrightness"
+                }
+                "ping" {
+                    $response = "$requestId ok pong"
+                }
+                default {
+                    $response = "$requestId err unknown command '$($parts[1])'"
+                }
+            }
+        } catch {
+            $response = "$requestId err $($_.Exception.Message)"
+        }
 
-    if ($currentHour -ge $morningStart -and $currentHour -lt $morningEnd) {
-        Set-Brightness -brightness $config.BrightnessLevels.B1
-    }
-    elseif ($currentHour -ge $afternoonStart -and $currentHour -lt $afternoonEnd) {
-        Set-Brightness -brightness $config.BrightnessLevels.B2
-    }
-    elseif ($currentHour -ge $eveningStart -and $currentHour -lt $eveningEnd) {
-        Set-Brightness -brightness $config.BrightnessLevels.B3
-    }
-    elseif (
-        ($currentHour -ge $nightStart -and $currentHour -lt 24) -or
-        ($currentHour -ge 0 -and $currentHour -lt $nightEnd)
-    ) {
-        Set-Brightness -brightness $config.BrightnessLevels.B4
-    }
-    else {
-        Write-Output "Horário atual ($currentHour h) não está definido em nenhum período de brilho."
+        [Console]::Out.WriteLine($response)
+        [Console]::Out.Flush()
     }
 }
 
 $config = Load-Config
 $script:strings = Load-LanguageStrings $config.Language
 
-Write-Host "Configuração carregada: $config"
-Write-Host "Strings carregadas: $script:strings"
+if ($Worker) {
+    Start-Worker
+    exit 0
+}
 
-Write-Host "Brightness Levels carregados: $($config.BrightnessLevels)"
-Write-Host "B1: $($config.BrightnessLevels.B1)"
-Write-Host "B2: $($config.BrightnessLevels.B2)"
-Write-Host "B3: $($config.BrightnessLevels.B3)"
-Write-Host "B4: $($config.BrightnessLevels.B4)"
+if ($Level -ge 0) {
+    $mappedBrightness = Set-Brightness -brightness $Level
+    Write-Output "$($script:strings.MSG_01): $Level ($($script:strings.MSG_02) $mappedBrightness)"
+    exit 0
+}
 
-while ($true) {
-    Adjust-BrightnessBasedOnTime
-    Start-Sleep -Seconds 1
-}
\ No newline at end of file
+Write-Output "Usage: adjust_brightness.ps1 -Worker | -Level <0-100>"
+exit 1
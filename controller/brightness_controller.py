@@ -1,53 +1,163 @@
 # controllers/brightness_controller.py
 
+from datetime import date, datetime
 from tkinter import messagebox
-from controller.settings_controller import SettingsController
+from model.compiled_schedule import CompiledSchedule
 from model.data_model import ConfigManager
-from views.brightness_view import BrightnessView
+from model.profile_model import (
+    DEFAULT_PROFILE,
+    apply_profile,
+    next_profile_change,
+    uses_profiles,
+)
+from model.solar_model import resolve_schedule
+from services.latency_service import DEFAULT_REPORT_PATH
+from services.runtime import TkPump
 from services.tray_service import TrayService
 from services.log_service import LogService
 
 
 class BrightnessController:
-    def __init__(self, root, powershell_service):
+    # Longest wait before the active profile is checked again
+    PROFILE_REFRESH_MAX_MS = 6 * 60 * 60 * 1000
+
+    def __init__(
+        self,
+        root,
+        brightness_backend,
+        scheduler_service=None,
+        config_manager=None,
+        tray_service=None,
+        start_minimized=None,
+    ):
         self.log_service = LogService()
         self.root = root
-        self.powershell_service = powershell_service
-        self.config_manager = ConfigManager()
+        self.brightness_backend = brightness_backend
+        self.scheduler_service = scheduler_service
+        self.config_manager = config_manager or ConfigManager()
         self.config = self.config_manager.load_config()
-        self.brightness_levels = self.config.get("BrightnessLevels", {})
+        # Today's schedule profile; the window shows and edits its schedule and levels
+        self.profile = None
+        self.profile_job = None
+        self.load_active_profile()
         self.language = self.config.get("Language", "EN")
         self.lang_strings = self.config_manager.load_language_strings(self.language)
-        self.schedule = self.config.get("Schedule", {})
+        # Only the tray icon at startup ("StartMinimized" or a logon start); the window is
+        # built when first opened
+        if start_minimized is None:
+            start_minimized = self.config.get("StartMinimized", False)
+        self.start_minimized = bool(start_minimized)
+        self.view = None
+        # Callbacks from the runtime, tray and control threads reach Tk through this queue
+        self.ui = TkPump(self.root)
+        self.ui.start()
+        # Levels changed elsewhere (control API, external edit) show up in the window
+        self.config_manager.subscribe(self.on_config_changed)
 
-        # Initialize TrayService
-        self.tray_service = TrayService(
-            show_window_callback=self.show_window_from_tray,
-            exit_app_callback=self.exit_app_from_tray,
-            lang_strings=self.lang_strings,
+        # Initialize TrayService, or take over the one main.py showed before tkinter was loaded
+        diagnostics_callback = (
+            self.show_diagnostics_from_tray if self.scheduler_service else None
         )
-        self.tray_service.create_tray_icon()
+        if tray_service is None:
+            self.tray_service = TrayService(
+                show_window_callback=self.show_window_from_tray,
+                exit_app_callback=self.exit_app_from_tray,
+                lang_strings=self.lang_strings,
+                diagnostics_callback=diagnostics_callback,
+            )
+        else:
+            self.tray_service = tray_service
+            self.tray_service.show_window_callback = self.show_window_from_tray
+            self.tray_service.exit_app_callback = self.exit_app_from_tray
+            self.tray_service.diagnostics_callback = diagnostics_callback
+        # The icon shows each level the scheduler applies
+        if self.scheduler_service and self.tray_service.scheduler_service is None:
+            self.tray_service.set_level(self.scheduler_service.last_level)
+            self.tray_service.follow_scheduler(self.scheduler_service)
 
-        # Initialize View
-        self.view = BrightnessView(self.lang_strings, self.root, self)
-        self.view.create_widgets(self.brightness_levels, self.schedule)
-        self.view.window.protocol("WM_DELETE_WINDOW", self.exit_app_from_tray)
+        if self.start_minimized:
+            self.root.withdraw()
+            # Pillow and pystray are imported once the main loop is idle, not during startup;
+            # with the window open they wait until it is first minimized to the tray
+            self.root.after_idle(self.tray_service.show_tray_icon)
+        else:
+            self.ensure_view()
 
         self.log_service.log_info("BrightnessController initialized.")
 
+    def ensure_view(self):
+        # Build the main window on first use
+        if self.view is None:
+            from views.brightness_view import BrightnessView
+
+            self.view = BrightnessView(self.lang_strings, self.root, self)
+            self.view.create_widgets(self.brightness_levels, self.displayed_schedule())
+            self.view.window.protocol("WM_DELETE_WINDOW", self.exit_app_from_tray)
+        return self.view
+
     def update_brightness_view(self):
         self.config = self.config_manager.load_config()
-        self.schedule = self.config.get("Schedule", {})
-        self.brightness_levels = self.config.get("BrightnessLevels", {})
-        self.view.update_brightness_inputs(self.schedule)
-        self.view.update_language(self.lang_strings, self.schedule)
+        self.load_active_profile()
+        if self.view is None:
+            return
+        # One batched refresh: only the rows, labels and values that changed are touched
+        self.view.request_update(
+            lang_strings=self.lang_strings,
+            brightness_levels=self.brightness_levels,
+            schedule=self.displayed_schedule(),
+        )
         self.log_service.log_info(
             "Brightness view updated with new schedule and brightness levels."
         )
 
+    def on_config_changed(self, config):
+        # Called on the saving or watching thread; the view is refreshed on the Tk thread
+        self.ui.call_soon(self.update_brightness_view)
+
+    def load_active_profile(self):
+        # Schedule and levels of the profile active today (the top-level ones without profiles)
+        active_config = apply_profile(self.config, date.today())
+        self.profile = None
+        if uses_profiles(self.config):
+            self.profile = active_config.get("ActiveProfile")
+        self.schedule = active_config.get("Schedule", {})
+        self.brightness_levels = active_config.get("BrightnessLevels", {})
+        self.arm_profile_refresh()
+
+    def arm_profile_refresh(self):
+        # Refresh the window at the midnight another profile takes over
+        if self.profile_job:
+            self.root.after_cancel(self.profile_job)
+            self.profile_job = None
+        now = datetime.now()
+        profile_change = next_profile_change(self.config, now)
+        if profile_change:
+            delay_ms = int((profile_change - now).total_seconds() * 1000) + 1
+            # Long waits are split so clock changes and Tk's timer limits do not matter
+            delay_ms = min(max(delay_ms, 1), self.PROFILE_REFRESH_MAX_MS)
+            self.profile_job = self.root.after(delay_ms, self.update_brightness_view)
+
+    def profile_display_name(self, profile):
+        if profile == DEFAULT_PROFILE:
+            return self.lang_strings.get("MSG_36", "Default")
+        return profile
+
+    def get_compiled_schedule(self):
+        return CompiledSchedule.from_config(
+            dict(
+                self.config,
+                Schedule=self.schedule,
+                BrightnessLevels=self.brightness_levels,
+            )
+        )
+
+    def displayed_schedule(self):
+        # The views show today's times of periods set relative to sunrise/sunset
+        return resolve_schedule(self.schedule, self.config.get("Location"), date.today())
+
     def run(self):
         self.log_service.log_info("Running the main Tkinter loop.")
-        self.view.mainloop()
+        self.root.mainloop()
 
     def apply_settings(self):
         try:
@@ -63,8 +173,9 @@ class BrightnessController:
                 new_brightness_levels[key] = value
 
             self.brightness_levels = new_brightness_levels
-            self.config["BrightnessLevels"] = new_brightness_levels
-            if self.config_manager.save_brightness_settings(new_brightness_levels):
+            if self.config_manager.save_brightness_settings(
+                new_brightness_levels, self.profile
+            ):
                 self.view.show_success_message()
                 self.log_service.log_info("Brightness settings saved successfully.")
                 self.update_brightness_view()
@@ -84,25 +195,77 @@ class BrightnessController:
     def minimize_to_tray(self):
         self.log_service.log_info("Minimizing window to tray.")
         self.view.withdraw_window()
-        self.tray_service.create_tray_icon()
+        self.tray_service.show_tray_icon()
 
     def show_window_from_tray(self):
+        # Called on the tray thread; widgets are only touched from the Tk thread
+        self.ui.call_soon(self.show_window)
+
+    def show_window(self):
         self.log_service.log_info("Showing window from tray.")
-        self.view.deiconify_window()
+        self.ensure_view().deiconify_window()
         self.tray_service.hide_tray_icon()
 
+    def show_diagnostics_from_tray(self):
+        # Called on the tray thread; the dialog must be opened from the Tk thread
+        self.ui.call_soon(self.show_diagnostics)
+
+    def show_diagnostics(self):
+        recorder = self.scheduler_service.latency_recorder
+        summary = recorder.summary()
+        report_saved = recorder.dump(DEFAULT_REPORT_PATH)
+
+        def percentiles(metric):
+            values = summary[metric]
+            return " / ".join(
+                f"{name} {'-' if values[name] is None else round(values[name], 1)}"
+                for name in ("p50", "p95", "p99")
+            )
+
+        lines = [
+            self.lang_strings.get(
+                "MSG_31", "Brightness changes: {total} (errors: {errors})"
+            ).format(total=summary["total"], errors=summary["errors"]),
+            f"{self.lang_strings.get('MSG_32', 'Boundary to applied')} (ms): "
+            f"{percentiles('boundary_to_applied_ms')}",
+            f"{self.lang_strings.get('MSG_33', 'Setter call')} (ms): "
+            f"{percentiles('setter_ms')}",
+        ]
+        if report_saved:
+            lines.append(
+                self.lang_strings.get("MSG_34", "Report saved to {path}").format(
+                    path=DEFAULT_REPORT_PATH
+                )
+            )
+        self.log_service.log_info("Latency summary: %s", summary)
+        messagebox.showinfo(
+            self.lang_strings.get("MSG_30", "Diagnostics"), "\n".join(lines)
+        )
+
     def exit_app_from_tray(self):
         self.log_service.log_info("Exiting the application from tray.")
-        self.exit_application()
+        # Also the window's close button; the tray menu calls this on its own thread
+        self.ui.call_soon(self.exit_application)
 
     def exit_application(self):
         self.log_service.log_info("Finalizing the application.")
+        # Write any debounced configuration change before leaving
+        self.config_manager.unsubscribe(self.on_config_changed)
+        if self.profile_job:
+            self.root.after_cancel(self.profile_job)
+            self.profile_job = None
+        self.ui.stop()
+        self.config_manager.flush()
         self.tray_service.destroy_tray_icon()
-        self.powershell_service.stop_powershell()
+        if self.scheduler_service:
+            self.scheduler_service.stop()
+        self.brightness_backend.stop()
         self.root.quit()
         self.root.destroy()
 
     def open_settings(self):
+        from controller.settings_controller import SettingsController
+
         settings_controller = SettingsController(
             self.view.window, self.config_manager, self
         )
@@ -112,8 +275,8 @@ class BrightnessController:
             updated_language
         )
         self.lang_strings = updated_lang_strings
-        self.schedule = self.config.get("Schedule", {})
-        self.view.update_language(self.lang_strings, self.schedule)
+        self.load_active_profile()
+        self.view.update_language(self.lang_strings, self.displayed_schedule())
         self.tray_service.update_tray_icon(lang_strings=self.lang_strings)
         self.log_service.log_info("Language and settings updated.")
 
@@ -121,7 +284,7 @@ class BrightnessController:
         try:
             hour = int(hour_24)
         except (ValueError, TypeError):
-            self.log_service.log_error(f"Invalid hour value for conversion: {hour_24}")
+            self.log_service.log_error("Invalid hour value for conversion: %s", hour_24)
             return "", ""
 
         if hour == 0:
@@ -133,7 +296,5 @@ class BrightnessController:
         elif 13 <= hour < 24:
             return hour - 12, "PM"
         else:
-            self.log_service.log_error(
-                f"Hour value out of range for conversion: {hour}"
-            )
+            self.log_service.log_error("Hour value out of range for conversion: %s", hour)
             return hour, "AM"
@@ -1,15 +1,40 @@
 # controllers/settings_controller.py
 
+from datetime import date
 from tkinter import messagebox
+from model.config_validation import schedule_errors
+from model.profile_model import (
+    DEFAULT_PROFILE,
+    active_profile,
+    level_sections,
+    profile_config,
+    profile_section,
+    uses_profiles,
+)
+from model.schedule_model import ScheduleModel
+from model.solar_model import (
+    location_errors,
+    resolve_schedule,
+    restore_solar_times,
+    table_for,
+    uses_solar_times,
+)
 from views.settings_view import SettingsView
 from services.log_service import LogService
 
 
 class SettingsController:
+    # Brightness level given to periods added in the settings window
+    NEW_PERIOD_LEVEL = 30
+
     def __init__(self, parent_window, config_manager, brightness_controller):
         self.log_service = LogService()
         self.config_manager = config_manager
         self.model = self.config_manager.load_config()
+        # The window edits the schedule of the profile active today
+        self.profile = (
+            active_profile(self.model, date.today()) if uses_profiles(self.model) else None
+        )
         self.language_code = self.model.get("Language", "EN")
         self.lang_strings = self.config_manager.load_language_strings(
             self.language_code
@@ -21,6 +46,7 @@ class SettingsController:
 
     def apply_settings(self, schedule, language_code):
         try:
+            schedule = self.keep_solar_times(schedule)
             # Validate schedule
             if not self.validate_schedule(schedule):
                 raise ValueError(
@@ -30,15 +56,35 @@ class SettingsController:
                     )
                 )
 
+            period_keys = ScheduleModel.from_schedule(
+                resolve_schedule(schedule, self.model.get("Location"), date.today())
+            ).keys()
+
             # Update model with new schedule and language
             self.log_service.log_info("Schedule validation passed.")
-            self.model["Language"] = language_code
-            self.model["Schedule"] = schedule
 
-            self.config_manager.config["Language"] = language_code
-            self.config_manager.config["Schedule"] = schedule
+            def update_schedule(config):
+                config["Language"] = language_code
+                # The schedule goes to the edited profile, or to the top level when the
+                # profile shares it; every level set using it keeps one level per period
+                # (new periods get a default level)
+                schedule_owner = profile_section(
+                    config, self.profile or DEFAULT_PROFILE, "Schedule"
+                )
+                schedule_owner["Schedule"] = schedule
+                for section in level_sections(config, schedule_owner):
+                    brightness_levels = section.get(
+                        "BrightnessLevels", config.get("BrightnessLevels", {})
+                    )
+                    section["BrightnessLevels"] = {
+                        key: brightness_levels.get(key, self.NEW_PERIOD_LEVEL)
+                        for key in period_keys
+                    }
 
-            self.config_manager.save_config()
+            update_schedule(self.model)
+            # Under the config manager's lock, against the latest configuration, since
+            # the control API and the file watcher change it from other threads
+            self.config_manager.update(update_schedule)
 
             # Update the Brightness View and Settings View with the new configuration
             self.brightness_controller.update_brightness_view()
@@ -48,78 +94,65 @@ class SettingsController:
             )
 
         except ValueError as e:
-            self.log_service.log_error(f"ValueError during settings application: {e}")
+            self.log_service.log_error("ValueError during settings application: %s", e)
             error_message = str(e)
             messagebox.showerror(
                 self.lang_strings.get("MSG_07", "Error"), error_message
             )
 
-    def validate_schedule(self, schedule):
-        self.log_service.log_debug("Validating the provided schedule.")
-        # Validate that the time intervals do not overlap and are correctly ordered
-        periods = [
-            ("MorningStart", "MorningEnd"),
-            ("AfternoonStart", "AfternoonEnd"),
-            ("EveningStart", "EveningEnd"),
-            ("NightStart", "NightEnd"),
-        ]
-
-        intervals = []
-        wrap_around_count = 0
-
-        for start, end in periods:
-            if start not in schedule or end not in schedule:
-                self.log_service.log_warning(
-                    f"Schedule missing start or end for period: {start}, {end}"
-                )
-                return False
-            start_time = schedule[start]
-            end_time = schedule[end]
+    def profile_model(self):
+        # The configuration as seen by the edited profile
+        if self.profile is None:
+            return self.model
+        return profile_config(self.model, self.profile)
+
+    def profile_caption(self):
+        if self.profile is None:
+            return ""
+        name = self.profile
+        if name == DEFAULT_PROFILE:
+            name = self.lang_strings.get("MSG_36", "Default")
+        return self.lang_strings.get("MSG_35", "Profile: {name}").format(name=name)
+
+    def get_schedule_model(self):
+        # Periods set relative to sunrise/sunset are shown with today's times
+        return ScheduleModel.from_schedule(
+            resolve_schedule(
+                self.profile_model().get("Schedule", {}),
+                self.model.get("Location"),
+                date.today(),
+            )
+        )
 
-            if not (0 <= start_time <= 24) or not (0 <= end_time <= 24):
-                self.log_service.log_warning(
-                    f"Schedule times out of bounds for period: {start} - {end}"
-                )
-                return False
-
-            if start_time < end_time:
-                intervals.append((start_time, end_time))
-            elif start_time > end_time:
-                wrap_around_count += 1
-                if wrap_around_count > 1:
-                    self.log_service.log_warning(
-                        "Multiple wrap-around periods detected."
-                    )
-                    return False
-                intervals.append((start_time, 24))
-                intervals.append((0, end_time))
-            else:
-                self.log_service.log_warning(
-                    f"Start time equals end time for period: {start} - {end}"
-                )
-                return False
+    def keep_solar_times(self, schedule):
+        # The window edits fixed times; times left unchanged keep their sunrise/sunset expression
+        original = self.profile_model().get("Schedule", {})
+        location = self.model.get("Location")
+        if not uses_solar_times(original) or location_errors(location):
+            return schedule
+        today = date.today()
+        return restore_solar_times(
+            original, schedule, table_for(location, today).local_events(today)
+        )
 
-        if wrap_around_count > 1:
-            self.log_service.log_warning("More than one wrap-around period detected.")
+    def validate_schedule(self, schedule):
+        self.log_service.log_debug("Validating the provided schedule.")
+        # Compiling the schedule runs a sorted sweep over the periods: O(n log n)
+        errors = schedule_errors(
+            schedule,
+            self.profile_model().get("BrightnessLevels", {}),
+            self.model.get("Location"),
+        )
+        for error in errors:
+            self.log_service.log_warning(error)
+        if errors:
             return False
 
-        intervals_sorted = sorted(intervals, key=lambda x: x[0])
-        self.log_service.log_debug(f"Sorted intervals: {intervals_sorted}")
-
-        for i in range(len(intervals_sorted) - 1):
-            current_end = intervals_sorted[i][1]
-            next_start = intervals_sorted[i + 1][0]
-            if current_end > next_start:
-                self.log_service.log_warning(
-                    f"Overlap detected between intervals: {intervals_sorted[i]} and {intervals_sorted[i + 1]}"
-                )
-                return False
-
         self.log_service.log_info("Schedule validation passed.")
         return True
 
     def convert_to_24_hour(self, hour, ampm):
-        self.log_service.log_debug(f"Converting {hour} {ampm} to 24-hour format.")
+        self.log_service.log_debug("Converting %s %s to 24-hour format.", hour, ampm)
         if ampm.upper() == "AM":
             if hour == 12:
                 return 0
@@ -131,12 +164,12 @@ class SettingsController:
             else:
                 return hour + 12
         else:
-            self.log_service.log_error(f"Invalid AM/PM specifier: {ampm}")
+            self.log_service.log_error("Invalid AM/PM specifier: %s", ampm)
             return hour
 
     def convert_to_12_hour(self, hour_24):
         self.log_service.log_debug(
-            f"Converting {hour_24} from 24-hour to 12-hour format."
+            "Converting %s from 24-hour to 12-hour format.", hour_24
         )
         if hour_24 == 0:
             return 12, "AM"
@@ -147,5 +180,5 @@ class SettingsController:
         elif 13 <= hour_24 <= 23:
             return hour_24 - 12, "PM"
         else:
-            self.log_service.log_error(f"Invalid hour value: {hour_24}")
+            self.log_service.log_error("Invalid hour value: %s", hour_24)
             return hour_24, "AM"
@@ -0,0 +1,297 @@
+# main/cli.py
+#
+# Headless entry point: runs the scheduler and the brightness backend without Tk.
+#
+#   python main/cli.py run                     # scheduler only, until Ctrl+C
+#   python main/cli.py status [--json]
+#   python main/cli.py set <level> [--display ID]
+#   python main/cli.py apply-now
+#   python main/cli.py validate-config [--json]
+#   python main/cli.py next-transition [--json]
+#   python main/cli.py events                  # brightness/config events of the running instance
+#
+# set and apply-now go through the running instance when there is one, so no second
+# brightness worker is started.
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+
+# Setup paths
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.chdir(project_root)
+
+from model.brightness import MAX_LEVEL, MIN_LEVEL
+from model.config_validation import validate_config
+from model.data_model import ConfigManager
+from model.display_model import display_states, format_moment
+from model.profile_model import uses_profiles
+from services.ambient_service import AmbientService
+from services.brightness_backend import DEFAULT_BACKEND, create_backend
+from services.brightness_state import BrightnessStateTracker
+from services.control_service import (
+    ControlError,
+    ControlServer,
+    InstanceAlreadyRunningError,
+    connect_to_running_instance,
+)
+from services.latency_service import DEFAULT_REPORT_PATH
+from services.log_service import LogService
+from services.runtime import get_runtime
+from services.scheduler_service import SchedulerService
+
+SCRIPT_PATH = os.path.join(project_root, "controller", "adjust_brightness.ps1")
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def print_result(result, as_json, lines):
+    if as_json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print("\n".join(lines))
+
+
+def command_status(config_manager, args):
+    config = config_manager.load_config()
+    problems = validate_config(config)
+    states = display_states(config, datetime.now())
+    result = {
+        "config_path": config_manager.CONFIG_PATH,
+        "language": config.get("Language", config_manager.DEFAULT_LANG),
+        "backend": config.get("Backend", DEFAULT_BACKEND),
+        "valid": not problems,
+        "displays": states,
+    }
+    lines = [
+        f"Config:   {result['config_path']} ({'valid' if result['valid'] else 'INVALID'})",
+        f"Language: {result['language']}",
+        f"Backend:  {result['backend']}",
+    ]
+    if uses_profiles(config) and states:
+        lines.append(f"Profile:  {states[0]['profile']}")
+    for state in states:
+        lines.append(
+            f"{state['display']}: period {state['period']}, level {state['level']}, "
+            f"next {state['next_transition']} -> {state['next_level']}"
+        )
+    print_result(result, args.json, lines)
+    return EXIT_OK
+
+
+def command_next_transition(config_manager, args):
+    states = display_states(config_manager.load_config(), datetime.now())
+    transitions = [
+        {key: state[key] for key in ("display", "next_transition", "next_level")}
+        for state in states
+    ]
+    lines = [
+        f"{state['display']}: {state['next_transition']} -> level {state['next_level']}"
+        for state in transitions
+    ]
+    print_result(transitions, args.json, lines)
+    return EXIT_OK
+
+
+def command_validate_config(config_manager, args):
+    problems = validate_config(config_manager.load_config())
+    lines = [f"{config_manager.CONFIG_PATH} is valid."]
+    if problems:
+        lines = [f"{config_manager.CONFIG_PATH} is invalid:"]
+        for section, errors in problems.items():
+            lines.extend(f"  {section}: {error}" for error in errors)
+    print_result({"valid": not problems, "errors": problems}, args.json, lines)
+    return EXIT_FAILED if problems else EXIT_OK
+
+
+def create_started_backend(config_manager, runtime=None):
+    backend = BrightnessStateTracker(
+        create_backend(config_manager.load_config(), SCRIPT_PATH, runtime)
+    )
+    backend.start()
+    return backend
+
+
+def request_running_instance(command, **params):
+    # (True, result) when an instance answered, (False, None) when none is running
+    client = connect_to_running_instance(project_root)
+    if client is None:
+        return False, None
+    with client:
+        return True, client.request(command, **params)
+
+
+def command_set(config_manager, args):
+    if not MIN_LEVEL <= args.level <= MAX_LEVEL:
+        print(f"Level must be between {MIN_LEVEL} and {MAX_LEVEL}.", file=sys.stderr)
+        return EXIT_FAILED
+    try:
+        running, _ = request_running_instance(
+            "set_brightness", level=args.level, display=args.display
+        )
+    except ControlError as e:
+        print(f"Running instance: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    if running:
+        print(f"Brightness set to {args.level} by the running instance.")
+        return EXIT_OK
+    backend = create_started_backend(config_manager)
+    try:
+        applied = backend.set_brightness(args.level, args.display)
+    finally:
+        backend.stop()
+    display = args.display or "primary"
+    if not applied:
+        print(f"Failed to set brightness {args.level} on {display}.", file=sys.stderr)
+        return EXIT_FAILED
+    print(f"Brightness set to {args.level} on {display}.")
+    return EXIT_OK
+
+
+def command_apply_now(config_manager, args):
+    # One scheduler pass applying the scheduled level of every display immediately
+    running, _ = request_running_instance("apply_now")
+    if running:
+        print("Scheduled levels re-applied by the running instance.")
+        return EXIT_OK
+    backend = create_started_backend(config_manager)
+    try:
+        scheduler_service = SchedulerService(config_manager, backend)
+        scheduler_service.notify_config_changed()
+        next_boundary = scheduler_service.apply_now()
+        levels = scheduler_service.levels()
+    finally:
+        backend.stop()
+    for display_id, level in levels.items():
+        print(f"{display_id}: level {level}")
+    print(f"Next boundary: {format_moment(next_boundary)}")
+    # Displays left without a level were not covered by their schedule or the backend failed
+    failed = [display_id for display_id, level in levels.items() if level is None]
+    if failed:
+        print(f"No level applied to: {', '.join(failed)}", file=sys.stderr)
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def command_run(config_manager, args):
+    # Scheduler and backend only, until interrupted
+    stop_requested = threading.Event()
+    for signal_name in ("SIGINT", "SIGTERM"):
+        if hasattr(signal, signal_name):
+            signal.signal(getattr(signal, signal_name), lambda *_: stop_requested.set())
+
+    runtime = get_runtime()
+    control_server = ControlServer(config_manager, project_root, runtime=runtime)
+    try:
+        control_server.start()
+    except InstanceAlreadyRunningError:
+        print("Brightness Control is already running.", file=sys.stderr)
+        return EXIT_FAILED
+    except OSError as e:
+        logging.warning(f"Control server unavailable: {e}")
+        control_server = None
+
+    config_manager.start_watching(runtime)
+    backend = create_started_backend(config_manager, runtime)
+    scheduler_service = SchedulerService(config_manager, backend, runtime=runtime)
+    scheduler_service.start()
+    if control_server:
+        control_server.attach(scheduler_service)
+    ambient_service = AmbientService(config_manager, scheduler_service, runtime)
+    ambient_service.start()
+    logging.info("Headless brightness scheduler running.")
+    try:
+        while not stop_requested.wait(1):
+            pass
+    finally:
+        if control_server:
+            control_server.stop()
+        ambient_service.stop()
+        scheduler_service.stop()
+        scheduler_service.latency_recorder.dump(DEFAULT_REPORT_PATH)
+        config_manager.stop_watching()
+        config_manager.flush()
+        backend.stop()
+        runtime.stop()
+    return EXIT_OK
+
+
+def command_events(config_manager, args):
+    # Print the running instance's events as JSON lines until interrupted
+    client = connect_to_running_instance(project_root)
+    if client is None:
+        print("Brightness Control is not running.", file=sys.stderr)
+        return EXIT_FAILED
+    with client:
+        client.request("subscribe")
+        try:
+            for event in client.events():
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+        except KeyboardInterrupt:
+            pass
+        except ConnectionError:
+            print("The running instance closed the connection.", file=sys.stderr)
+            return EXIT_FAILED
+    return EXIT_OK
+
+
+COMMANDS = {
+    "run": command_run,
+    "status": command_status,
+    "set": command_set,
+    "apply-now": command_apply_now,
+    "validate-config": command_validate_config,
+    "next-transition": command_next_transition,
+    "events": command_events,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Brightness Control without the graphical interface"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("run", help="run the scheduler until interrupted")
+    for name, help_text in (
+        ("status", "show the configuration and the scheduled level of each display"),
+        ("validate-config", "check config.json; exit code 1 when it is invalid"),
+        ("next-transition", "show the next schedule boundary of each display"),
+    ):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--json", action="store_true", help="print JSON")
+    set_parser = subparsers.add_parser("set", help="apply a brightness level once")
+    set_parser.add_argument("level", type=int)
+    set_parser.add_argument("--display", help="display id (default: primary)")
+    subparsers.add_parser("apply-now", help="apply the scheduled levels once")
+    subparsers.add_parser("events", help="print the running instance's events")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Only the long-running mode keeps a log file; one-shot commands log warnings to stderr
+    if args.command == "run":
+        log_service = LogService()
+    else:
+        log_service = LogService(log_level=logging.WARNING, log_to_file=False)
+
+    try:
+        return COMMANDS[args.command](ConfigManager(), args)
+    finally:
+        if args.command == "run":
+            log_service.finalize_log_file()
+        else:
+            log_service.stop_listener()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
+import argparse
 import os
+import queue
 import sys
 
 # Setup paths
@@ -17,42 +19,183 @@ log_service = LogService()
 # Set Python Path (embedded or system)
 log_service.set_embedded_python_path()
 
-try:
-    from tkinter import Tk
-except ImportError as e:
-    log_service.log_error(
-        "Tkinter is required but not found. Please install it or use the embedded Python."
+# Only what is needed to apply the brightness is imported up front; tkinter, the
+# controllers and the views are imported once the scheduler is running
+from model.data_model import ConfigManager
+from services.ambient_service import AmbientService
+from services.brightness_backend import create_backend
+from services.brightness_state import BrightnessStateTracker
+from services.control_service import (
+    ControlServer,
+    InstanceAlreadyRunningError,
+    connect_to_running_instance,
+)
+from services.latency_service import DEFAULT_REPORT_PATH
+from services.runtime import get_runtime
+from services.scheduler_service import SchedulerService
+from services.tray_service import TrayService
+
+# Longest wait for the first brightness application before the UI is set up
+FIRST_APPLY_TIMEOUT = 5
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Brightness Control")
+    parser.add_argument(
+        "--logon",
+        action="store_true",
+        help="started at logon: show only the tray icon until the window is opened",
     )
-    sys.exit(1)
+    # pythonw has no console to report usage errors on; unknown arguments are ignored
+    return parser.parse_known_args(argv)[0]
 
-from controller.brightness_controller import BrightnessController
-from services.powershell_service import PowerShellService
+def wait_for_ui_request(config_manager, scheduler_service, control_server):
+    # Minimized start: only the tray icon is shown, and tkinter, the controller and the
+    # window are loaded once it (or a second instance) asks for them. Returns the tray
+    # and the request: "open", "diagnostics" or "exit".
+    requests = queue.SimpleQueue()
+    config = config_manager.load_config()
+    tray_service = TrayService(
+        show_window_callback=lambda: requests.put("open"),
+        exit_app_callback=lambda: requests.put("exit"),
+        lang_strings=config_manager.load_language_strings(config.get("Language", "EN")),
+        diagnostics_callback=lambda: requests.put("diagnostics"),
+    )
+    tray_service.set_level(scheduler_service.last_level)
+    tray_service.follow_scheduler(scheduler_service)
+    try:
+        tray_service.show_tray_icon()
+    except ImportError as e:
+        log_service.log_warning("Tray icon unavailable (%s); opening the window.", e)
+        return None, "open"
+    if control_server:
+        control_server.show_window_callback = lambda: requests.put("open")
+    return tray_service, requests.get()
 
-def main():
+def show_running_instance():
+    client = connect_to_running_instance(project_root)
+    if client is None:
+        return
+    with client:
+        try:
+            client.request("show_window")
+        except (OSError, ValueError) as e:
+            log_service.log_warning("Could not show the running instance: %s", e)
+
+def main(argv=None):
+    args = parse_arguments(argv)
     try:
         # Define the absolute path to the PowerShell script
         script_path = os.path.join(project_root, "controller", "adjust_brightness.ps1")
 
-        # Initialize PowerShellService
-        powershell_service = PowerShellService(script_path)
-        powershell_service.start_powershell()
-        powershell_service.start_monitoring()
+        # Shared configuration, watched for external edits
+        config_manager = ConfigManager()
+
+        # Event loop thread for the scheduler, the worker supervision, the control server
+        # and config polling
+        runtime = get_runtime()
+
+        # The control endpoint is also the single-instance lock: a second copy asks the
+        # running one to show its window instead of starting another brightness worker
+        control_server = ControlServer(config_manager, project_root, runtime=runtime)
+        try:
+            control_server.start()
+        except InstanceAlreadyRunningError:
+            log_service.log_info("Brightness Control is already running; showing its window.")
+            show_running_instance()
+            control_server = None
+            return
+        except OSError as e:
+            log_service.log_warning("Control server unavailable: %s", e)
+            control_server = None
+
+        config_manager.start_watching(runtime)
+
+        # Brightness backend chosen by config["Backend"] (in-process DWM call, PowerShell worker, ...)
+        # wrapped so that writes repeating the last applied value are skipped
+        brightness_backend = BrightnessStateTracker(
+            create_backend(config_manager.load_config(), script_path, runtime)
+        )
+        brightness_backend.start()
+
+        # Start the scheduler, which wakes up only at schedule boundaries
+        scheduler_service = SchedulerService(
+            config_manager, brightness_backend, runtime=runtime
+        )
+        scheduler_service.start()
+        if control_server:
+            control_server.attach(scheduler_service)
+        scheduler_service.first_pass_done.wait(FIRST_APPLY_TIMEOUT)
+
+        # Ambient light readings blended into the schedule when "Adaptive" is enabled
+        ambient_service = AmbientService(config_manager, scheduler_service, runtime)
+        ambient_service.start()
+
+        # Logon starts and "StartMinimized" wait with the tray icon alone
+        start_minimized = args.logon or bool(
+            config_manager.load_config().get("StartMinimized", False)
+        )
+        tray_service = None
+        if start_minimized:
+            tray_service, ui_request = wait_for_ui_request(
+                config_manager, scheduler_service, control_server
+            )
+            if ui_request == "exit":
+                log_service.log_info("Exiting the application from tray.")
+                return
+
+        try:
+            from tkinter import Tk
+        except ImportError:
+            log_service.log_error(
+                "Tkinter is required but not found. Please install it or use the embedded Python."
+            )
+            sys.exit(1)
+        from controller.brightness_controller import BrightnessController
 
         # Initialize Tkinter root
         root = Tk()
 
-        # Initialize BrightnessController with root and PowerShellService
-        controller = BrightnessController(root, powershell_service)
+        # Initialize BrightnessController with root and the services
+        controller = BrightnessController(
+            root,
+            brightness_backend,
+            scheduler_service,
+            config_manager,
+            tray_service=tray_service,
+            start_minimized=start_minimized and tray_service is not None,
+        )
+        if control_server:
+            control_server.show_window_callback = controller.show_window_from_tray
+        if tray_service is not None:
+            # What the tray asked for before the UI was loaded
+            if ui_request == "diagnostics":
+                controller.ui.call_soon(controller.show_diagnostics)
+            else:
+                controller.ui.call_soon(controller.show_window)
 
         # Run the application
         controller.run()
 
     except Exception as e:
-        log_service.log_error(f"An unexpected error occurred: {e}")
+        log_service.log_error("An unexpected error occurred: %s", e)
         sys.exit(1)
     finally:
-        if "powershell_service" in locals() and powershell_service:
-            powershell_service.stop_powershell()
+        if "tray_service" in locals() and tray_service:
+            tray_service.destroy_tray_icon()
+        if "control_server" in locals() and control_server:
+            control_server.stop()
+        if "ambient_service" in locals() and ambient_service:
+            ambient_service.stop()
+        if "scheduler_service" in locals() and scheduler_service:
+            scheduler_service.stop()
+            scheduler_service.latency_recorder.dump(DEFAULT_REPORT_PATH)
+        if "config_manager" in locals() and config_manager:
+            config_manager.stop_watching()
+            config_manager.flush()
+        if "brightness_backend" in locals() and brightness_backend:
+            brightness_backend.stop()
+        if "runtime" in locals() and runtime:
+            runtime.stop()
             
         log_service.finalize_log_file()
 
@@ -0,0 +1,196 @@
+# model/ambient_model.py
+
+import math
+from bisect import bisect_right
+
+from model.brightness import MAX_LEVEL, MIN_LEVEL
+
+# Lux -> level points used when config.json has no "Adaptive.Curve"
+DEFAULT_LUX_CURVE = [[0, 10], [50, 30], [300, 50], [1000, 75], [10000, 100]]
+
+
+class LuxCurve:
+    # User-defined [[lux, level], ...] points, interpolated on a log scale because
+    # perceived brightness follows the logarithm of the illuminance. Below the first
+    # and above the last point the end levels are kept.
+
+    def __init__(self, points):
+        points = sorted((max(float(lux), 0.0), int(level)) for lux, level in points)
+        self.positions = [math.log10(1 + lux) for lux, _ in points]
+        self.levels = [level for _, level in points]
+
+    def level_at(self, lux):
+        position = math.log10(1 + max(lux, 0.0))
+        index = bisect_right(self.positions, position)
+        if index == 0:
+            return self.levels[0]
+        if index == len(self.positions):
+            return self.levels[-1]
+        low, high = self.positions[index - 1], self.positions[index]
+        fraction = (position - low) / (high - low)
+        low_level, high_level = self.levels[index - 1], self.levels[index]
+        return round(low_level + (high_level - low_level) * fraction)
+
+
+class AmbientFilter:
+    # Exponential moving average of the readings with a hysteresis band on its output:
+    # update() returns a new smoothed value only once the average has moved more than
+    # `hysteresis` (relative) and `min_delta` (lux) away from the last value it returned,
+    # so flicker and passing shadows never reach the display. O(1) per reading.
+
+    def __init__(self, time_constant, hysteresis, min_delta=5.0):
+        # time_constant: seconds for the average to cover ~63% of a step change
+        self.time_constant = max(float(time_constant), 0.0)
+        self.hysteresis = max(float(hysteresis), 0.0)
+        self.min_delta = max(float(min_delta), 0.0)
+        self.average = None
+        self.output = None
+        self._last_time = None
+
+    def update(self, lux, now):
+        # now: monotonic seconds; uneven sampling is handled by deriving alpha from the gap
+        if self.average is None:
+            self.average = lux
+        else:
+            elapsed = max(now - self._last_time, 0.0)
+            if self.time_constant > 0:
+                alpha = 1 - math.exp(-elapsed / self.time_constant)
+            else:
+                alpha = 1.0
+            self.average += alpha * (lux - self.average)
+        self._last_time = now
+
+        if self.output is not None:
+            threshold = max(self.output * self.hysteresis, self.min_delta)
+            if abs(self.average - self.output) <= threshold:
+                return None
+        self.output = self.average
+        return self.output
+
+    def reset(self):
+        self.average = None
+        self.output = None
+        self._last_time = None
+
+
+def blend_levels(scheduled_level, ambient_level, weight, step=1):
+    # Mix the scheduled level with the sensor's level (weight 0: schedule only,
+    # 1: sensor only) and round to a multiple of step
+    if ambient_level is None:
+        return scheduled_level
+    weight = min(max(weight, 0.0), 1.0)
+    level = scheduled_level + (ambient_level - scheduled_level) * weight
+    step = max(int(step), 1)
+    level = int(round(level / step)) * step
+    return min(max(level, MIN_LEVEL), MAX_LEVEL)
+
+
+class AdaptiveSettings:
+    # The "Adaptive" block of config.json
+    DEFAULT_SAMPLE_HZ = 2.0
+    MIN_SAMPLE_HZ = 0.1
+    MAX_SAMPLE_HZ = 10.0
+    DEFAULT_SMOOTHING_SECONDS = 10.0
+    DEFAULT_HYSTERESIS = 0.1
+    DEFAULT_WEIGHT = 0.5
+    DEFAULT_STEP = 5
+
+    def __init__(
+        self,
+        enabled=False,
+        sensor="sysfs",
+        path=None,
+        sample_hz=DEFAULT_SAMPLE_HZ,
+        smoothing_seconds=DEFAULT_SMOOTHING_SECONDS,
+        hysteresis=DEFAULT_HYSTERESIS,
+        curve=None,
+        weight=DEFAULT_WEIGHT,
+        step=DEFAULT_STEP,
+    ):
+        self.enabled = enabled
+        self.sensor = sensor
+        self.path = path
+        self.sample_hz = min(max(sample_hz, self.MIN_SAMPLE_HZ), self.MAX_SAMPLE_HZ)
+        self.smoothing_seconds = smoothing_seconds
+        self.hysteresis = hysteresis
+        self.curve = curve or DEFAULT_LUX_CURVE
+        self.weight = weight
+        self.step = step
+
+    @classmethod
+    def from_config(cls, config):
+        # {"Enabled": true, "Sensor": "sysfs" | "csv", "Path": ..., "SampleHz": 2,
+        #  "SmoothingSeconds": 10, "Hysteresis": 0.1, "Curve": [[lux, level], ...],
+        #  "Weight": 0.5, "Step": 5}
+        # An invalid block (see adaptive_errors) leaves the adaptive mode off
+        adaptive = config.get("Adaptive") or {}
+        if adaptive_errors(adaptive):
+            return cls()
+        return cls(
+            enabled=bool(adaptive.get("Enabled", False)),
+            sensor=adaptive.get("Sensor", "sysfs"),
+            path=adaptive.get("Path"),
+            sample_hz=float(adaptive.get("SampleHz", cls.DEFAULT_SAMPLE_HZ)),
+            smoothing_seconds=float(
+                adaptive.get("SmoothingSeconds", cls.DEFAULT_SMOOTHING_SECONDS)
+            ),
+            hysteresis=float(adaptive.get("Hysteresis", cls.DEFAULT_HYSTERESIS)),
+            curve=adaptive.get("Curve"),
+            weight=float(adaptive.get("Weight", cls.DEFAULT_WEIGHT)),
+            step=int(adaptive.get("Step", cls.DEFAULT_STEP)),
+        )
+
+    def build_filter(self):
+        return AmbientFilter(self.smoothing_seconds, self.hysteresis)
+
+    def build_curve(self):
+        return LuxCurve(self.curve)
+
+
+def adaptive_errors(adaptive):
+    # Problems in the "Adaptive" block; an empty list means it can be used
+    if not adaptive:
+        return []
+    if not isinstance(adaptive, dict):
+        return ["Adaptive must be an object."]
+    errors = []
+    if adaptive.get("Sensor", "sysfs") not in ("sysfs", "csv"):
+        errors.append(f"Unknown ambient light sensor: {adaptive.get('Sensor')!r}")
+    if adaptive.get("Sensor") == "csv" and not adaptive.get("Path"):
+        errors.append("The csv sensor needs a Path.")
+    for key in ("SampleHz", "SmoothingSeconds", "Hysteresis", "Weight", "Step"):
+        value = adaptive.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            errors.append(f"Adaptive {key} must be a non-negative number: {value!r}")
+    weight = adaptive.get("Weight")
+    if isinstance(weight, (int, float)) and not isinstance(weight, bool) and weight > 1:
+        errors.append(f"Adaptive Weight must be between 0 and 1: {weight}")
+
+    curve = adaptive.get("Curve")
+    if curve is None:
+        return errors
+    if not isinstance(curve, list) or not curve:
+        return errors + ["Adaptive Curve must be a non-empty list of [lux, level] points."]
+    luxes = []
+    for point in curve:
+        if (
+            not isinstance(point, (list, tuple))
+            or len(point) != 2
+            or any(isinstance(value, bool) for value in point)
+            or not isinstance(point[0], (int, float))
+            or not isinstance(point[1], int)
+        ):
+            errors.append(f"Adaptive Curve point is not [lux, level]: {point!r}")
+        elif point[0] < 0:
+            errors.append(f"Adaptive Curve lux must not be negative: {point[0]}")
+        elif not MIN_LEVEL <= point[1] <= MAX_LEVEL:
+            errors.append(
+                f"Adaptive Curve level must be between {MIN_LEVEL} and {MAX_LEVEL}: {point[1]}"
+            )
+        else:
+            luxes.append(point[0])
+    if len(set(luxes)) != len(luxes):
+        errors.append("Adaptive Curve has duplicate lux values.")
+    return errors
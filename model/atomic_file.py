@@ -0,0 +1,45 @@
+# model/atomic_file.py
+
+import os
+import secrets
+import stat
+
+# Permission bits a new file gets before the umask, as with open(path, "w")
+DEFAULT_FILE_MODE = 0o666
+
+
+def atomic_write(path, text, prefix=".tmp-", mode=None, fsync=True):
+    # Write `text` to a temporary file next to `path`, then rename it over `path`, so
+    # readers never see a partially written file. The file keeps the permissions of the
+    # one it replaces; a new file gets the umask's default, or `mode` when given (e.g.
+    # 0o600 for files holding a secret). Raises OSError; the temporary file is removed.
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            pass
+    temp_path = os.path.join(directory, f"{prefix}{secrets.token_hex(8)}.tmp")
+    # O_EXCL like mkstemp, but created with the umask applied instead of 0600
+    fd = os.open(
+        temp_path,
+        os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+        DEFAULT_FILE_MODE if mode is None else mode,
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+            if mode is not None and hasattr(os, "fchmod"):
+                # Exact bits, whatever the umask
+                os.fchmod(temp_file.fileno(), mode)
+            temp_file.write(text)
+            if fsync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
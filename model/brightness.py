@@ -0,0 +1,9 @@
+# model/brightness.py
+
+MIN_LEVEL = 0
+MAX_LEVEL = 100
+
+
+def map_brightness(level):
+    # Same mapping as Set-Brightness in adjust_brightness.ps1: 0-100 -> 1.0-6.0 SDR boost
+    return round(1.0 + (level * 5.0 / 100), 1)
@@ -0,0 +1,127 @@
+# model/compiled_schedule.py
+
+import json
+from array import array
+from bisect import bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
+
+from model.brightness import MAX_LEVEL, MIN_LEVEL
+from model.schedule_model import MINUTES_PER_DAY, ScheduleModel
+from model.solar_model import resolve_schedule, uses_solar_times
+
+NO_PERIOD = -1
+NO_LEVEL = -1
+
+
+def minute_of_day(moment):
+    return moment.hour * 60 + moment.minute
+
+
+class CompiledSchedule:
+    # Minute-resolution lookup table built once per Schedule/BrightnessLevels pair.
+    # level_at() is a single array index and next_transition() a bisect over the boundaries.
+
+    def __init__(self, schedule, brightness_levels):
+        self.model = ScheduleModel.from_schedule(schedule)
+        self.errors = self.model.validate()
+        self.period_table = array("h", [NO_PERIOD]) * MINUTES_PER_DAY
+        self.level_table = array("h", [NO_LEVEL]) * MINUTES_PER_DAY
+        self.boundaries = []
+        self._compile(brightness_levels)
+
+    @classmethod
+    def from_config(cls, config, day=None):
+        # Times relative to sunrise/sunset are resolved for `day` (today by default)
+        schedule = resolve_schedule(
+            config.get("Schedule", {}), config.get("Location"), day or date.today()
+        )
+        return compile_schedule(schedule, config.get("BrightnessLevels", {}))
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    @property
+    def periods(self):
+        return self.model.periods
+
+    def _compile(self, brightness_levels):
+        # Fill in reverse so that, for an invalid overlapping schedule, the first listed period wins
+        for index in reversed(range(len(self.model.periods))):
+            period = self.model.periods[index]
+            try:
+                level = int(brightness_levels[period.key])
+            except (KeyError, TypeError, ValueError):
+                level = NO_LEVEL
+            if level != NO_LEVEL and not MIN_LEVEL <= level <= MAX_LEVEL:
+                # Out of range (and possibly too large for the table): the period has no level
+                error = (
+                    f"Brightness level for {period.key} must be between "
+                    f"{MIN_LEVEL} and {MAX_LEVEL}: {level}"
+                )
+                if error not in self.errors:
+                    self.errors.append(error)
+                level = NO_LEVEL
+            for range_start, range_end in period.ranges():
+                if range_start >= range_end:
+                    continue
+                length = range_end - range_start
+                self.period_table[range_start:range_end] = array("h", [index]) * length
+                self.level_table[range_start:range_end] = array("h", [level]) * length
+
+        # A boundary is every minute where the active period differs from the minute before
+        self.boundaries = [
+            minute
+            for minute in range(MINUTES_PER_DAY)
+            if self.period_table[minute] != self.period_table[minute - 1]
+        ]
+
+    def period_at(self, moment):
+        index = self.period_table[minute_of_day(moment)]
+        return None if index == NO_PERIOD else self.model.periods[index].key
+
+    def level_at(self, moment):
+        level = self.level_table[minute_of_day(moment)]
+        return None if level == NO_LEVEL else level
+
+    def next_transition(self, moment):
+        # Return the datetime of the first boundary strictly after the given moment
+        if not self.boundaries:
+            return None
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        position = bisect_right(self.boundaries, minute_of_day(moment))
+        if position < len(self.boundaries):
+            return midnight + timedelta(minutes=self.boundaries[position])
+        return midnight + timedelta(days=1, minutes=self.boundaries[0])
+
+
+def next_transition_after(config, moment, compiled=None):
+    # Like CompiledSchedule.next_transition(), but a boundary on the next day is taken from
+    # that day's schedule, whose sunrise/sunset times differ slightly
+    compiled = compiled or CompiledSchedule.from_config(config, moment.date())
+    boundary = compiled.next_transition(moment)
+    if boundary is None or boundary.date() == moment.date():
+        return boundary
+    if not uses_solar_times(config.get("Schedule", {})):
+        return boundary
+    next_day = CompiledSchedule.from_config(config, boundary.date())
+    if not next_day.boundaries:
+        return boundary
+    midnight = boundary.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(minutes=next_day.boundaries[0])
+
+
+@lru_cache(maxsize=16)
+def _compile_serialized(serialized):
+    schedule, brightness_levels = json.loads(serialized)
+    return CompiledSchedule(schedule, brightness_levels)
+
+
+def compile_schedule(schedule, brightness_levels):
+    # Compiled schedules are cached by content, so a new table is only built when the config changes
+    try:
+        serialized = json.dumps([schedule, brightness_levels], sort_keys=True)
+    except (TypeError, ValueError):
+        return CompiledSchedule(schedule, brightness_levels)
+    return _compile_serialized(serialized)
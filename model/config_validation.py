@@ -0,0 +1,101 @@
+# model/config_validation.py
+
+from datetime import date
+
+from model.ambient_model import adaptive_errors
+from model.brightness import MAX_LEVEL, MIN_LEVEL
+from model.compiled_schedule import compile_schedule
+from model.display_model import displays_from_config
+from model.profile_model import profile_config, profile_errors
+from model.solar_model import (
+    location_errors,
+    resolve_schedule,
+    uses_solar_times,
+    validation_days,
+)
+
+
+def schedule_errors(schedule, brightness_levels, location=None):
+    # Overlaps and malformed times; the check the settings window runs before saving.
+    # Sunrise/sunset-relative times are checked on today and on the days of the year's
+    # earliest and latest sunrise and sunset, where overlaps would show up first.
+    if not uses_solar_times(schedule):
+        return list(compile_schedule(schedule, brightness_levels).errors)
+    errors = location_errors(location)
+    if errors:
+        return errors
+    seen = set()
+    for day in validation_days(location):
+        resolved = resolve_schedule(schedule, location, day)
+        for error in compile_schedule(resolved, brightness_levels).errors:
+            if error not in seen:
+                seen.add(error)
+                errors.append(f"{day:%m-%d}: {error}")
+    return errors
+
+
+def _period_keys(schedule, location):
+    if uses_solar_times(schedule) and not location_errors(location):
+        schedule = resolve_schedule(schedule, location, date.today())
+    return compile_schedule(schedule, {}).model.keys()
+
+
+def period_keys(schedule, location=None):
+    # Keys of the periods a schedule defines ("B1", "B2", ...)
+    return list(_period_keys(schedule, location))
+
+
+def level_errors(schedule, brightness_levels, location=None):
+    # Every period needs an integer brightness level between MIN_LEVEL and MAX_LEVEL
+    errors = []
+    for key in _period_keys(schedule, location):
+        if key not in brightness_levels:
+            errors.append(f"Missing brightness level for period: {key}")
+            continue
+        level = brightness_levels[key]
+        if isinstance(level, bool) or not isinstance(level, int):
+            errors.append(f"Brightness level for {key} is not an integer: {level!r}")
+        elif not MIN_LEVEL <= level <= MAX_LEVEL:
+            errors.append(
+                f"Brightness level for {key} must be between {MIN_LEVEL} and {MAX_LEVEL}: {level}"
+            )
+    return errors
+
+
+def validate_config(config):
+    # Return {section: [errors]} for the top-level schedule, each profile, each display,
+    # the profile rules and the adaptive mode; an empty dict means the configuration is valid
+    problems = {}
+    sections = [("Schedule", config)]
+    profiles = config.get("Profiles")
+    if isinstance(profiles, dict):
+        sections += [
+            (f"Profiles[{name}]", profile_config(config, name))
+            for name, profile in profiles.items()
+            if isinstance(profile, dict)
+        ]
+    if config.get("Displays"):
+        sections += [
+            (f"Displays[{display.display_id}]", display.to_config())
+            for display in displays_from_config(config)
+        ]
+    location = config.get("Location")
+    for section, section_config in sections:
+        schedule = section_config.get("Schedule", {})
+        brightness_levels = section_config.get("BrightnessLevels", {})
+        levels = level_errors(schedule, brightness_levels, location)
+        # Out-of-range levels are reported by both checks; list them once
+        errors = [
+            error
+            for error in schedule_errors(schedule, brightness_levels, location)
+            if error not in levels
+        ] + levels
+        if errors:
+            problems[section] = errors
+    errors = profile_errors(config)
+    if errors:
+        problems["Profiles"] = errors
+    errors = adaptive_errors(config.get("Adaptive"))
+    if errors:
+        problems["Adaptive"] = errors
+    return problems
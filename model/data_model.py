@@ -2,9 +2,23 @@
 
 import os
 import json
+import copy
+import atexit
 import logging
+import threading
+
+from model.atomic_file import atomic_write
+from model.language_catalog import LanguageCatalog
+from model.profile_model import DEFAULT_PROFILE, profile_section
+from model.schedule_model import DEFAULT_BRIGHTNESS_LEVELS, DEFAULT_SCHEDULE
+
 
 class ConfigManager:
+    # Poll interval for the config watcher when watchdog is not installed
+    WATCH_INTERVAL = 2.0
+    # Saves within this window are coalesced into one write (overridable with "SaveDebounceSeconds")
+    SAVE_DEBOUNCE_SECONDS = 1.0
+
     def __init__(self):
         # Determine the project root directory based on the current working directory
         self.project_root = os.getcwd()
@@ -12,12 +26,63 @@ class ConfigManager:
         # Absolute paths for config.json and lang.json
         self.CONFIG_PATH = os.path.join(self.project_root, "data", "config.json")
         self.LANG_PATH = os.path.join(self.project_root, "data", "lang.json")
+        self.LANG_DIR = os.path.join(self.project_root, "data", "lang")
         self.DEFAULT_LANG = "EN"
+        self.language_catalog = LanguageCatalog(
+            self.LANG_PATH, self.LANG_DIR, self.DEFAULT_LANG
+        )
+
+        # Parsed config.json, re-read only when the file's mtime/size changes
+        self._snapshot = None
+        self._signature = None
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._watcher = None
+        self._watch_stop = threading.Event()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Debounced writer state
+        self._save_timer = None
+        self._pending_save = False
+        self._last_written = None
+        atexit.register(self.flush)
 
         # Load the configuration upon initialization
         self.config = self.load_config()
 
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.CONFIG_PATH)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
     def load_config(self):
+        # Return a copy of the cached configuration, re-reading config.json only if it changed on disk
+        with self._lock:
+            signature = self._file_signature()
+            if self._snapshot is not None and signature == self._signature:
+                self.cache_hits += 1
+                return copy.deepcopy(self._snapshot)
+
+            self.cache_misses += 1
+            previous = self._snapshot
+            self._snapshot = self._read_config()
+            self._signature = signature
+            if signature is not None:
+                self._last_written = json.dumps(self._snapshot, indent=4)
+            changed = previous is not None and previous != self._snapshot
+            if changed:
+                self.config = copy.deepcopy(self._snapshot)
+            config = copy.deepcopy(self._snapshot)
+
+        if changed:
+            logging.info("Configuration changed on disk.")
+            self._notify_subscribers()
+        return config
+
+    def _read_config(self):
         # Load configuration from config.json or return default values if the file is missing
         try:
             with open(self.CONFIG_PATH, "r", encoding="utf-8") as config_file:
@@ -28,64 +93,170 @@ class ConfigManager:
             # Return default settings if config.json is not found
             return {
                 "Language": self.DEFAULT_LANG,
-                "BrightnessLevels": {"B1": 30, "B2": 40, "B3": 15, "B4": 10},
-                "Schedule": {
-                    "MorningStart": 6,
-                    "MorningEnd": 11,
-                    "AfternoonStart": 11,
-                    "AfternoonEnd": 17,
-                    "EveningStart": 17,
-                    "EveningEnd": 23,
-                    "NightStart": 23,
-                    "NightEnd": 6
-                }
+                "BrightnessLevels": dict(DEFAULT_BRIGHTNESS_LEVELS),
+                "Schedule": copy.deepcopy(DEFAULT_SCHEDULE),
             }
 
-    def save_config(self):
-        # Save the current configuration to config.json
+    def cache_stats(self):
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
+    def subscribe(self, callback):
+        # callback(config) is called after config.json changes (saved here or edited externally)
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify_subscribers(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            config = copy.deepcopy(self._snapshot)
+        for callback in subscribers:
+            try:
+                callback(config)
+            except Exception as e:
+                logging.error(f"Config change subscriber failed: {e}")
+
+    def start_watching(self, runtime=None):
+        # Watch config.json for external edits: watchdog notifications if available, stat polling
+        # otherwise (a coroutine on the async runtime when one is given, a thread without it)
+        if self._watcher:
+            return
+        self._watch_stop.clear()
         try:
-            os.makedirs(os.path.dirname(self.CONFIG_PATH), exist_ok=True)
-            with open(self.CONFIG_PATH, "w", encoding="utf-8") as config_file:
-                json.dump(self.config, config_file, indent=4)
-            logging.info(f"Configuration saved to {self.CONFIG_PATH}")
-        except Exception as e:
-            logging.error(f"Failed to save configuration: {e}")
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            if runtime is not None:
+                self._watcher = runtime.submit(self._poll_config_file_async(runtime))
+                logging.info("Watching configuration file by polling.")
+                return
+            self._watcher = threading.Thread(target=self._poll_config_file, daemon=True)
+            self._watcher.start()
+            logging.info("Watching configuration file by polling.")
+            return
+
+        config_manager = self
+
+        class ConfigFileHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [event.src_path, getattr(event, "dest_path", "")]
+                if config_manager.CONFIG_PATH in [os.path.abspath(path) for path in paths if path]:
+                    config_manager.load_config()
+
+        self._watcher = Observer()
+        self._watcher.schedule(ConfigFileHandler(), os.path.dirname(self.CONFIG_PATH))
+        self._watcher.daemon = True
+        self._watcher.start()
+        logging.info("Watching configuration file with watchdog.")
+
+    def stop_watching(self):
+        self._watch_stop.set()
+        if self._watcher and hasattr(self._watcher, "stop"):
+            self._watcher.stop()
+        elif self._watcher and hasattr(self._watcher, "cancel"):
+            self._watcher.cancel()
+        self._watcher = None
+
+    def _poll_config_file(self):
+        # A stat() call per interval; the file is only parsed when its signature changes
+        while not self._watch_stop.wait(self.WATCH_INTERVAL):
+            if self._file_signature() != self._signature:
+                self.load_config()
+
+    async def _poll_config_file_async(self, runtime):
+        # asyncio is only imported by the polling watcher that runs on the runtime
+        import asyncio
+
+        while True:
+            await asyncio.sleep(self.WATCH_INTERVAL)
+            if self._file_signature() != self._signature:
+                await runtime.run_blocking(self.load_config)
+
+    def save_config(self, immediate=False):
+        # Update the cached configuration now and write it to disk once the debounce
+        # window has passed, so bursts of saves end up as a single write
+        with self._lock:
+            self._schedule_save(immediate)
+        self._notify_subscribers()
+
+    def update(self, mutate, immediate=False):
+        # Change the configuration from any thread: mutate(config) runs under the lock on
+        # a copy of the latest configuration (re-read first if config.json changed on
+        # disk), which then replaces it and is saved. If mutate raises, nothing changes.
+        # Returns what mutate returns.
+        self.load_config()
+        with self._lock:
+            config = copy.deepcopy(self.config)
+            result = mutate(config)
+            self.config = config
+            self._schedule_save(immediate)
+        self._notify_subscribers()
+        return result
+
+    def _schedule_save(self, immediate):
+        # Caller holds the lock
+        self._snapshot = copy.deepcopy(self.config)
+        self._pending_save = True
+        if self._save_timer:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+        delay = self.config.get("SaveDebounceSeconds", self.SAVE_DEBOUNCE_SECONDS)
+        if immediate or delay <= 0:
+            self.flush()
+        else:
+            self._save_timer = threading.Timer(delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        # Write a pending save now; skipped when the serialized content did not change
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._pending_save:
+                return
+            self._pending_save = False
+
+            serialized = json.dumps(self._snapshot, indent=4)
+            if serialized == self._last_written:
+                logging.debug("Configuration unchanged on disk; skipping write.")
+                return
+            try:
+                self._atomic_write(serialized)
+                self._last_written = serialized
+                # The saved data is already the cached snapshot; no need to parse it again
+                self._signature = self._file_signature()
+                logging.info(f"Configuration saved to {self.CONFIG_PATH}")
+            except Exception as e:
+                logging.error(f"Failed to save configuration: {e}")
+
+    def _atomic_write(self, text):
+        # Temporary file in the same directory, fsynced, then renamed over config.json so
+        # readers never see a partially written file; config.json keeps its permissions
+        atomic_write(self.CONFIG_PATH, text, prefix=".config-")
 
     def load_language_strings(self, language_code=None):
-        # Load language strings from lang.json or use the default language if not found
+        # Language strings are parsed once and cached by the catalog, with per-key EN fallback
         language_code = language_code or self.config.get("Language", self.DEFAULT_LANG)
-        try:
-            with open(self.LANG_PATH, "r", encoding="utf-8") as lang_file:
-                logging.info(f"Loading language strings from {self.LANG_PATH}")
-                lang_data = json.load(lang_file)
-                return lang_data.get(language_code, lang_data[self.DEFAULT_LANG])
-        except FileNotFoundError:
-            logging.warning(f"Language file not found at {self.LANG_PATH}. Using default English strings.")
-            # Return default English strings if lang.json is missing
-            return {
-                "MSG_01": "Brightness adjusted to",
-                "MSG_02": "internally mapped to",
-                "MSG_03": "Configuration file 'config.json' not found.",
-                "MSG_04": "Brightness Settings",
-                "MSG_05": "Morning (6 AM - 11 AM):",
-                "MSG_06": "Afternoon (11 AM - 5 PM):",
-                "MSG_07": "Evening (5 PM - 11 PM):",
-                "MSG_08": "Night (11 PM - 6 AM):",
-                "MSG_09": "Apply",
-                "MSG_10": "Success! Settings saved.",
-                "MSG_11": "Error: All values must be integers!",
-                "MSG_12": "Open",
-                "MSG_13": "Exit"
-            }
+        return self.language_catalog.get_strings(language_code)
+
+    def save_brightness_settings(self, new_brightness_levels, profile=None):
+        def set_levels(config):
+            # "BrightnessLevels" of the given profile, or of the top level, which profiles
+            # without their own levels share
+            target = profile_section(config, profile or DEFAULT_PROFILE, "BrightnessLevels")
+            target["BrightnessLevels"] = new_brightness_levels
 
-    def save_brightness_settings(self, new_brightness_levels):
         try:
             logging.debug("Attempting to save new brightness settings.")
-            # Update "BrightnessLevels" in the current configuration
-            self.config["BrightnessLevels"] = new_brightness_levels
-
-            # Save the updated configuration
-            self.save_config()
+            self.update(set_levels)
             logging.info("Brightness settings saved successfully.")
             return True
         except Exception as e:
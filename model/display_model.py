@@ -0,0 +1,99 @@
+# model/display_model.py
+
+from model.compiled_schedule import CompiledSchedule, next_transition_after
+from model.profile_model import DEFAULT_PROFILE, apply_profile, next_profile_change
+
+# Display id used when config.json has no "Displays" list, and alias for the primary monitor
+PRIMARY_DISPLAY = "primary"
+
+
+class DisplayConfig:
+    # One monitor with its own schedule; missing Schedule/BrightnessLevels fall back to
+    # the top-level values of config.json. All displays share the top-level Location.
+    def __init__(self, display_id, name, schedule, brightness_levels, location=None):
+        self.display_id = display_id
+        self.name = name
+        self.schedule = schedule
+        self.brightness_levels = brightness_levels
+        self.location = location
+
+    @classmethod
+    def from_dict(cls, display, default_schedule, default_levels, location=None):
+        display_id = str(display.get("Id", PRIMARY_DISPLAY))
+        return cls(
+            display_id,
+            display.get("Name", display_id),
+            display.get("Schedule", default_schedule),
+            display.get("BrightnessLevels", default_levels),
+            location,
+        )
+
+    def to_config(self):
+        # Config shaped like the top level, so CompiledSchedule.from_config() can be reused
+        config = {"Schedule": self.schedule, "BrightnessLevels": self.brightness_levels}
+        if self.location is not None:
+            config["Location"] = self.location
+        return config
+
+
+def displays_from_config(config):
+    # "Displays": [{"Id": "\\\\.\\DISPLAY2", "Name": "Left", "Schedule": {...}, "BrightnessLevels": {...}}]
+    default_schedule = config.get("Schedule", {})
+    default_levels = config.get("BrightnessLevels", {})
+    location = config.get("Location")
+    displays = [
+        DisplayConfig.from_dict(display, default_schedule, default_levels, location)
+        for display in config.get("Displays") or []
+        if isinstance(display, dict)
+    ]
+    if not displays:
+        displays = [
+            DisplayConfig(
+                PRIMARY_DISPLAY, PRIMARY_DISPLAY, default_schedule, default_levels, location
+            )
+        ]
+    return displays
+
+
+def format_moment(moment):
+    return moment.strftime("%Y-%m-%d %H:%M") if moment else None
+
+
+def display_states(config, now):
+    # Scheduled profile, period, level and next transition of every display at the given time
+    today_config = apply_profile(config, now.date())
+    profile = today_config.get("ActiveProfile", DEFAULT_PROFILE)
+    profile_change = next_profile_change(config, now)
+    states = []
+    for display in displays_from_config(today_config):
+        display_config = display.to_config()
+        compiled = CompiledSchedule.from_config(display_config, now.date())
+        next_transition = next_transition_after(display_config, now, compiled)
+        if profile_change and (next_transition is None or profile_change < next_transition):
+            # Another profile takes over at midnight before this schedule's next boundary
+            next_transition = profile_change
+        next_level = None
+        if next_transition:
+            next_config = apply_profile(config, next_transition.date())
+            next_display = next(
+                (
+                    candidate
+                    for candidate in displays_from_config(next_config)
+                    if candidate.display_id == display.display_id
+                ),
+                display,
+            )
+            next_level = CompiledSchedule.from_config(
+                next_display.to_config(), next_transition.date()
+            ).level_at(next_transition)
+        states.append(
+            {
+                "display": display.display_id,
+                "profile": profile,
+                "period": compiled.period_at(now),
+                "level": compiled.level_at(now),
+                "next_transition": format_moment(next_transition),
+                "next_level": next_level,
+            }
+        )
+    return states
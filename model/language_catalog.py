@@ -0,0 +1,91 @@
+# model/language_catalog.py
+
+import os
+import json
+import logging
+import threading
+
+
+class LanguageCatalog:
+    # Language strings come from the bundled lang.json (parsed once, on first use) and from
+    # optional per-language files data/lang/<CODE>.json, which are only parsed when requested.
+    # Missing keys fall back one by one to the default language.
+
+    def __init__(self, lang_path, lang_dir, default_language="EN"):
+        self.lang_path = lang_path
+        self.lang_dir = lang_dir
+        self.default_language = default_language
+        self._bundle = None
+        self._languages = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def _load_bundle(self):
+        if self._bundle is None:
+            try:
+                with open(self.lang_path, "r", encoding="utf-8") as lang_file:
+                    logging.info(f"Loading language strings from {self.lang_path}")
+                    self._bundle = json.load(lang_file)
+            except FileNotFoundError:
+                logging.warning(f"Language file not found at {self.lang_path}.")
+                self._bundle = {}
+            except ValueError as e:
+                logging.error(f"Invalid language file {self.lang_path}: {e}")
+                self._bundle = {}
+        return self._bundle
+
+    def _language_file(self, language_code):
+        return os.path.join(self.lang_dir, f"{language_code}.json")
+
+    def _load_language(self, language_code):
+        # Raw strings of one language, or None when the language is unknown
+        if language_code in self._languages:
+            return self._languages[language_code]
+
+        strings = self._load_bundle().get(language_code)
+        if strings is None:
+            try:
+                with open(self._language_file(language_code), "r", encoding="utf-8") as lang_file:
+                    logging.info(f"Loading language strings for {language_code}")
+                    strings = json.load(lang_file)
+            except FileNotFoundError:
+                strings = None
+            except ValueError as e:
+                logging.error(f"Invalid language file for {language_code}: {e}")
+                strings = None
+
+        self._languages[language_code] = strings
+        return strings
+
+    def available_languages(self):
+        # Language codes from lang.json plus the per-language files (listed, not parsed)
+        codes = list(self._load_bundle())
+        if os.path.isdir(self.lang_dir):
+            for file_name in sorted(os.listdir(self.lang_dir)):
+                code, extension = os.path.splitext(file_name)
+                if extension == ".json" and code not in codes:
+                    codes.append(code)
+        return codes
+
+    def language_name(self, language_code):
+        strings = self._load_language(language_code) or {}
+        return strings.get("LanguageName", language_code)
+
+    def get_strings(self, language_code=None):
+        language_code = language_code or self.default_language
+        with self._lock:
+            if language_code in self._resolved:
+                return self._resolved[language_code]
+
+            strings = self._load_language(language_code)
+            if strings is None:
+                logging.warning(
+                    f"Language '{language_code}' not found. Using {self.default_language}."
+                )
+            resolved = dict(self._load_language(self.default_language) or {})
+            resolved.update(strings or {})
+            resolved["Language"] = (
+                language_code if strings is not None else self.default_language
+            )
+            self._resolved[language_code] = resolved
+            return resolved
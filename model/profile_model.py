@@ -0,0 +1,257 @@
+# model/profile_model.py
+
+import json
+from array import array
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Profile used on days no rule matches: the top-level Schedule/BrightnessLevels
+DEFAULT_PROFILE = "default"
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+# Keys a profile can override
+PROFILE_KEYS = ("Schedule", "BrightnessLevels")
+
+
+def parse_rule_date(value):
+    # "2026-12-25" (that day) or "12-25" (every year); returns (year or None, month, day)
+    parts = str(value).strip().split("-")
+    try:
+        if len(parts) == 3:
+            year, month, day = (int(part) for part in parts)
+            date(year, month, day)
+            return year, month, day
+        if len(parts) == 2:
+            month, day = (int(part) for part in parts)
+            # 2000 is a leap year, so "02-29" is accepted
+            date(2000, month, day)
+            return None, month, day
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid rule date: {value!r} (use YYYY-MM-DD or MM-DD)")
+
+
+class ProfileRule:
+    # One entry of "ProfileRules". Every condition it has must match:
+    #   "Weekdays": ["Sat", "Sun"]               days of the week
+    #   "Dates": ["2026-12-25", "01-01"]         single days; MM-DD repeats every year
+    #   "From": "08-01", "To": "08-15"           inclusive range; MM-DD ranges may wrap the year
+    def __init__(self, profile, weekdays=None, dates=None, date_from=None, date_to=None):
+        self.profile = profile
+        self.weekdays = weekdays
+        self.dates = dates
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @classmethod
+    def from_dict(cls, rule):
+        if not isinstance(rule, dict):
+            raise ValueError(f"A profile rule must be an object: {rule!r}")
+        profile = rule.get("Profile")
+        if not isinstance(profile, str) or not profile:
+            raise ValueError(f"Profile rule without a Profile name: {rule!r}")
+        weekdays = None
+        if "Weekdays" in rule:
+            weekdays = set()
+            for name in rule["Weekdays"] or []:
+                key = str(name).strip().lower()[:3]
+                if key not in WEEKDAY_NAMES:
+                    raise ValueError(f"Unknown weekday in rule for {profile}: {name!r}")
+                weekdays.add(WEEKDAY_NAMES.index(key))
+        dates = None
+        if "Dates" in rule:
+            dates = {parse_rule_date(value) for value in rule["Dates"] or []}
+        date_from = date_to = None
+        if "From" in rule or "To" in rule:
+            if "From" not in rule or "To" not in rule:
+                raise ValueError(f"Rule for {profile} needs both From and To.")
+            date_from, date_to = parse_rule_date(rule["From"]), parse_rule_date(rule["To"])
+            if (date_from[0] is None) != (date_to[0] is None):
+                raise ValueError(
+                    f"From and To of the rule for {profile} must use the same format."
+                )
+        if weekdays is None and dates is None and date_from is None:
+            raise ValueError(f"Rule for {profile} has no Weekdays, Dates or From/To.")
+        return cls(profile, weekdays, dates, date_from, date_to)
+
+    def matches(self, day):
+        if self.weekdays is not None and day.weekday() not in self.weekdays:
+            return False
+        if self.dates is not None and not (
+            (day.year, day.month, day.day) in self.dates
+            or (None, day.month, day.day) in self.dates
+        ):
+            return False
+        if self.date_from is not None:
+            if self.date_from[0] is not None:
+                return self.date_from <= (day.year, day.month, day.day) <= self.date_to
+            start, end, current = self.date_from[1:], self.date_to[1:], (day.month, day.day)
+            if start <= end:
+                return start <= current <= end
+            return current >= start or current <= end
+        return True
+
+
+class ProfileCalendar:
+    # The active profile of every day, precomputed a year at a time: the first matching
+    # rule wins and days without a match use DEFAULT_PROFILE. After a year is built,
+    # profile_for() and next_change() are list lookups whatever the number of rules.
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.names = [DEFAULT_PROFILE]
+        for rule in rules:
+            if rule.profile not in self.names:
+                self.names.append(rule.profile)
+        # year -> (profile index per day, index of the next day with another profile)
+        self._years = {}
+
+    def _year(self, year):
+        table = self._years.get(year)
+        if table is None:
+            indexes = array("H")
+            day = date(year, 1, 1)
+            while day.year == year:
+                name = next(
+                    (rule.profile for rule in self.rules if rule.matches(day)),
+                    DEFAULT_PROFILE,
+                )
+                indexes.append(self.names.index(name))
+                day += timedelta(days=1)
+            # Backward pass: for every day, where the next different profile starts
+            next_changes = array("i", [-1]) * len(indexes)
+            for index in range(len(indexes) - 2, -1, -1):
+                if indexes[index + 1] != indexes[index]:
+                    next_changes[index] = index + 1
+                else:
+                    next_changes[index] = next_changes[index + 1]
+            table = (indexes, next_changes)
+            self._years[year] = table
+        return table
+
+    def profile_for(self, day):
+        indexes, _ = self._year(day.year)
+        return self.names[indexes[day.timetuple().tm_yday - 1]]
+
+    def next_change(self, day):
+        # First day after `day` with a different profile, looking up to two years ahead
+        current = self.profile_for(day)
+        year_start = date(day.year, 1, 1)
+        _, next_changes = self._year(day.year)
+        change = next_changes[day.timetuple().tm_yday - 1]
+        if change >= 0:
+            return year_start + timedelta(days=change)
+        for year in (day.year + 1, day.year + 2):
+            indexes, next_changes = self._year(year)
+            if self.names[indexes[0]] != current:
+                return date(year, 1, 1)
+            if next_changes[0] >= 0:
+                return date(year, 1, 1) + timedelta(days=next_changes[0])
+        return None
+
+
+@lru_cache(maxsize=8)
+def _calendar(serialized):
+    return ProfileCalendar([ProfileRule.from_dict(rule) for rule in json.loads(serialized)])
+
+
+def profile_calendar(config):
+    # Calendars are cached by the content of "ProfileRules", like compiled schedules.
+    # None when the rules are missing or invalid (see profile_errors).
+    rules = config.get("ProfileRules")
+    if not rules:
+        return None
+    try:
+        return _calendar(json.dumps(rules, sort_keys=True))
+    except (TypeError, ValueError):
+        return None
+
+
+def active_profile(config, day, calendar=None):
+    # calendar: profile_calendar(config) kept by the caller, which saves serializing the
+    # rules on every call
+    calendar = calendar or profile_calendar(config)
+    return calendar.profile_for(day) if calendar else DEFAULT_PROFILE
+
+
+def uses_profiles(config):
+    return bool(config.get("Profiles") or config.get("ProfileRules"))
+
+
+def profile_config(config, name):
+    # Config whose Schedule/BrightnessLevels are those of profile `name`; a profile that
+    # leaves one of them out uses the top-level value
+    profile = (config.get("Profiles") or {}).get(name)
+    resolved = dict(config)
+    if isinstance(profile, dict):
+        for key in PROFILE_KEYS:
+            if key in profile:
+                resolved[key] = profile[key]
+    resolved["ActiveProfile"] = name
+    return resolved
+
+
+def apply_profile(config, day, calendar=None):
+    # Config as it applies on `day`; returned unchanged when no profiles are configured
+    if not uses_profiles(config):
+        return config
+    return profile_config(config, active_profile(config, day, calendar))
+
+
+def next_profile_change(config, moment, calendar=None):
+    # Midnight at which another profile takes over, or None
+    calendar = calendar or profile_calendar(config)
+    if calendar is None:
+        return None
+    day = calendar.next_change(moment.date())
+    return datetime(day.year, day.month, day.day) if day else None
+
+
+def profile_section(config, name, key):
+    # The dict an edit of `key` for profile `name` goes to: the profile when it overrides
+    # that key, the top level otherwise (shared by every profile that does not)
+    profile = (config.get("Profiles") or {}).get(name)
+    if name != DEFAULT_PROFILE and isinstance(profile, dict) and key in profile:
+        return profile
+    return config
+
+
+def level_sections(config, schedule_owner):
+    # The dicts whose BrightnessLevels go with the Schedule stored in schedule_owner (a
+    # profile, or the top level together with every profile that only overrides levels)
+    if schedule_owner is not config:
+        return [schedule_owner]
+    return [config] + [
+        profile
+        for profile in (config.get("Profiles") or {}).values()
+        if isinstance(profile, dict)
+        and "Schedule" not in profile
+        and "BrightnessLevels" in profile
+    ]
+
+
+def profile_errors(config):
+    # Problems in "Profiles"/"ProfileRules"; an empty list means they can be used
+    profiles = config.get("Profiles")
+    rules = config.get("ProfileRules")
+    errors = []
+    if profiles is not None and not isinstance(profiles, dict):
+        return ["Profiles must be an object of named profiles."]
+    profiles = profiles or {}
+    for name, profile in profiles.items():
+        if not isinstance(profile, dict):
+            errors.append(f"Profile {name} must be an object.")
+        elif not any(key in profile for key in PROFILE_KEYS):
+            errors.append(f"Profile {name} has neither a Schedule nor BrightnessLevels.")
+    if rules is None:
+        return errors
+    if not isinstance(rules, list):
+        return errors + ["ProfileRules must be a list."]
+    for rule in rules:
+        try:
+            parsed = ProfileRule.from_dict(rule)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        if parsed.profile != DEFAULT_PROFILE and parsed.profile not in profiles:
+            errors.append(f"Profile rule refers to an unknown profile: {parsed.profile}")
+    return errors
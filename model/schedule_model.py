@@ -0,0 +1,171 @@
+# model/schedule_model.py
+
+import re
+
+MINUTES_PER_DAY = 24 * 60
+
+# Fixed four-period layout of older config files:
+# (brightness key, label message id, default name, schedule start key, schedule end key)
+LEGACY_PERIODS = [
+    ("B1", "MSG_20", "Morning", "MorningStart", "MorningEnd"),
+    ("B2", "MSG_21", "Afternoon", "AfternoonStart", "AfternoonEnd"),
+    ("B3", "MSG_22", "Evening", "EveningStart", "EveningEnd"),
+    ("B4", "MSG_23", "Night", "NightStart", "NightEnd"),
+]
+
+DEFAULT_SCHEDULE = {
+    "Periods": [
+        {"Key": "B1", "LabelKey": "MSG_20", "Name": "Morning", "Start": "06:00", "End": "11:00"},
+        {"Key": "B2", "LabelKey": "MSG_21", "Name": "Afternoon", "Start": "11:00", "End": "17:00"},
+        {"Key": "B3", "LabelKey": "MSG_22", "Name": "Evening", "Start": "17:00", "End": "23:00"},
+        {"Key": "B4", "LabelKey": "MSG_23", "Name": "Night", "Start": "23:00", "End": "06:00"},
+    ]
+}
+
+DEFAULT_BRIGHTNESS_LEVELS = {"B1": 30, "B2": 40, "B3": 15, "B4": 10}
+
+TIME_PATTERN = re.compile(r"^(\d{1,2})(?::(\d{2}))?$")
+
+
+def parse_time(value):
+    # Accept legacy whole hours (6), "6" or "06:30"; return minutes since midnight
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid time value: {value!r}")
+    if isinstance(value, int):
+        hours, minutes = value, 0
+    else:
+        match = TIME_PATTERN.match(str(value).strip())
+        if not match:
+            raise ValueError(f"Invalid time value: {value!r}")
+        hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+
+    if not (0 <= hours <= 24) or not (0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ValueError(f"Time out of bounds: {value!r}")
+    return hours * 60 + minutes
+
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class SchedulePeriod:
+    def __init__(self, key, name, start, end, label_key=None):
+        self.key = key
+        self.name = name
+        self.label_key = label_key
+        # Minutes since midnight; end < start means the period wraps past midnight
+        self.start = start
+        self.end = end
+
+    @property
+    def wraps(self):
+        return self.start > self.end
+
+    def ranges(self):
+        # Minute ranges [start, end) covered by the period, split at midnight when it wraps
+        if self.wraps:
+            return [(self.start, MINUTES_PER_DAY), (0, self.end)]
+        return [(self.start, self.end)]
+
+    def display_name(self, lang_strings):
+        if self.label_key:
+            return lang_strings.get(self.label_key, self.name)
+        return self.name
+
+    def to_dict(self):
+        period = {"Key": self.key, "Name": self.name}
+        if self.label_key:
+            period["LabelKey"] = self.label_key
+        period["Start"] = format_time(self.start)
+        period["End"] = format_time(self.end)
+        return period
+
+
+class ScheduleModel:
+    def __init__(self, periods, errors=None):
+        self.periods = periods
+        # Problems found while parsing (missing or malformed entries)
+        self.parse_errors = errors or []
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        if "Periods" in schedule:
+            return cls._from_period_list(schedule["Periods"])
+        return cls._from_legacy(schedule)
+
+    @classmethod
+    def _from_period_list(cls, period_list):
+        periods, errors = [], []
+        for index, entry in enumerate(period_list):
+            key = entry.get("Key") or f"B{index + 1}"
+            try:
+                start = parse_time(entry["Start"])
+                end = parse_time(entry["End"])
+            except KeyError:
+                errors.append(f"Schedule missing start or end for period: {key}")
+                continue
+            except ValueError as e:
+                errors.append(f"Schedule times invalid for period {key}: {e}")
+                continue
+            periods.append(
+                SchedulePeriod(
+                    key, entry.get("Name", key), start, end, entry.get("LabelKey")
+                )
+            )
+        return cls(periods, errors)
+
+    @classmethod
+    def _from_legacy(cls, schedule):
+        periods, errors = [], []
+        for key, label_key, name, start_key, end_key in LEGACY_PERIODS:
+            if start_key not in schedule or end_key not in schedule:
+                errors.append(
+                    f"Schedule missing start or end for period: {start_key}, {end_key}"
+                )
+                continue
+            try:
+                start = parse_time(schedule[start_key])
+                end = parse_time(schedule[end_key])
+            except ValueError:
+                errors.append(
+                    f"Schedule times out of bounds for period: {start_key} - {end_key}"
+                )
+                continue
+            periods.append(SchedulePeriod(key, name, start, end, label_key))
+        return cls(periods, errors)
+
+    def to_schedule(self):
+        return {"Periods": [period.to_dict() for period in self.periods]}
+
+    def keys(self):
+        return [period.key for period in self.periods]
+
+    def validate(self):
+        # Sorted sweep over all minute ranges: O(n log n) in the number of periods
+        errors = list(self.parse_errors)
+
+        seen_keys = set()
+        ranges = []
+        for period in self.periods:
+            if period.key in seen_keys:
+                errors.append(f"Duplicate period key: {period.key}")
+            seen_keys.add(period.key)
+
+            if period.start == period.end:
+                errors.append(f"Start time equals end time for period: {period.key}")
+                continue
+            for range_start, range_end in period.ranges():
+                if range_start < range_end:
+                    ranges.append((range_start, range_end, period.key))
+
+        ranges.sort()
+        furthest = None
+        for current in ranges:
+            if furthest and current[0] < furthest[1]:
+                errors.append(
+                    f"Overlap detected between periods {furthest[2]} ({format_time(furthest[0])}-{format_time(furthest[1])}) "
+                    f"and {current[2]} ({format_time(current[0])}-{format_time(current[1])})"
+                )
+            if furthest is None or current[1] > furthest[1]:
+                furthest = current
+        return errors
@@ -0,0 +1,302 @@
+# model/solar_model.py
+
+import json
+import logging
+import math
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+from model.atomic_file import atomic_write
+from model.schedule_model import MINUTES_PER_DAY, format_time
+
+# Per-year tables of sunrise/sunset times, one JSON file per location and year
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "solar"
+)
+# Bumped when the table layout or the algorithm changes, so old files are rebuilt
+TABLE_VERSION = 1
+# Zenith of the sun's centre at sunrise/sunset: 90 degrees plus refraction and the solar radius
+SUNRISE_ZENITH = 90.833
+# Longest offset from a solar event, in minutes
+MAX_OFFSET_MINUTES = 12 * 60
+
+# "sunrise", "sunset-30", "sunset - 0:30", "sunrise+15 min" (a Unicode minus works too)
+SOLAR_TIME_PATTERN = re.compile(
+    r"^(sunrise|sunset)\s*(?:([+\-−])\s*(\d{1,3})(?::(\d{2}))?\s*(?:min)?)?$",
+    re.IGNORECASE,
+)
+
+
+def is_solar_time(value):
+    return isinstance(value, str) and SOLAR_TIME_PATTERN.match(value.strip()) is not None
+
+
+def uses_solar_times(schedule):
+    if not isinstance(schedule, dict):
+        return False
+    if "Periods" in schedule:
+        return any(
+            is_solar_time(period.get(field))
+            for period in schedule["Periods"]
+            if isinstance(period, dict)
+            for field in ("Start", "End")
+        )
+    return any(is_solar_time(value) for value in schedule.values())
+
+
+def solar_events_utc(day, latitude, longitude):
+    # NOAA solar calculator (the spreadsheet version): minutes after 00:00 UTC of `day`
+    # for sunrise, sunset and solar noon. Sunrise and sunset are None when the sun stays
+    # above (polar day) or below (polar night) the horizon all day.
+    julian_day = day.toordinal() + 1721424.5
+    # Evaluated at local solar noon, where the day's declination matters
+    julian_century = (julian_day + 0.5 - longitude / 360 - 2451545) / 36525
+
+    mean_longitude = (280.46646 + julian_century * (36000.76983 + julian_century * 0.0003032)) % 360
+    mean_anomaly = 357.52911 + julian_century * (35999.05029 - 0.0001537 * julian_century)
+    eccentricity = 0.016708634 - julian_century * (0.000042037 + 0.0000001267 * julian_century)
+    anomaly = math.radians(mean_anomaly)
+    center = (
+        math.sin(anomaly) * (1.914602 - julian_century * (0.004817 + 0.000014 * julian_century))
+        + math.sin(2 * anomaly) * (0.019993 - 0.000101 * julian_century)
+        + math.sin(3 * anomaly) * 0.000289
+    )
+    omega = math.radians(125.04 - 1934.136 * julian_century)
+    apparent_longitude = mean_longitude + center - 0.00569 - 0.00478 * math.sin(omega)
+    mean_obliquity = 23 + (
+        26 + (21.448 - julian_century * (46.815 + julian_century * (0.00059 - julian_century * 0.001813))) / 60
+    ) / 60
+    obliquity = math.radians(mean_obliquity + 0.00256 * math.cos(omega))
+    declination = math.asin(math.sin(obliquity) * math.sin(math.radians(apparent_longitude)))
+
+    y = math.tan(obliquity / 2) ** 2
+    mean_longitude_rad = math.radians(mean_longitude)
+    equation_of_time = 4 * math.degrees(
+        y * math.sin(2 * mean_longitude_rad)
+        - 2 * eccentricity * math.sin(anomaly)
+        + 4 * eccentricity * y * math.sin(anomaly) * math.cos(2 * mean_longitude_rad)
+        - 0.5 * y * y * math.sin(4 * mean_longitude_rad)
+        - 1.25 * eccentricity * eccentricity * math.sin(2 * anomaly)
+    )
+    solar_noon = 720 - 4 * longitude - equation_of_time
+
+    latitude_rad = math.radians(latitude)
+    cos_hour_angle = math.cos(math.radians(SUNRISE_ZENITH)) / (
+        math.cos(latitude_rad) * math.cos(declination)
+    ) - math.tan(latitude_rad) * math.tan(declination)
+    if not -1 <= cos_hour_angle <= 1:
+        return None, None, solar_noon
+    half_day = 4 * math.degrees(math.acos(cos_hour_angle))
+    return solar_noon - half_day, solar_noon + half_day, solar_noon
+
+
+class SolarTable:
+    # Sunrise and sunset for every day of one year at one location, precomputed once and
+    # cached in data/solar/, so resolving a day's boundaries is a list lookup. Times are
+    # kept in UTC and converted to the local clock (including DST) on first use of a day.
+
+    def __init__(self, latitude, longitude, year, days):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.year = year
+        # [[sunrise, sunset, noon], ...] in minutes after 00:00 UTC, one row per day
+        self.days = days
+        self._local = {}
+
+    @classmethod
+    def build(cls, latitude, longitude, year):
+        days = []
+        day = date(year, 1, 1)
+        while day.year == year:
+            days.append(
+                [
+                    None if value is None else round(value, 1)
+                    for value in solar_events_utc(day, latitude, longitude)
+                ]
+            )
+            day += timedelta(days=1)
+        return cls(latitude, longitude, year, days)
+
+    @classmethod
+    def load_or_build(cls, latitude, longitude, year, cache_dir=CACHE_DIR):
+        path = os.path.join(cache_dir, f"{latitude:.4f}_{longitude:.4f}_{year}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as table_file:
+                data = json.load(table_file)
+            if data.get("version") == TABLE_VERSION:
+                return cls(latitude, longitude, year, data["days"])
+        except (OSError, ValueError, KeyError):
+            pass
+        table = cls.build(latitude, longitude, year)
+        table.save(path)
+        return table
+
+    def save(self, path):
+        data = {
+            "version": TABLE_VERSION,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "year": self.year,
+            "days": self.days,
+        }
+        try:
+            atomic_write(
+                path, json.dumps(data, separators=(",", ":")), prefix=".solar-", fsync=False
+            )
+        except OSError as e:
+            # The table is cheap to rebuild; running without the cache is fine
+            logging.warning(f"Could not cache the solar table in {path}: {e}")
+
+    def local_events(self, day):
+        # (sunrise, sunset) in local minutes since midnight. Polar day gives the whole day
+        # (00:00 and 24:00); polar night collapses both to solar noon.
+        events = self._local.get(day)
+        if events is None:
+            sunrise, sunset, noon = self.days[day.timetuple().tm_yday - 1]
+            if sunrise is None:
+                polar_day = self.latitude * (1 if 4 <= day.month <= 9 else -1) > 0
+                if polar_day:
+                    events = (0, MINUTES_PER_DAY)
+                else:
+                    noon = self._to_local(day, noon)
+                    events = (noon, noon)
+            else:
+                events = (self._to_local(day, sunrise), self._to_local(day, sunset))
+            self._local[day] = events
+        return events
+
+    def _to_local(self, day, utc_minutes):
+        moment = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(
+            minutes=utc_minutes
+        )
+        local = moment.astimezone()
+        return local.hour * 60 + local.minute
+
+    def extreme_days(self):
+        # Days with the earliest and latest local sunrise and sunset of the year (DST included)
+        days = [date(self.year, 1, 1) + timedelta(days=index) for index in range(len(self.days))]
+        days = [day for day in days if self.days[day.timetuple().tm_yday - 1][0] is not None]
+        if not days:
+            return []
+        extremes = set()
+        for column in (0, 1):
+            extremes.add(min(days, key=lambda day: self.local_events(day)[column]))
+            extremes.add(max(days, key=lambda day: self.local_events(day)[column]))
+        return sorted(extremes)
+
+
+@lru_cache(maxsize=8)
+def solar_table(latitude, longitude, year):
+    return SolarTable.load_or_build(latitude, longitude, year)
+
+
+def location_errors(location):
+    # "Location": {"Latitude": 48.85, "Longitude": 2.35}, needed by solar schedule times
+    if not isinstance(location, dict):
+        return ["Schedule times relative to sunrise/sunset need a Location with Latitude and Longitude."]
+    errors = []
+    for key, limit in (("Latitude", 90), ("Longitude", 180)):
+        value = location.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            errors.append(f"Location {key} must be a number: {value!r}")
+        elif not -limit <= value <= limit:
+            errors.append(f"Location {key} must be between -{limit} and {limit}: {value}")
+    return errors
+
+
+def table_for(location, day):
+    return solar_table(float(location["Latitude"]), float(location["Longitude"]), day.year)
+
+
+def resolve_time(value, events):
+    # Minutes since midnight for a solar time, given the day's (sunrise, sunset)
+    match = SOLAR_TIME_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid solar time: {value!r}")
+    event, sign, first, second = match.groups()
+    minutes = events[0] if event.lower() == "sunrise" else events[1]
+    if sign:
+        offset = int(first) * 60 + int(second) if second is not None else int(first)
+        if offset > MAX_OFFSET_MINUTES:
+            raise ValueError(f"Offset of {value!r} is longer than 12 hours")
+        minutes += -offset if sign in "-−" else offset
+    if minutes == MINUTES_PER_DAY:
+        return minutes
+    return minutes % MINUTES_PER_DAY
+
+
+def resolve_schedule_for_events(schedule, events):
+    # The schedule with every solar time replaced by its "HH:MM" for the given events;
+    # malformed solar times are left as they are for the schedule validation to report
+    def resolve(value):
+        if not is_solar_time(value):
+            return value
+        try:
+            return format_time(resolve_time(value, events))
+        except ValueError:
+            return value
+
+    if "Periods" in schedule:
+        periods = []
+        for period in schedule["Periods"]:
+            if isinstance(period, dict):
+                period = dict(period)
+                for field in ("Start", "End"):
+                    if field in period:
+                        period[field] = resolve(period[field])
+            periods.append(period)
+        return dict(schedule, Periods=periods)
+    return {key: resolve(value) for key, value in schedule.items()}
+
+
+@lru_cache(maxsize=32)
+def _resolve_serialized(serialized, latitude, longitude, day):
+    schedule = json.loads(serialized)
+    events = solar_table(latitude, longitude, day.year).local_events(day)
+    return json.dumps(resolve_schedule_for_events(schedule, events))
+
+
+def resolve_schedule(schedule, location, day):
+    # Fixed-time schedule for one day. Schedules without solar times are returned as they
+    # are; without a valid location solar times stay unresolved (and fail validation).
+    if not uses_solar_times(schedule) or location_errors(location):
+        return schedule
+    serialized = json.dumps(schedule, sort_keys=True)
+    return json.loads(
+        _resolve_serialized(
+            serialized, float(location["Latitude"]), float(location["Longitude"]), day
+        )
+    )
+
+
+def validation_days(location, today=None):
+    # Days a solar schedule is checked on: today and the year's extreme sunrise/sunset days
+    today = today or date.today()
+    return sorted({today, *table_for(location, today).extreme_days()})
+
+
+def restore_solar_times(original, edited, day_events):
+    # Settings-window edits are fixed times; a period time left at the value its solar
+    # expression resolved to keeps the expression
+    if "Periods" not in original or "Periods" not in edited:
+        return edited
+    originals = {
+        period.get("Key"): period for period in original["Periods"] if isinstance(period, dict)
+    }
+    periods = []
+    for period in edited["Periods"]:
+        period = dict(period)
+        source = originals.get(period.get("Key"), {})
+        for field in ("Start", "End"):
+            value = source.get(field)
+            if is_solar_time(value):
+                try:
+                    resolved = format_time(resolve_time(value, day_events))
+                except ValueError:
+                    continue
+                if period.get(field) == resolved:
+                    period[field] = value
+        periods.append(period)
+    return dict(edited, Periods=periods)
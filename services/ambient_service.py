@@ -0,0 +1,238 @@
+import asyncio
+import csv
+import glob
+import logging
+import os
+import time
+from bisect import bisect_right
+
+from model.ambient_model import AdaptiveSettings
+from services.runtime import get_runtime
+
+# Linux IIO light sensors (ALS) expose their reading here
+IIO_DEVICES_GLOB = "/sys/bus/iio/devices/iio:device*"
+
+
+class SensorUnavailableError(RuntimeError):
+    # Raised when an ambient light sensor cannot be used on this machine
+    pass
+
+
+class AmbientLightSensor:
+    # Common interface of ambient light sources; read_lux() returns the illuminance in lux
+    name = "base"
+    # Whether read_lux() may wait on hardware and must run off the event loop
+    blocking = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read_lux(self):
+        raise NotImplementedError
+
+
+class SysfsIlluminanceSensor(AmbientLightSensor):
+    # IIO light sensor: in_illuminance_input (lux), or in_illuminance_raw with its
+    # optional _scale and _offset. The attribute stays open and is re-read with pread().
+    name = "sysfs"
+    blocking = True
+
+    def __init__(self, path=None):
+        self.path = path or self.find_device()
+        self.scale = 1.0
+        self.offset = 0.0
+        self._fd = None
+
+    @staticmethod
+    def find_device():
+        for device in sorted(glob.glob(IIO_DEVICES_GLOB)):
+            for attribute in ("in_illuminance_input", "in_illuminance_raw"):
+                path = os.path.join(device, attribute)
+                if os.path.exists(path):
+                    return path
+        raise SensorUnavailableError("No IIO illuminance sensor found.")
+
+    def start(self):
+        if not os.path.exists(self.path):
+            raise SensorUnavailableError(f"{self.path} does not exist.")
+        if self.path.endswith("_raw"):
+            prefix = self.path[: -len("raw")]
+            self.scale = self._read_optional(prefix + "scale", 1.0)
+            self.offset = self._read_optional(prefix + "offset", 0.0)
+        self._fd = os.open(self.path, os.O_RDONLY)
+
+    def stop(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_optional(self, path, default):
+        try:
+            with open(path, "r", encoding="ascii") as attribute:
+                return float(attribute.read().strip())
+        except (OSError, ValueError):
+            return default
+
+    def read_lux(self):
+        raw = float(os.pread(self._fd, 64, 0).decode("ascii").strip())
+        return (raw + self.offset) * self.scale
+
+
+class CsvReplaySensor(AmbientLightSensor):
+    # Replays a recorded "seconds,lux" CSV (a header row is allowed) against the clock,
+    # so the adaptive mode can be tried and tested without a sensor. Loops at the end.
+    name = "csv"
+
+    def __init__(self, path, clock=time.monotonic, loop=True):
+        self.path = path
+        self.clock = clock
+        self.loop = loop
+        self.offsets = []
+        self.values = []
+        self._started_at = None
+
+    def start(self):
+        try:
+            with open(self.path, "r", encoding="utf-8", newline="") as csv_file:
+                for row in csv.reader(csv_file):
+                    try:
+                        offset, lux = float(row[0]), float(row[1])
+                    except (IndexError, ValueError):
+                        continue
+                    self.offsets.append(offset)
+                    self.values.append(lux)
+        except OSError as e:
+            raise SensorUnavailableError(f"Cannot read {self.path}: {e}")
+        if not self.values:
+            raise SensorUnavailableError(f"{self.path} has no 'seconds,lux' rows.")
+        self._started_at = self.clock()
+
+    def read_lux(self):
+        elapsed = self.clock() - self._started_at
+        duration = self.offsets[-1]
+        if self.loop and duration > 0:
+            elapsed %= duration
+        index = bisect_right(self.offsets, elapsed) - 1
+        return self.values[max(index, 0)]
+
+
+def create_sensor(settings):
+    if settings.sensor == "csv":
+        if not settings.path:
+            raise SensorUnavailableError("The csv sensor needs a Path.")
+        return CsvReplaySensor(settings.path)
+    if settings.sensor == "sysfs":
+        return SysfsIlluminanceSensor(settings.path)
+    raise SensorUnavailableError(f"Unknown ambient light sensor '{settings.sensor}'.")
+
+
+class AmbientService:
+    # Samples the ambient light sensor at Adaptive.SampleHz on the async runtime, smooths
+    # the readings and hands the curve's level to the scheduler, which blends it with the
+    # scheduled level. The scheduler is only woken when the level from the curve changes,
+    # and it only calls the backend when the blended, quantised level changes.
+
+    def __init__(self, config_manager, scheduler_service, runtime=None, clock=time.monotonic):
+        self.config_manager = config_manager
+        self.scheduler_service = scheduler_service
+        self.runtime = runtime
+        self.clock = clock
+        self.settings = None
+        self.sensor = None
+        self.last_lux = None
+        self.samples = 0
+        self.updates = 0
+        self._filter = None
+        self._curve = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    def start(self):
+        # Returns False when the adaptive mode is disabled or no sensor is usable
+        self.config_manager.subscribe(self.on_config_changed)
+        return self._start(AdaptiveSettings.from_config(self.config_manager.load_config()))
+
+    def _start(self, settings):
+        self.settings = settings
+        if not settings.enabled:
+            return False
+        try:
+            sensor = create_sensor(settings)
+            sensor.start()
+        except (SensorUnavailableError, OSError) as e:
+            logging.warning(f"Adaptive brightness disabled: {e}")
+            return False
+        self.sensor = sensor
+        self._filter = settings.build_filter()
+        self._curve = settings.build_curve()
+        self.runtime = self.runtime or get_runtime()
+        self._task = self.runtime.submit(self._sample())
+        logging.info(
+            f"Adaptive brightness started with the {sensor.name} sensor at {settings.sample_hz} Hz."
+        )
+        return True
+
+    def stop(self):
+        self.config_manager.unsubscribe(self.on_config_changed)
+        self._stop()
+
+    def _stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.sensor is not None:
+            self.sensor.stop()
+            self.sensor = None
+        self.scheduler_service.set_ambient_level(None)
+
+    def on_config_changed(self, config):
+        settings = AdaptiveSettings.from_config(config)
+        if vars(settings) == vars(self.settings):
+            return
+        # Sensor, rate or curve changed: start over with fresh readings
+        self._stop()
+        self._start(settings)
+
+    async def _sample(self):
+        interval = 1 / self.settings.sample_hz
+        while True:
+            try:
+                if self.sensor.blocking:
+                    lux = await self.runtime.run_blocking(self.sensor.read_lux)
+                else:
+                    lux = self.sensor.read_lux()
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ambient light sensor read failed: {e}")
+            else:
+                self.process_reading(lux)
+            await asyncio.sleep(interval)
+
+    def process_reading(self, lux):
+        # One reading through the filter and the curve
+        self.samples += 1
+        self.last_lux = lux
+        smoothed = self._filter.update(lux, self.clock())
+        if smoothed is None:
+            return
+        level = self._curve.level_at(smoothed)
+        if level != self.scheduler_service.ambient_level:
+            self.updates += 1
+            logging.debug("Ambient light %.0f lux -> level %s.", smoothed, level)
+            self.scheduler_service.set_ambient_level(level)
+
+    def metrics(self):
+        return {
+            "enabled": self.running,
+            "sensor": self.sensor.name if self.sensor else None,
+            "lux": self.last_lux,
+            "smoothed_lux": self._filter.output if self._filter else None,
+            "ambient_level": self.scheduler_service.ambient_level,
+            "samples": self.samples,
+            "level_updates": self.updates,
+        }
@@ -0,0 +1,368 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+from model.brightness import MAX_LEVEL, MIN_LEVEL, map_brightness
+from model.display_model import PRIMARY_DISPLAY
+
+# Capability names reported by BrightnessBackend.capabilities()
+CAPABILITY_SET = "set"
+CAPABILITY_GET = "get"
+CAPABILITY_IN_PROCESS = "in_process"
+CAPABILITY_MULTI_DISPLAY = "multi_display"
+
+# Value of the "Backend" key in config.json when it is missing
+DEFAULT_BACKEND = "auto"
+
+
+class BackendUnavailableError(RuntimeError):
+    # Raised when a backend cannot work on this machine (wrong OS, no device, ...)
+    pass
+
+
+class BrightnessBackend:
+    # Common interface for everything that can change the screen brightness.
+    # Levels are the 0-100 values used in config.json; display None means the primary display.
+    name = "base"
+
+    def __init__(self):
+        self.last_levels = {}
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def capabilities(self):
+        return frozenset({CAPABILITY_SET})
+
+    def displays(self):
+        return [PRIMARY_DISPLAY]
+
+    def set_brightness(self, level, display=None):
+        raise NotImplementedError
+
+    def get_brightness(self, display=None):
+        # Backends that cannot read the hardware report the last level they applied
+        return self.last_levels.get(display or PRIMARY_DISPLAY)
+
+    def quantize(self, level, display=None):
+        # The value the hardware actually receives for a level; two levels with the same
+        # value are the same write. Backends taking the level as it is use it unchanged.
+        return level
+
+    def metrics(self):
+        # Health counters of whatever the backend depends on (e.g. a worker process)
+        return {}
+
+    @property
+    def last_level(self):
+        return self.last_levels.get(PRIMARY_DISPLAY)
+
+
+class PowerShellBackend(BrightnessBackend):
+    # Sends levels to the long-lived adjust_brightness.ps1 worker (primary display only)
+    name = "powershell"
+
+    def __init__(self, powershell_service):
+        super().__init__()
+        self.powershell_service = powershell_service
+
+    def start(self):
+        self.powershell_service.start_powershell()
+        self.powershell_service.start_monitoring()
+
+    def stop(self):
+        self.powershell_service.stop_monitoring()
+        self.powershell_service.stop_powershell()
+
+    def set_brightness(self, level, display=None):
+        if display not in (None, PRIMARY_DISPLAY):
+            logging.warning(f"The PowerShell backend cannot address display {display}.")
+            return False
+        if self.powershell_service.set_brightness(level):
+            self.last_levels[PRIMARY_DISPLAY] = level
+            return True
+        return False
+
+    def quantize(self, level, display=None):
+        # adjust_brightness.ps1 sends the SDR boost, rounded to one decimal
+        return map_brightness(level)
+
+    def metrics(self):
+        return {"worker": self.powershell_service.metrics()}
+
+
+class DwmBackend(BrightnessBackend):
+    # Calls the undocumented dwmapi.dll export #171 (DwmpSDRToHDRBoost) in process,
+    # the same function adjust_brightness.ps1 reaches through Add-Type.
+    # Displays are identified by their GDI device name, e.g. "\\\\.\\DISPLAY2".
+    name = "dwm"
+    SDR_BOOST_ORDINAL = 171
+    MONITOR_DEFAULTTOPRIMARY = 1
+
+    def __init__(self):
+        super().__init__()
+        if sys.platform != "win32":
+            raise BackendUnavailableError("The DWM backend is only available on Windows.")
+        import ctypes
+        from ctypes import wintypes
+
+        try:
+            user32 = ctypes.WinDLL("user32")
+            dwmapi = ctypes.WinDLL("dwmapi")
+            self._set_sdr_boost = dwmapi[self.SDR_BOOST_ORDINAL]
+        except (OSError, AttributeError) as e:
+            raise BackendUnavailableError(f"dwmapi.dll SDR boost export not found: {e}")
+        self._set_sdr_boost.argtypes = [ctypes.c_void_p, ctypes.c_double]
+        self._set_sdr_boost.restype = None
+        user32.MonitorFromWindow.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+        user32.MonitorFromWindow.restype = ctypes.c_void_p
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._user32 = user32
+        self._monitors = None
+
+    def _enumerate_monitors(self):
+        # {device name: HMONITOR}, resolved once and refreshed when a display is unknown
+        ctypes, wintypes = self._ctypes, self._wintypes
+
+        class MONITORINFOEXW(ctypes.Structure):
+            _fields_ = [
+                ("cbSize", wintypes.DWORD),
+                ("rcMonitor", wintypes.RECT),
+                ("rcWork", wintypes.RECT),
+                ("dwFlags", wintypes.DWORD),
+                ("szDevice", wintypes.WCHAR * 32),
+            ]
+
+        monitors = {}
+        callback_type = ctypes.WINFUNCTYPE(
+            wintypes.BOOL,
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+            ctypes.POINTER(wintypes.RECT),
+            wintypes.LPARAM,
+        )
+
+        def on_monitor(monitor, device_context, rect, data):
+            info = MONITORINFOEXW()
+            info.cbSize = ctypes.sizeof(MONITORINFOEXW)
+            if self._user32.GetMonitorInfoW(ctypes.c_void_p(monitor), ctypes.byref(info)):
+                monitors[info.szDevice] = monitor
+            return True
+
+        self._user32.EnumDisplayMonitors(None, None, callback_type(on_monitor), 0)
+        self._monitors = monitors
+        return monitors
+
+    def capabilities(self):
+        return frozenset({CAPABILITY_SET, CAPABILITY_IN_PROCESS, CAPABILITY_MULTI_DISPLAY})
+
+    def displays(self):
+        return list(self._enumerate_monitors())
+
+    def quantize(self, level, display=None):
+        return map_brightness(level)
+
+    def _monitor_handle(self, display):
+        if display in (None, PRIMARY_DISPLAY):
+            return self._user32.MonitorFromWindow(None, self.MONITOR_DEFAULTTOPRIMARY)
+        monitors = self._monitors
+        if monitors is None or display not in monitors:
+            monitors = self._enumerate_monitors()
+        return monitors.get(display)
+
+    def set_brightness(self, level, display=None):
+        try:
+            monitor = self._monitor_handle(display)
+            if monitor is None:
+                logging.error(f"Display {display} not found.")
+                return False
+            self._set_sdr_boost(monitor, map_brightness(level))
+        except OSError as e:
+            logging.error(f"Failed to set brightness {level} through dwmapi: {e}")
+            return False
+        self.last_levels[display or PRIMARY_DISPLAY] = level
+        return True
+
+
+class SysfsBacklightBackend(BrightnessBackend):
+    # Linux panels exposed under /sys/class/backlight/<device>; each device is a display
+    # and the primary display is the first device (or the one given)
+    name = "sysfs"
+    BACKLIGHT_ROOT = "/sys/class/backlight"
+
+    def __init__(self, device=None, root=BACKLIGHT_ROOT):
+        super().__init__()
+        self.root = root
+        try:
+            devices = sorted(os.listdir(root))
+        except OSError:
+            devices = []
+        if device is not None:
+            devices = [device] + [name for name in devices if name != device]
+        self.max_brightness = {}
+        for name in devices:
+            try:
+                self.max_brightness[name] = int(self._read(name, "max_brightness"))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Backlight device {name} is not usable: {e}")
+        if not self.max_brightness:
+            raise BackendUnavailableError(f"No backlight device found in {root}.")
+        self.primary_device = next(iter(self.max_brightness))
+        logging.info(f"Using backlight devices {', '.join(self.max_brightness)}.")
+
+    def _read(self, device, file_name):
+        with open(os.path.join(self.root, device, file_name), "r") as sysfs_file:
+            return sysfs_file.read().strip()
+
+    def _device(self, display):
+        return self.primary_device if display in (None, PRIMARY_DISPLAY) else display
+
+    def capabilities(self):
+        return frozenset(
+            {CAPABILITY_SET, CAPABILITY_GET, CAPABILITY_IN_PROCESS, CAPABILITY_MULTI_DISPLAY}
+        )
+
+    def displays(self):
+        return list(self.max_brightness)
+
+    def set_brightness(self, level, display=None):
+        device = self._device(display)
+        if device not in self.max_brightness:
+            logging.error(f"Backlight device {device} not found.")
+            return False
+        level = max(MIN_LEVEL, min(MAX_LEVEL, int(level)))
+        raw_value = self.quantize(level, display)
+        try:
+            with open(os.path.join(self.root, device, "brightness"), "w") as sysfs_file:
+                sysfs_file.write(str(raw_value))
+        except OSError as e:
+            logging.error(f"Failed to write backlight brightness {raw_value} to {device}: {e}")
+            return False
+        self.last_levels[display or PRIMARY_DISPLAY] = level
+        return True
+
+    def quantize(self, level, display=None):
+        # Raw backlight value; panels with fewer steps than 100 map several levels to one
+        device = self._device(display)
+        maximum = self.max_brightness.get(device)
+        if maximum is None:
+            return level
+        level = max(MIN_LEVEL, min(MAX_LEVEL, int(level)))
+        return round(level * maximum / MAX_LEVEL)
+
+    def get_brightness(self, display=None):
+        device = self._device(display)
+        for file_name in ("actual_brightness", "brightness"):
+            try:
+                raw_value = int(self._read(device, file_name))
+            except (OSError, ValueError, KeyError):
+                continue
+            return round(raw_value * MAX_LEVEL / self.max_brightness[device])
+        return super().get_brightness(display)
+
+
+class RecordingBackend(BrightnessBackend):
+    # Fake backend that records every call, used to exercise the scheduler off Windows
+    name = "recording"
+
+    def __init__(self, clock=time.time):
+        super().__init__()
+        self.clock = clock
+        self.calls = []
+
+    def capabilities(self):
+        return frozenset({CAPABILITY_SET, CAPABILITY_GET, CAPABILITY_IN_PROCESS})
+
+    def set_brightness(self, level, display=None):
+        self.calls.append((level, self.clock()))
+        logging.debug("RecordingBackend received level %s", level)
+        self.last_levels[display or PRIMARY_DISPLAY] = level
+        return True
+
+
+class FakeMultiDisplayBackend(BrightnessBackend):
+    # Fake with several displays and a per-call latency; every call is recorded as
+    # (display, level, started, finished, thread name) so concurrency and ordering can be checked
+    name = "fake_multi"
+
+    def __init__(
+        self,
+        display_ids=("DISPLAY1", "DISPLAY2", "DISPLAY3"),
+        latency=0.0,
+        clock=time.monotonic,
+    ):
+        super().__init__()
+        self.display_ids = list(display_ids)
+        self.latency = latency
+        self.clock = clock
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def capabilities(self):
+        return frozenset(
+            {CAPABILITY_SET, CAPABILITY_GET, CAPABILITY_IN_PROCESS, CAPABILITY_MULTI_DISPLAY}
+        )
+
+    def displays(self):
+        return list(self.display_ids)
+
+    def set_brightness(self, level, display=None):
+        display = display or PRIMARY_DISPLAY
+        if display != PRIMARY_DISPLAY and display not in self.display_ids:
+            return False
+        started = self.clock()
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls.append(
+                (display, level, started, self.clock(), threading.current_thread().name)
+            )
+            self.last_levels[display] = level
+        return True
+
+
+def create_backend(config, script_path=None, runtime=None):
+    # Build the backend named by config["Backend"]: "auto", "dwm", "powershell",
+    # "sysfs", "recording" or "fake_multi". "auto" prefers an in-process backend and falls back
+    # to the PowerShell worker on Windows and to the recording fake elsewhere. The PowerShell
+    # worker is supervised on runtime (the shared async runtime by default).
+    backend_name = str(config.get("Backend", DEFAULT_BACKEND)).lower()
+
+    def powershell_backend():
+        from services.powershell_service import PowerShellService
+
+        return PowerShellBackend(PowerShellService(script_path, runtime=runtime))
+
+    factories = {
+        "dwm": DwmBackend,
+        "powershell": powershell_backend,
+        "sysfs": SysfsBacklightBackend,
+        "recording": RecordingBackend,
+        "fake_multi": FakeMultiDisplayBackend,
+    }
+    if backend_name == "auto":
+        if sys.platform == "win32":
+            candidates = ["dwm", "powershell"]
+        else:
+            candidates = ["sysfs", "recording"]
+    elif backend_name in factories:
+        candidates = [backend_name]
+    else:
+        logging.warning(f"Unknown brightness backend '{backend_name}', using auto.")
+        return create_backend(dict(config, Backend="auto"), script_path, runtime)
+
+    for candidate in candidates:
+        try:
+            backend = factories[candidate]()
+        except BackendUnavailableError as e:
+            logging.warning(f"Brightness backend '{candidate}' unavailable: {e}")
+            continue
+        logging.info(f"Using brightness backend '{backend.name}'.")
+        return backend
+    raise BackendUnavailableError(f"No usable brightness backend for '{backend_name}'.")
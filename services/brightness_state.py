@@ -0,0 +1,92 @@
+import logging
+import threading
+
+from model.display_model import PRIMARY_DISPLAY
+from services.brightness_backend import CAPABILITY_GET, BrightnessBackend
+
+
+class BrightnessStateTracker(BrightnessBackend):
+    # Wraps another backend and skips writes whose quantised value (what the backend
+    # really sends, e.g. the SDR boost or the raw backlight value) equals the one last
+    # applied to the same display. A write goes through again when the backend reports a
+    # different level (changed outside the application) or after force_reapply().
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+        self.name = backend.name
+        # Last quantised value successfully applied, by display id
+        self.applied_values = {}
+        self.applied_count = 0
+        self.suppressed_count = 0
+        self.external_change_count = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.backend.start()
+
+    def stop(self):
+        self.backend.stop()
+
+    def capabilities(self):
+        return self.backend.capabilities()
+
+    def displays(self):
+        return self.backend.displays()
+
+    def get_brightness(self, display=None):
+        return self.backend.get_brightness(display)
+
+    def quantize(self, level, display=None):
+        return self.backend.quantize(level, display)
+
+    def metrics(self):
+        return self.backend.metrics()
+
+    def _changed_externally(self, display, level):
+        # Only backends that can read the hardware can notice changes made by someone else
+        if CAPABILITY_GET not in self.backend.capabilities():
+            return False
+        current = self.backend.get_brightness(display)
+        return current is not None and self.quantize(current, display) != self.quantize(
+            level, display
+        )
+
+    def set_brightness(self, level, display=None):
+        display = display or PRIMARY_DISPLAY
+        mapped = self.quantize(level, display)
+        with self._lock:
+            if self.applied_values.get(display) == mapped:
+                if not self._changed_externally(display, self.last_levels[display]):
+                    self.suppressed_count += 1
+                    self.last_levels[display] = level
+                    return True
+                self.external_change_count += 1
+                logging.info(f"Brightness of display {display} was changed externally.")
+
+        if not self.backend.set_brightness(level, display):
+            with self._lock:
+                self.applied_values.pop(display, None)
+            return False
+
+        with self._lock:
+            self.applied_values[display] = mapped
+            self.last_levels[display] = level
+            self.applied_count += 1
+        return True
+
+    def force_reapply(self, display=None):
+        # Forget the applied state so the next write for the display (or all) is sent
+        with self._lock:
+            if display is None:
+                self.applied_values.clear()
+            else:
+                self.applied_values.pop(display, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "applied": self.applied_count,
+                "suppressed": self.suppressed_count,
+                "external_changes": self.external_change_count,
+            }
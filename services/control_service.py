@@ -0,0 +1,598 @@
+import asyncio
+import errno
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import sys
+import threading
+from datetime import date, datetime
+
+from model.atomic_file import atomic_write
+from model.brightness import MAX_LEVEL, MIN_LEVEL
+from model.config_validation import level_errors, period_keys
+from model.display_model import display_states, displays_from_config
+from model.profile_model import (
+    active_profile,
+    apply_profile,
+    profile_config,
+    profile_section,
+)
+from services.runtime import get_runtime
+
+# Version reported by "ping"; bumped when a command changes incompatibly
+PROTOCOL_VERSION = 1
+# TCP port on 127.0.0.1 when Unix sockets are not available (overridable with Control.Port)
+DEFAULT_CONTROL_PORT = 47831
+# Longest request line accepted, in bytes
+MAX_MESSAGE_BYTES = 64 * 1024
+# Events a client can subscribe to
+CONTROL_EVENTS = ("brightness_applied", "brightness_failed", "config_changed")
+
+
+class InstanceAlreadyRunningError(RuntimeError):
+    # Raised by ControlServer.start() when another instance answers on the control endpoint
+    pass
+
+
+class ControlError(ValueError):
+    # A request that cannot be served (unknown command, bad parameters, error response)
+    pass
+
+
+def endpoint_path(project_root):
+    # JSON file telling clients how to reach the running instance
+    return os.path.join(project_root, "data", "control.json")
+
+
+def socket_path(project_root):
+    return os.path.join(project_root, "data", "control.sock")
+
+
+def encode_message(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class ControlConnection:
+    # One client connection, served by a coroutine on the async runtime. Subscribed events
+    # are handed to the loop thread and go through a bounded queue and a writer task, so a
+    # slow client never blocks the scheduler. Everything but push() and subscribe() runs on
+    # the loop thread.
+    MAX_PENDING_EVENTS = 256
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.events = None
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.MAX_PENDING_EVENTS)
+        self._event_writer = asyncio.create_task(self._write_events())
+
+    async def send(self, message):
+        self.writer.write(encode_message(message))
+        await self.writer.drain()
+
+    def subscribe(self, events):
+        self.events = set(events)
+
+    def push(self, event):
+        # Thread-safe
+        if self.events is None or event["event"] not in self.events:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._enqueue, event)
+        except RuntimeError:
+            # The runtime already shut down
+            pass
+
+    def _enqueue(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logging.warning("Control client is not reading its events; dropping one.")
+
+    async def _write_events(self):
+        while True:
+            event = await self._queue.get()
+            try:
+                await self.send(event)
+            except OSError:
+                self.close()
+                return
+
+    def close(self):
+        self._event_writer.cancel()
+        self.writer.close()
+
+
+class ControlServer:
+    # Local control channel of the running instance: newline-delimited JSON requests
+    #   {"id": 1, "command": "set_levels", "levels": {"B1": 40}}
+    # answered by {"id": 1, "ok": true, "result": {...}} or {"id": 1, "ok": false, "error": "..."}.
+    # Binding the endpoint doubles as the single-instance lock. A Unix socket in data/ is
+    # used where available (only the owner may connect); otherwise TCP on 127.0.0.1, where
+    # every request must carry the token written to data/control.json.
+    # Commands that may wait on the backend or the disk (get_schedule can build and save
+    # the sunrise/sunset table) run on the runtime's executor; the others are answered
+    # directly on the loop thread.
+    BLOCKING_COMMANDS = ("set_levels", "set_brightness", "get_schedule")
+
+    def __init__(
+        self, config_manager, project_root=None, show_window_callback=None, runtime=None
+    ):
+        self.config_manager = config_manager
+        # Connections are served as coroutines on this runtime (the shared one by default)
+        self.runtime = runtime
+        self.project_root = project_root or config_manager.project_root
+        self.scheduler_service = None
+        self.show_window_callback = show_window_callback
+
+        control_config = config_manager.load_config().get("Control", {})
+        self.enabled = bool(control_config.get("Enabled", True))
+        transport = str(control_config.get("Transport", "auto")).lower()
+        if transport not in ("unix", "tcp"):
+            transport = "unix" if hasattr(socket, "AF_UNIX") else "tcp"
+        self.transport = transport
+        self.port = int(control_config.get("Port", DEFAULT_CONTROL_PORT))
+        self.endpoint_path = endpoint_path(self.project_root)
+        self.socket_path = socket_path(self.project_root)
+        self.token = secrets.token_hex(16) if transport == "tcp" else None
+
+        self.commands = {
+            "ping": self.command_ping,
+            "get_levels": self.command_get_levels,
+            "set_levels": self.command_set_levels,
+            "set_brightness": self.command_set_brightness,
+            "get_schedule": self.command_get_schedule,
+            "apply_now": self.command_apply_now,
+            "get_latency": self.command_get_latency,
+            "get_metrics": self.command_get_metrics,
+            "subscribe": self.command_subscribe,
+            "show_window": self.command_show_window,
+        }
+        self._listener = None
+        self._server = None
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    # Lifecycle
+
+    def start(self):
+        # Claim the endpoint and start serving. Returns False when disabled in config.json;
+        # raises InstanceAlreadyRunningError if another instance owns the endpoint.
+        if not self.enabled:
+            logging.info("Control server disabled in config.json.")
+            return False
+        if self.transport == "unix":
+            self._listener = self._bind_unix()
+            endpoint = {"transport": "unix", "path": self.socket_path}
+        else:
+            self._listener = self._bind_tcp()
+            endpoint = {
+                "transport": "tcp",
+                "host": "127.0.0.1",
+                "port": self._listener.getsockname()[1],
+                "token": self.token,
+            }
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self.runtime = self.runtime or get_runtime()
+        try:
+            self._server = self.runtime.run(self._start_server(self._listener))
+        except BaseException:
+            self._listener.close()
+            self._listener = None
+            raise
+        endpoint["pid"] = os.getpid()
+        self._write_endpoint(endpoint)
+        self.config_manager.subscribe(self.on_config_changed)
+        logging.info("Control server listening on %s endpoint.", self.transport)
+        return True
+
+    def attach(self, scheduler_service):
+        # Commands that need the scheduler answer with an error until it is attached
+        self.scheduler_service = scheduler_service
+        scheduler_service.subscribe(self.broadcast)
+
+    def stop(self):
+        if self._listener is None:
+            return
+        self.config_manager.unsubscribe(self.on_config_changed)
+        if self.scheduler_service:
+            self.scheduler_service.unsubscribe(self.broadcast)
+        self._listener = None
+        if self.runtime.running:
+            self.runtime.run(self._stop_server())
+        self._server = None
+        if self.transport == "unix":
+            self._remove_file(self.socket_path)
+        self._remove_file(self.endpoint_path)
+        logging.info("Control server stopped.")
+
+    def _instance_answers(self):
+        if self.transport == "unix":
+            endpoint = {"transport": "unix", "path": self.socket_path}
+        else:
+            endpoint = {"transport": "tcp", "host": "127.0.0.1", "port": self.port}
+        client = ControlClient(endpoint, timeout=1.0)
+        try:
+            client.connect()
+            client.request("ping")
+        except (OSError, ValueError, ControlError):
+            return False
+        finally:
+            client.close()
+        return True
+
+    def _bind_unix(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._bind_private(listener)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                listener.close()
+                raise
+            if self._instance_answers():
+                listener.close()
+                raise InstanceAlreadyRunningError("Another instance is running.")
+            # Left behind by an instance that did not shut down cleanly
+            logging.info("Removing stale control socket.")
+            os.remove(self.socket_path)
+            self._bind_private(listener)
+        return listener
+
+    def _bind_private(self, listener):
+        # The socket file is created owner-only, with no window where it has the default
+        # permissions. The umask is process-wide; the control server is started before
+        # the backend, scheduler and watcher threads that could create files meanwhile.
+        previous_umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(previous_umask)
+
+    def _bind_tcp(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if sys.platform == "win32":
+            # Without it another process could bind the same port with SO_REUSEADDR
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        try:
+            listener.bind(("127.0.0.1", self.port))
+        except OSError:
+            listener.close()
+            if self._instance_answers():
+                raise InstanceAlreadyRunningError("Another instance is running.")
+            raise
+        return listener
+
+    def _write_endpoint(self, endpoint):
+        # Owner-only: the endpoint file holds the TCP token
+        atomic_write(
+            self.endpoint_path,
+            json.dumps(endpoint),
+            prefix=".control-",
+            mode=0o600,
+            fsync=False,
+        )
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Connections
+
+    async def _start_server(self, listener):
+        # asyncio sets TCP_NODELAY on TCP connections itself
+        if self.transport == "unix":
+            return await asyncio.start_unix_server(
+                self._handle_connection, sock=listener, limit=MAX_MESSAGE_BYTES
+            )
+        return await asyncio.start_server(
+            self._handle_connection, sock=listener, limit=MAX_MESSAGE_BYTES
+        )
+
+    async def _stop_server(self):
+        self._server.close()
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+        try:
+            await asyncio.wait_for(self._server.wait_closed(), 1)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _handle_connection(self, reader, writer):
+        connection = ControlConnection(reader, writer)
+        with self._lock:
+            self._connections.add(connection)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit
+                    await connection.send(self.error_response(None, "Request too large."))
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await connection.send(await self._respond(line, connection))
+        except OSError as e:
+            logging.debug("Control connection closed: %s", e)
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    async def _respond(self, line, connection):
+        request, response = self.parse_request(line)
+        if response is not None:
+            return response
+        if request.get("command") in self.BLOCKING_COMMANDS:
+            return await self.runtime.run_blocking(self.dispatch, request, connection)
+        return self.dispatch(request, connection)
+
+    def handle_request(self, line, connection=None):
+        request, response = self.parse_request(line)
+        if response is not None:
+            return response
+        return self.dispatch(request, connection)
+
+    def parse_request(self, line):
+        # (request, None), or (None, error response) for a malformed or unauthorised line
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return None, self.error_response(None, "Invalid JSON.")
+        if not isinstance(request, dict):
+            return None, self.error_response(None, "A request must be a JSON object.")
+        # "ping" stays open so a starting instance can probe the endpoint without the token
+        if self.token and request.get("command") != "ping" and not hmac.compare_digest(
+            str(request.get("token", "")), self.token
+        ):
+            return None, self.error_response(request.get("id"), "Invalid token.")
+        return request, None
+
+    def dispatch(self, request, connection=None):
+        request_id = request.get("id")
+        handler = self.commands.get(request.get("command"))
+        if handler is None:
+            return self.error_response(
+                request_id, f"Unknown command: {request.get('command')!r}"
+            )
+        try:
+            result = handler(request, connection)
+        except ControlError as e:
+            return self.error_response(request_id, str(e))
+        except Exception as e:
+            logging.error("Control command %s failed: %s", request.get("command"), e)
+            return self.error_response(request_id, "Internal error.")
+        return {"id": request_id, "ok": True, "result": result}
+
+    def error_response(self, request_id, message):
+        return {"id": request_id, "ok": False, "error": message}
+
+    def broadcast(self, event):
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.push(event)
+
+    def on_config_changed(self, config):
+        self.broadcast({"event": "config_changed", "time": datetime.now().isoformat()})
+
+    # Commands
+
+    def _scheduler(self):
+        if self.scheduler_service is None:
+            raise ControlError("The scheduler is not running yet.")
+        return self.scheduler_service
+
+    def command_ping(self, request, connection):
+        return {"pid": os.getpid(), "version": PROTOCOL_VERSION}
+
+    def command_get_levels(self, request, connection):
+        config = apply_profile(self.config_manager.load_config(), date.today())
+        return {
+            "applied": self._scheduler().levels(),
+            "configured": {
+                display.display_id: display.brightness_levels
+                for display in displays_from_config(config)
+            },
+        }
+
+    def command_set_levels(self, request, connection):
+        # {"levels": {"B1": 40}, "display": optional id from "Displays"}; merged into the
+        # current levels of today's profile, saved like the main window does and applied
+        # by the scheduler
+        levels = request.get("levels")
+        if not isinstance(levels, dict) or not levels:
+            raise ControlError("'levels' must be a non-empty object.")
+        display_id = request.get("display")
+
+        def merge_levels(stored):
+            # Runs under the config manager's lock; a ControlError leaves config.json as it is
+            profile = active_profile(stored, date.today())
+            config = profile_config(stored, profile)
+            target = profile_section(stored, profile, "BrightnessLevels")
+            if display_id is not None:
+                target = next(
+                    (
+                        display
+                        for display in stored.get("Displays") or []
+                        if isinstance(display, dict) and str(display.get("Id")) == display_id
+                    ),
+                    None,
+                )
+                if target is None:
+                    raise ControlError(f"Unknown display: {display_id}")
+            new_levels = dict(
+                target.get("BrightnessLevels", config.get("BrightnessLevels", {}))
+            )
+            new_levels.update(levels)
+            schedule = target.get("Schedule", config.get("Schedule", {}))
+            periods = period_keys(schedule, config.get("Location"))
+            errors = [f"Unknown period: {key}" for key in levels if key not in periods]
+            errors += level_errors(schedule, new_levels, config.get("Location"))
+            if errors:
+                raise ControlError("; ".join(errors))
+            target["BrightnessLevels"] = new_levels
+            return {"display": display_id, "profile": profile, "levels": new_levels}
+
+        return self.config_manager.update(merge_levels)
+
+    def command_set_brightness(self, request, connection):
+        # Apply a level right away; the schedule takes over again at the next boundary
+        level = request.get("level")
+        if isinstance(level, bool) or not isinstance(level, int):
+            raise ControlError("'level' must be an integer.")
+        if not MIN_LEVEL <= level <= MAX_LEVEL:
+            raise ControlError(f"'level' must be between {MIN_LEVEL} and {MAX_LEVEL}.")
+        display_id = request.get("display")
+        if not self._scheduler().set_level(level, display_id):
+            raise ControlError(f"Failed to set brightness {level}.")
+        return {"display": display_id, "level": level}
+
+    def command_get_schedule(self, request, connection):
+        config = self.config_manager.load_config()
+        now = datetime.now()
+        states = display_states(config, now)
+        displays = displays_from_config(apply_profile(config, now.date()))
+        for state, display in zip(states, displays):
+            state["schedule"] = display.schedule
+            state["brightness_levels"] = display.brightness_levels
+        return {"displays": states}
+
+    def command_apply_now(self, request, connection):
+        # Re-send the scheduled level of every display on the scheduler thread
+        self._scheduler().request_reapply()
+        return {"queued": True}
+
+    def command_get_latency(self, request, connection):
+        recorder = self._scheduler().latency_recorder
+        if request.get("samples"):
+            return recorder.snapshot()
+        return recorder.summary()
+
+    def command_get_metrics(self, request, connection):
+        # Backend name, applied/suppressed writes and backend health (worker restarts, ...)
+        scheduler_service = self._scheduler()
+        backend = scheduler_service.backend
+        return dict(
+            backend.metrics(), backend=backend.name, writes=scheduler_service.write_stats()
+        )
+
+    def command_subscribe(self, request, connection):
+        events = request.get("events") or list(CONTROL_EVENTS)
+        unknown = [event for event in events if event not in CONTROL_EVENTS]
+        if unknown:
+            raise ControlError(f"Unknown events: {', '.join(map(str, unknown))}")
+        if connection is None:
+            raise ControlError("Subscriptions need a connection.")
+        connection.subscribe(events)
+        return {"events": list(events)}
+
+    def command_show_window(self, request, connection):
+        if self.show_window_callback is None:
+            raise ControlError("This instance has no window.")
+        self.show_window_callback()
+        return {"shown": True}
+
+
+class ControlClient:
+    # Client side of the control protocol, used by a second instance and by main/cli.py
+    def __init__(self, endpoint, timeout=2.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.sock = None
+        self._reader = None
+        self._next_id = 0
+        # Events received while waiting for a response
+        self.pending_events = []
+
+    def connect(self):
+        if self.endpoint["transport"] == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = self.endpoint["path"]
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            address = (self.endpoint["host"], self.endpoint["port"])
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+        return self
+
+    def _read_message(self):
+        line = self._reader.readline(MAX_MESSAGE_BYTES + 1)
+        if not line:
+            raise ConnectionError("Control connection closed.")
+        return json.loads(line)
+
+    def request(self, command, **params):
+        # Send one request and return its result; raises ControlError on an error response
+        self._next_id += 1
+        message = dict(params, id=self._next_id, command=command)
+        if self.endpoint.get("token"):
+            message["token"] = self.endpoint["token"]
+        self.sock.sendall(encode_message(message))
+        while True:
+            response = self._read_message()
+            if "event" in response and "id" not in response:
+                self.pending_events.append(response)
+                continue
+            if response.get("id") != self._next_id:
+                continue
+            if not response.get("ok"):
+                raise ControlError(response.get("error", "Request failed."))
+            return response.get("result")
+
+    def events(self):
+        # Yield subscribed events as they arrive (blocks; the timeout is lifted)
+        self.sock.settimeout(None)
+        while self.pending_events:
+            yield self.pending_events.pop(0)
+        while True:
+            message = self._read_message()
+            if "event" in message:
+                yield message
+
+    def close(self):
+        if self.sock:
+            self._reader.close()
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def connect_to_running_instance(project_root, timeout=2.0):
+    # Connected client of the instance that owns the control endpoint, or None
+    try:
+        with open(endpoint_path(project_root), "r", encoding="utf-8") as endpoint_file:
+            endpoint = json.load(endpoint_file)
+    except (OSError, ValueError):
+        return None
+    client = ControlClient(endpoint, timeout)
+    try:
+        client.connect()
+        client.request("ping")
+    except (OSError, ValueError, KeyError, ControlError):
+        client.close()
+        return None
+    return client
@@ -0,0 +1,114 @@
+import json
+import logging
+import math
+import os
+import threading
+from collections import deque
+
+from model.atomic_file import atomic_write
+
+# Report written by the tray "Diagnostics" entry and on exit (relative to the project root)
+DEFAULT_REPORT_PATH = os.path.join("logs", "latency.json")
+
+# Durations summarised by LatencyRecorder.summary()
+LATENCY_METRICS = ("boundary_to_decision_ms", "setter_ms", "boundary_to_applied_ms")
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    # Ring buffer with the timing of the most recent brightness applications:
+    # schedule boundary, decision, setter start/finish and any backend error
+    DEFAULT_CAPACITY = 1024
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.samples = deque(maxlen=capacity)
+        self.total_count = 0
+        self.error_count = 0
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        display,
+        level,
+        boundary,
+        decided_at,
+        setter_started_at,
+        setter_finished_at,
+        ok,
+        error=None,
+    ):
+        # Times are datetimes from the scheduler clock; boundary is None for applications
+        # not caused by a schedule boundary (startup, config change, forced re-apply)
+        sample = {
+            "display": display,
+            "level": level,
+            "boundary": boundary.isoformat() if boundary else None,
+            "decided_at": decided_at.isoformat(),
+            "setter_started_at": setter_started_at.isoformat(),
+            "setter_finished_at": setter_finished_at.isoformat(),
+            "setter_ms": _milliseconds(setter_finished_at - setter_started_at),
+            "boundary_to_decision_ms": (
+                _milliseconds(decided_at - boundary) if boundary else None
+            ),
+            "boundary_to_applied_ms": (
+                _milliseconds(setter_finished_at - boundary) if boundary else None
+            ),
+            "ok": ok,
+            "error": error,
+        }
+        with self._lock:
+            self.samples.append(sample)
+            self.total_count += 1
+            if not ok:
+                self.error_count += 1
+        return sample
+
+    def summary(self):
+        with self._lock:
+            samples = list(self.samples)
+            total_count, error_count = self.total_count, self.error_count
+
+        summary = {
+            "samples": len(samples),
+            "total": total_count,
+            "errors": error_count,
+        }
+        for metric in LATENCY_METRICS:
+            values = sorted(
+                sample[metric] for sample in samples if sample[metric] is not None
+            )
+            summary[metric] = {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "max": values[-1] if values else None,
+            }
+        return summary
+
+    def snapshot(self):
+        with self._lock:
+            samples = list(self.samples)
+        return {"summary": self.summary(), "samples": samples}
+
+    def dump(self, path):
+        # Write the snapshot as JSON through a temporary file, so readers never see half a file
+        try:
+            atomic_write(
+                path, json.dumps(self.snapshot(), indent=2), prefix=".latency-", fsync=False
+            )
+        except OSError as e:
+            logging.error(f"Failed to write latency report {path}: {e}")
+            return False
+        return True
+
+
+def _milliseconds(delta):
+    return round(delta.total_seconds() * 1000, 3)
@@ -1,42 +1,116 @@
+import gzip
+import json
 import logging
 import os
+import queue
+import secrets
 import sys
 import shutil
+import threading
 from datetime import datetime
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Optional structured fields, passed through extra={...} or LogService.log_event()
+STRUCTURED_FIELDS = ("event", "display", "level", "latency_ms")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    # One JSON object per line; "level" is the brightness level, "levelname" the log level
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "levelname": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
 
 class LogService:
+    # Process-wide singleton: every LogService() returns the same configured instance.
+    # Records are put on a queue by the calling thread and written to the console and the
+    # log file by a QueueListener thread, so logging never blocks the Tk main loop on I/O.
 
     # Log configuration parameters
     create_log_file = True
     log_level = logging.INFO  # INFO | ERROR | WARNING | DEBUG | CRITICAL
+    json_lines = False  # Write the log file as JSON lines instead of plain text
+    log_backup_count = 5  # Rotated segments kept next to running_app.log
+    # Retention budget for the archived logs in logs/
+    max_logs_bytes = 50 * 1024 * 1024
+    max_log_age_days = 30
+
+    _instance = None
+    _instance_lock = threading.Lock()
 
-    def __init__(self, log_level=log_level, log_to_file=create_log_file):
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(
+        self, log_level=log_level, log_to_file=create_log_file, json_lines=json_lines
+    ):
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self._initialized = True
         self.log_file_path = "running_app.log"
+        self.logs_dir = os.path.abspath(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs")
+        )
+        self.listener = None
+        self.archive_thread = None
         # Configure logging settings
-        self.setup_logging(log_level, log_to_file)
+        self.setup_logging(log_level, log_to_file, json_lines)
+        # Compress logs left uncompressed by an interrupted exit and apply the retention budget
+        threading.Thread(target=self.archive_logs, args=([],), daemon=True).start()
 
-    def setup_logging(self, log_level, log_to_file):
-        handlers = [logging.StreamHandler()]
+    def setup_logging(self, log_level, log_to_file, json_lines=False):
+        text_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(text_formatter)
+        handlers = [stream_handler]
 
         # Use RotatingFileHandler instead of FileHandler
         if log_to_file:
             rotating_handler = RotatingFileHandler(
                 self.log_file_path,
                 maxBytes=5 * 1024 * 1024,
-                backupCount=5,
+                backupCount=self.log_backup_count,
+            )
+            rotating_handler.setFormatter(
+                JsonLinesFormatter() if json_lines else text_formatter
             )
             handlers.append(rotating_handler)
 
-        logging.basicConfig(
-            level=log_level,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=handlers,
-        )
+        # The root logger only enqueues; the listener thread does the formatting and I/O
+        log_queue = queue.Queue(-1)
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(QueueHandler(log_queue))
+        root_logger.setLevel(log_level)
+        self.listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
         self.log_info("Logging service initialized.")
 
+    def stop_listener(self):
+        # Write out everything still queued and stop the listener thread
+        if self.listener:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
     def set_embedded_python_path(self):
         script_dir = os.path.dirname(os.path.abspath(__file__))
         python_dir = os.path.abspath(os.path.join(script_dir, "..", "python"))
@@ -50,50 +124,142 @@ class LogService:
         else:
             self.log_info("Using system Python.")
 
-    def log_info(self, message):
-        logging.info(message)
+    # Messages use lazy %-style arguments: log_debug("Level %s", level) is not
+    # formatted at all when DEBUG is disabled
+    def log_info(self, message, *args, **kwargs):
+        logging.info(message, *args, **kwargs)
 
-    def log_error(self, message):
-        logging.error(message)
+    def log_error(self, message, *args, **kwargs):
+        logging.error(message, *args, **kwargs)
 
-    def log_warning(self, message):
-        logging.warning(message)
+    def log_warning(self, message, *args, **kwargs):
+        logging.warning(message, *args, **kwargs)
 
-    def log_debug(self, message):
-        logging.debug(message)
+    def log_debug(self, message, *args, **kwargs):
+        logging.debug(message, *args, **kwargs)
 
-    def log_critical(self, message):
-        logging.critical(message)
+    def log_critical(self, message, *args, **kwargs):
+        logging.critical(message, *args, **kwargs)
+
+    def log_event(self, event, message, *args, log_level=logging.INFO, **fields):
+        # Structured record, e.g. log_event("brightness_set", "Set %s", 40, display="primary", level=40)
+        logging.log(log_level, message, *args, extra=dict(fields, event=event))
+
+    def log_segments(self):
+        # running_app.log and its rotated backups, oldest first
+        segments = [
+            f"{self.log_file_path}.{index}"
+            for index in range(self.log_backup_count, 0, -1)
+        ]
+        segments.append(self.log_file_path)
+        return [path for path in segments if os.path.exists(path)]
 
     def finalize_log_file(self):
+        # Move every log segment into logs/ right away; compression and retention run
+        # in a background thread, so the exit path never waits on them
         try:
-            # Close all logging handlers to release the file
+            # Drain the queue, then close all logging handlers to release the file
+            self.stop_listener()
             root_logger = logging.getLogger()
             handlers = root_logger.handlers[:]
             for handler in handlers:
                 handler.close()
                 root_logger.removeHandler(handler)
 
-            # Wait briefly to ensure that the file is fully released
-            time.sleep(0.5)
-
-            # Check if the log file exists before renaming
-            if os.path.exists(self.log_file_path):
-                # Create the logs directory if it doesn't exist
-                logs_dir = os.path.join(
-                    os.path.abspath(os.path.dirname(__file__)), "..", "logs"
-                )
-                if not os.path.exists(logs_dir):
-                    os.makedirs(logs_dir)
+            segments = self.log_segments()
+            if not segments:
+                print("No running log file found to finalize.")
+                return None
 
-                # Format the current date and time for the filename
-                timestamp = datetime.now().strftime("%d-%m-%y_%H-%M")
-                new_log_filename = f"{timestamp}_app.log"
-                new_log_path = os.path.join(logs_dir, new_log_filename)
+            os.makedirs(self.logs_dir, exist_ok=True)
+            # Format the current date and time for the filename
+            timestamp = datetime.now().strftime("%d-%m-%y_%H-%M-%S")
+            archived = []
+            for position, segment in enumerate(segments):
+                # The oldest segment gets part 1, the running log the last part
+                if len(segments) == 1:
+                    new_log_filename = f"{timestamp}_app.log"
+                else:
+                    new_log_filename = f"{timestamp}_app.part{position + 1}.log"
+                new_log_path = os.path.join(self.logs_dir, new_log_filename)
+                shutil.move(segment, new_log_path)
+                archived.append(new_log_path)
+            print(f"Log files saved in: {self.logs_dir}")
 
-                shutil.move(self.log_file_path, new_log_path)
-                print(f"Log file saved as: {new_log_path}")
-            else:
-                print("No running log file found to finalize.")
+            # Not a daemon thread: the interpreter lets it finish before exiting
+            self.archive_thread = threading.Thread(
+                target=self.archive_logs, args=(archived,)
+            )
+            self.archive_thread.start()
+            return self.archive_thread
         except Exception as e:
             logging.error(f"Unexpected error occurred while finalizing log file: {e}")
+            return None
+
+    def archive_logs(self, paths):
+        # Compress the given logs (plus any uncompressed archive left in logs/),
+        # then enforce the retention budget
+        try:
+            pending = set(paths)
+            if os.path.isdir(self.logs_dir):
+                pending.update(
+                    os.path.join(self.logs_dir, name)
+                    for name in os.listdir(self.logs_dir)
+                    if name.endswith(".log")
+                )
+            for path in sorted(pending):
+                self.compress_log(path)
+            self.enforce_retention()
+        except Exception as e:
+            logging.error(f"Failed to archive log files: {e}")
+
+    def compress_log(self, path):
+        # Write to a temporary name first, so an interrupted run never leaves a truncated .gz.
+        # The name is unique to this archiver (pid and a random part, created exclusively),
+        # so another instance archiving at the same time cannot truncate or replace it.
+        compressed_path = f"{path}.gz"
+        temporary_path = f"{compressed_path}.{os.getpid()}-{secrets.token_hex(4)}.tmp"
+        try:
+            with open(path, "rb") as source, open(temporary_path, "xb") as temporary_file:
+                # The archive header names the log, not the temporary file
+                with gzip.GzipFile(
+                    os.path.basename(path), "wb", fileobj=temporary_file
+                ) as target:
+                    shutil.copyfileobj(source, target)
+            os.replace(temporary_path, compressed_path)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.error(f"Failed to compress {path}: {e}")
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def enforce_retention(self, now=None):
+        # Delete archives older than max_log_age_days, then the oldest ones until the
+        # total size fits in max_logs_bytes
+        if not os.path.isdir(self.logs_dir):
+            return
+        now = time.time() if now is None else now
+        archives = []
+        for name in os.listdir(self.logs_dir):
+            if not name.endswith(".gz"):
+                continue
+            path = os.path.join(self.logs_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            archives.append((stat.st_mtime, stat.st_size, path))
+        archives.sort()
+
+        max_age_seconds = self.max_log_age_days * 24 * 60 * 60
+        total_size = sum(size for _, size, _ in archives)
+        for modified, size, path in archives:
+            if now - modified <= max_age_seconds and total_size <= self.max_logs_bytes:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError as e:
+                logging.error(f"Failed to delete old log {path}: {e}")
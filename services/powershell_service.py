@@ -1,113 +1,177 @@
-import os
+import asyncio
 import subprocess
-import signal
 import atexit
 import logging
-import threading
-import time
+
+from services.process_supervisor import (
+    STATE_CIRCUIT_OPEN,
+    STATE_RUNNING,
+    STATE_STOPPED,
+    ProcessSupervisor,
+)
+from services.runtime import get_runtime
+
+# CREATE_NO_WINDOW only exists on Windows
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
 
 class PowerShellService:
-    def __init__(self, script_path):
+    # Worker protocol (one line per message):
+    #   request:  "<id> set <level>" | "<id> ping" | "quit"
+    #   response: "<id> ok [detail]" | "<id> err <message>"
+    # Requests and responses are handled on the async runtime; each request waits on its
+    # own future, so answers are matched by id and several requests can be in flight.
+    HEALTH_CHECK_INTERVAL = 30
+    COMMAND_TIMEOUT = 10
+
+    def __init__(self, script_path, command=None, runtime=None):
         self.script_path = script_path
-        self.powershell_process = None
-        self._stopped = False
-        self._stop_requested = threading.Event()
+        # Optional replacement for the powershell.exe command line (e.g. a stub worker on Linux)
+        self.command = command
+        self.runtime = runtime or get_runtime()
+        # Request id -> future of the response, only touched on the loop thread
+        self._pending = {}
+        self._next_request_id = 0
+        self._monitor = None
+        # Restarts the worker with backoff when it exits and drains its stdout/stderr
+        self.supervisor = ProcessSupervisor(
+            "PowerShell worker",
+            self.build_command("-Worker"),
+            on_output=self._on_output,
+            request_stop=self._request_quit,
+            creationflags=CREATE_NO_WINDOW,
+            runtime=self.runtime,
+        )
         atexit.register(self.stop_powershell)
-        logging.info(f"PowerShellService initialized with script: {self.script_path}")
+        logging.info("PowerShellService initialized with script: %s", self.script_path)
+
+    @property
+    def powershell_process(self):
+        return self.supervisor.process
+
+    def build_command(self, *script_args):
+        if self.command:
+            return [*self.command, *script_args]
+        return [
+            "powershell.exe",
+            "-ExecutionPolicy",
+            "Bypass",
+            "-File",
+            self.script_path,
+            *script_args,
+        ]
 
     def start_powershell(self):
-        if self.powershell_process is None:
-            logging.info(f"Starting PowerShell with script: {self.script_path}")
-            try:
-                self.powershell_process = subprocess.Popen(
-                    [
-                        "powershell.exe",
-                        "-ExecutionPolicy",
-                        "Bypass",
-                        "-File",
-                        self.script_path,
-                    ],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                )
-                logging.info(
-                    f"PowerShell process started with PID: {self.powershell_process.pid}"
-                )
-            except Exception as e:
-                logging.error(f"Failed to start PowerShell: {e}")
+        logging.info("Starting PowerShell worker with script: %s", self.script_path)
+        self.supervisor.start()
+        if self.supervisor.wait_until_running(self.COMMAND_TIMEOUT) is None:
+            logging.error("PowerShell worker did not start.")
 
-    def stop_powershell(self):
-        if self.powershell_process:
-            logging.info(
-                f"Attempting to terminate PowerShell process with PID: {self.powershell_process.pid}"
-            )
-            self.powershell_process.terminate()
-            try:
-                self.powershell_process.wait(timeout=5)
-                logging.info(
-                    f"PowerShell process with PID {self.powershell_process.pid} terminated successfully."
-                )
-            except subprocess.TimeoutExpired:
-                logging.warning(
-                    f"Timeout expired. Forcing termination of PowerShell process with PID: {self.powershell_process.pid}"
-                )
-                try:
-                    os.kill(self.powershell_process.pid, signal.SIGKILL)
-                    logging.info(
-                        f"PowerShell process with PID {self.powershell_process.pid} was forcefully terminated."
-                    )
-                except Exception as e:
-                    logging.error(f"Failed to forcefully terminate the process: {e}")
-            self.powershell_process = None
-        else:
-            logging.info("No PowerShell process is running to terminate.")
+    def _on_output(self, line):
+        # Runs on the loop thread for every stdout line of the worker
+        if line is None:
+            # The worker exited; nothing pending will be answered
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result((False, "worker exited"))
+            self._pending.clear()
+            return
+        response_id, _, rest = line.partition(" ")
+        future = self._pending.pop(response_id, None)
+        if future is None or future.done():
+            # Late answer to a request that already timed out
+            logging.debug("Discarding stale worker response: %s", line)
+            return
+        status, _, detail = rest.partition(" ")
+        future.set_result((status == "ok", detail))
 
-    def monitor_powershell(self):
-        while not self._stopped:
-            if self.powershell_process:
-                return_code = self.powershell_process.poll()
-                if return_code is not None:
-                    logging.error(
-                        f"PowerShell process with PID {self.powershell_process.pid} exited with return code {return_code}"
-                    )
-                    self.powershell_process = None
-                    # Restart the PowerShell process
-                    logging.info("Attempting to restart PowerShell process.")
-                    self.start_powershell()
-                else:
-                    logging.debug(
-                        f"PowerShell process with PID {self.powershell_process.pid} is still running."
-                    )
-            else:
-                logging.info("No PowerShell process is running. Starting a new one.")
-                self.start_powershell()
-
-            time.sleep(3)
+    def _request_quit(self, process):
+        process.stdin.write(b"quit\n")
 
-    def start_monitoring(self):
-        monitoring_thread = threading.Thread(
-            target=self.monitor_powershell, daemon=True
-        )
-        monitoring_thread.start()
-        logging.info("Started monitoring PowerShell process.")
+    def send_command(self, command, timeout=COMMAND_TIMEOUT):
+        # Send one command to the worker and wait for its acknowledgement
+        if self.supervisor.state == STATE_STOPPED:
+            self.supervisor.start()
+        return self.runtime.run(self.send_command_async(command, timeout))
 
-        stop_thread = threading.Thread(
-            target=self._stop_powershell_every_60s, daemon=True
+    async def send_command_async(self, command, timeout=COMMAND_TIMEOUT):
+        # A crashed worker is restarted by the supervisor; wait for it within the timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        process = await self.supervisor.running_process(timeout)
+        if process is None:
+            if self.supervisor.state == STATE_CIRCUIT_OPEN:
+                return False, "worker crashing repeatedly"
+            return False, "worker not running"
+
+        self._next_request_id += 1
+        request_id = str(self._next_request_id)
+        future = loop.create_future()
+        self._pending[request_id] = future
+        # A plain timer is much cheaper than wait_for(), which wraps the future in a task
+        timer = loop.call_later(
+            max(deadline - loop.time(), 0), self._expire, future, command
         )
-        stop_thread.start()
-        logging.info("Started auto-stop thread for PowerShell process.")
+        try:
+            process.stdin.write(f"{request_id} {command}\n".encode("utf-8"))
+            await process.stdin.drain()
+            return await future
+        except (OSError, RuntimeError) as e:
+            logging.error("Failed to send command to PowerShell worker: %s", e)
+            return False, str(e)
+        finally:
+            timer.cancel()
+            self._pending.pop(request_id, None)
+
+    def _expire(self, future, command):
+        if not future.done():
+            logging.error("PowerShell worker did not answer '%s' in time.", command)
+            future.set_result((False, "timeout"))
+
+    def set_brightness(self, level):
+        logging.info("Setting brightness to %s through the PowerShell worker.", level)
+        ok, detail = self.send_command(f"set {int(level)}")
+        if ok:
+            logging.debug("PowerShell worker acknowledged level %s: %s", level, detail)
+        else:
+            logging.error("PowerShell worker failed to set brightness %s: %s", level, detail)
+        return ok
+
+    def health_check(self):
+        ok, _ = self.send_command("ping", timeout=5)
+        return ok
 
-    def _stop_powershell_every_60s(self):
-        # Start a thread to restart the process every 60 seconds (To fix a little problem with de PS not changing the brightness after a while)
-        while not self._stopped:
-            time.sleep(60)
-            if not self._stopped:
-                logging.info("Stopping PowerShell process to ensure periodic refresh.")
-                self.stop_powershell()
+    def stop_powershell(self):
+        if self.supervisor.state == STATE_STOPPED:
+            logging.info("No PowerShell process is running to terminate.")
+            return
+        self.supervisor.stop()
+        logging.info("PowerShell worker stopped.")
+
+    def metrics(self):
+        # Restart counts, uptime and circuit breaker state of the worker
+        return self.supervisor.metrics()
 
-                time.sleep(2)
+    async def monitor_powershell(self):
+        # Exits are handled by the supervisor; this only catches a worker that is
+        # alive but no longer answers
+        while True:
+            await asyncio.sleep(self.HEALTH_CHECK_INTERVAL)
+            if self.supervisor.state != STATE_RUNNING:
+                continue
+            ok, _ = await self.send_command_async("ping", timeout=5)
+            if ok:
+                logging.debug("PowerShell worker passed health check.")
+                continue
+            logging.error("PowerShell worker failed health check. Restarting it.")
+            self.supervisor.restart()
+
+    def start_monitoring(self):
+        if self._monitor is None:
+            self._monitor = self.runtime.submit(self.monitor_powershell())
+            logging.info("Started health monitoring for PowerShell worker.")
 
-                self._stopped = False
-                self._stop_requested.clear()
+    def stop_monitoring(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
@@ -0,0 +1,357 @@
+import asyncio
+import logging
+import random
+import subprocess
+import time
+from collections import deque
+
+from services.runtime import get_runtime
+
+# Supervisor states reported by ProcessSupervisor.metrics()
+STATE_STOPPED = "stopped"
+STATE_STARTING = "starting"
+STATE_RUNNING = "running"
+STATE_BACKOFF = "backoff"
+STATE_CIRCUIT_OPEN = "circuit_open"
+
+
+class ProcessSupervisor:
+    # Keeps one child process alive as a coroutine on the async runtime. It awaits the
+    # child's exit, restarts it after a jittered exponential backoff and opens a circuit
+    # breaker when it keeps crashing; stdout lines go to on_output (None at end of stream)
+    # and stderr lines to the log, so neither pipe can fill up and block the child.
+    # The callbacks run on the runtime's loop thread.
+    INITIAL_BACKOFF_SECONDS = 0.5
+    MAX_BACKOFF_SECONDS = 30.0
+    BACKOFF_MULTIPLIER = 2.0
+    # Each delay is spread by up to +/- this fraction so restarts do not synchronise
+    BACKOFF_JITTER = 0.2
+    # A child that ran this long is considered healthy again and resets the backoff
+    STABLE_UPTIME_SECONDS = 30.0
+    # This many crashes within the window open the circuit for CIRCUIT_OPEN_SECONDS,
+    # after which a single trial start is allowed
+    CRASH_LOOP_THRESHOLD = 5
+    CRASH_LOOP_WINDOW_SECONDS = 60.0
+    CIRCUIT_OPEN_SECONDS = 300.0
+    STOP_TIMEOUT_SECONDS = 2.0
+    # Longest stdout/stderr line kept; longer lines are dropped
+    MAX_LINE_BYTES = 64 * 1024
+
+    def __init__(
+        self,
+        name,
+        command,
+        on_output=None,
+        on_start=None,
+        request_stop=None,
+        creationflags=0,
+        runtime=None,
+        clock=time.monotonic,
+        random_source=random.random,
+    ):
+        self.name = name
+        self.command = command
+        self.on_output = on_output
+        # on_start(process) runs before the output readers start
+        self.on_start = on_start
+        # request_stop(process) asks the child to exit on its own (e.g. writes "quit")
+        self.request_stop = request_stop
+        self.creationflags = creationflags
+        self.runtime = runtime or get_runtime()
+        self.clock = clock
+        self.random_source = random_source
+
+        self.process = None
+        self.state = STATE_STOPPED
+        self.start_count = 0
+        self.restart_count = 0
+        self.crash_count = 0
+        self.consecutive_failures = 0
+        self.circuit_open_count = 0
+        self.last_exit_code = None
+        self.started_at = None
+        self.total_uptime = 0.0
+        self.next_start_at = None
+        self._crash_times = deque()
+        self._half_open = False
+        # Set once the current child closed its output or was killed, before it is reaped
+        self._exiting = False
+        self._stopping = False
+        # Loop-side objects, created on the loop thread
+        self._task = None
+        self._wake = None
+        self._changed = None
+
+    # Thread-safe API
+
+    def start(self):
+        if self.state != STATE_STOPPED:
+            return
+        self.state = STATE_STARTING
+        self.runtime.run(self._start())
+
+    def stop(self):
+        # Stop supervising and end the child: polite request, terminate, then kill
+        if self.state == STATE_STOPPED or not self.runtime.running:
+            return
+        self.runtime.run(self._stop())
+
+    def restart(self):
+        # Kill a child that is alive but unhealthy; it is restarted like a crashed one
+        self.runtime.call_soon(self._kill_current)
+
+    def reset_circuit(self):
+        # Close the circuit and start right away instead of waiting for the cool-down
+        self.runtime.call_soon(self._reset_circuit)
+
+    def wait_until_running(self, timeout=None):
+        # The live child, or None if none is up within timeout or the circuit is open
+        return self.runtime.run(self.running_process(timeout))
+
+    def backoff_delay(self, failures):
+        delay = min(
+            self.INITIAL_BACKOFF_SECONDS * self.BACKOFF_MULTIPLIER ** max(failures - 1, 0),
+            self.MAX_BACKOFF_SECONDS,
+        )
+        return delay * (1 + self.BACKOFF_JITTER * (2 * self.random_source() - 1))
+
+    def metrics(self):
+        now = self.clock()
+        started_at, process, next_start_at = self.started_at, self.process, self.next_start_at
+        uptime = now - started_at if started_at is not None else 0.0
+        return {
+            "state": self.state,
+            "pid": process.pid if process else None,
+            "starts": self.start_count,
+            "restarts": self.restart_count,
+            "crashes": self.crash_count,
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_opened": self.circuit_open_count,
+            "last_exit_code": self.last_exit_code,
+            "uptime_seconds": round(uptime, 3),
+            "total_uptime_seconds": round(self.total_uptime + uptime, 3),
+            "next_start_in_seconds": (
+                round(max(next_start_at - now, 0), 3) if next_start_at is not None else None
+            ),
+        }
+
+    # Loop side
+
+    async def running_process(self, timeout=None):
+        # Coroutine form of wait_until_running(); a child that is exiting is never returned
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            if self.process is not None and not self._exiting:
+                return self.process
+            if self.state in (STATE_CIRCUIT_OPEN, STATE_STOPPED) or self._changed is None:
+                return None
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(asyncio.shield(self._changed), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def _notify_changed(self):
+        if not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = asyncio.get_running_loop().create_future()
+
+    async def _start(self):
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._changed = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._supervise())
+
+    async def _stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self.process is not None:
+            await self._end_process(self.process)
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, self.STOP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._task = None
+        self.state = STATE_STOPPED
+        self._notify_changed()
+
+    def _kill_current(self):
+        process = self.process
+        if process is None or process.returncode is not None:
+            return
+        logging.warning("Restarting unresponsive %s (PID %s).", self.name, process.pid)
+        self._exiting = True
+        self._notify_changed()
+        process.kill()
+
+    def _reset_circuit(self):
+        self._crash_times.clear()
+        self.consecutive_failures = 0
+        self._half_open = False
+        if self._wake:
+            self._wake.set()
+
+    async def _supervise(self):
+        try:
+            while not self._stopping:
+                process = await self._spawn()
+                if process is not None:
+                    await self._wait_for_exit(process)
+                if self._stopping:
+                    break
+                delay = self._record_failure()
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._stopping:
+                    self.restart_count += 1
+        except asyncio.CancelledError:
+            # The runtime is shutting down; do not leave the child behind
+            process = self.process
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+    async def _spawn(self):
+        self.state = STATE_STARTING
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                limit=self.MAX_LINE_BYTES,
+                creationflags=self.creationflags,
+            )
+        except OSError as e:
+            logging.error("Failed to start %s: %s", self.name, e)
+            return None
+
+        if self.on_start:
+            self.on_start(process)
+        self.start_count += 1
+        self.process = process
+        self._exiting = False
+        self.started_at = self.clock()
+        self.next_start_at = None
+        self.state = STATE_RUNNING
+        self._notify_changed()
+        logging.info("%s started with PID %s.", self.name, process.pid)
+        return process
+
+    async def _wait_for_exit(self, process):
+        # Awaits the exit while both pipes are drained; no polling
+        readers = [
+            asyncio.create_task(self._drain_stdout(process)),
+            asyncio.create_task(self._drain_stderr(process)),
+        ]
+        try:
+            exit_code = await process.wait()
+        except asyncio.CancelledError:
+            for reader in readers:
+                reader.cancel()
+            raise
+        uptime = self.clock() - self.started_at
+        self.total_uptime += uptime
+        self.started_at = None
+        self.process = None
+        self.last_exit_code = exit_code
+        self.state = STATE_STARTING
+        self._notify_changed()
+        done, pending = await asyncio.wait(readers, timeout=1)
+        for reader in pending:
+            reader.cancel()
+
+        if self._stopping:
+            logging.info("%s (PID %s) stopped.", self.name, process.pid)
+            return
+        logging.warning(
+            "%s (PID %s) exited with code %s after %.1fs.",
+            self.name,
+            process.pid,
+            exit_code,
+            uptime,
+        )
+        if uptime >= self.STABLE_UPTIME_SECONDS:
+            self.consecutive_failures = 0
+            self._half_open = False
+
+    def _record_failure(self):
+        # Count the crash and return the delay before the next start
+        now = self.clock()
+        self.crash_count += 1
+        self.consecutive_failures += 1
+        self._crash_times.append(now)
+        window_start = now - self.CRASH_LOOP_WINDOW_SECONDS
+        while self._crash_times and self._crash_times[0] < window_start:
+            self._crash_times.popleft()
+        crash_loop = self._half_open or len(self._crash_times) >= self.CRASH_LOOP_THRESHOLD
+        if crash_loop:
+            self.circuit_open_count += 1
+            self._crash_times.clear()
+            self._half_open = True
+            delay = self.CIRCUIT_OPEN_SECONDS
+            self.state = STATE_CIRCUIT_OPEN
+            logging.error("%s keeps crashing; not restarting it for %.1fs.", self.name, delay)
+        else:
+            delay = self.backoff_delay(self.consecutive_failures)
+            self.state = STATE_BACKOFF
+            logging.info("Restarting %s in %.2fs.", self.name, delay)
+        self.next_start_at = now + delay
+        self._notify_changed()
+        return delay
+
+    async def _read_lines(self, stream):
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                logging.warning(
+                    "%s wrote a line longer than %s bytes.", self.name, self.MAX_LINE_BYTES
+                )
+                continue
+            if not line:
+                return
+            yield line.decode("utf-8", errors="replace").strip()
+
+    async def _drain_stdout(self, process):
+        async for line in self._read_lines(process.stdout):
+            if line and self.on_output:
+                self.on_output(line)
+        if self.process is process:
+            # A closed stdout means the child is going away
+            self._exiting = True
+            self._notify_changed()
+        if self.on_output:
+            # End of stream, so a pending request does not wait for its full timeout
+            self.on_output(None)
+
+    async def _drain_stderr(self, process):
+        async for line in self._read_lines(process.stderr):
+            if line:
+                logging.warning("%s stderr: %s", self.name, line)
+
+    async def _end_process(self, process):
+        if self.request_stop:
+            try:
+                self.request_stop(process)
+            except (OSError, RuntimeError):
+                pass
+        try:
+            await asyncio.wait_for(process.wait(), self.STOP_TIMEOUT_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), 5)
+        except asyncio.TimeoutError:
+            logging.warning("Killing %s (PID %s).", self.name, process.pid)
+            process.kill()
+            await process.wait()
@@ -0,0 +1,219 @@
+import asyncio
+import functools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncRuntime:
+    # One asyncio event loop on its own thread. The scheduler, the PowerShell worker
+    # supervision, the control server and config polling run on it as coroutines;
+    # blocking calls (backends, file I/O) go to its executor through run_blocking().
+    # With nothing due the loop sleeps in select() without waking up.
+    MAX_BLOCKING_WORKERS = 8
+    STOP_TIMEOUT_SECONDS = 5
+
+    def __init__(self, name="runtime"):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return self
+            self.loop = asyncio.new_event_loop()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.MAX_BLOCKING_WORKERS,
+                thread_name_prefix=f"{self.name}-blocking",
+            )
+            self.loop.set_default_executor(self._executor)
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), daemon=True, name=self.name
+            )
+            self._thread.start()
+            ready.wait()
+        logging.info("Async runtime started.")
+        return self
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    def stop(self):
+        # Cancel every task still running, let them clean up, then close the loop
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self.loop, self._thread
+            try:
+                asyncio.run_coroutine_threadsafe(self._cancel_tasks(), loop).result(
+                    self.STOP_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                logging.error(f"Async runtime tasks did not stop cleanly: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(self.STOP_TIMEOUT_SECONDS)
+            self._executor.shutdown(wait=False)
+            if not thread.is_alive():
+                loop.close()
+            self._thread = None
+        logging.info("Async runtime stopped.")
+
+    async def _cancel_tasks(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def in_loop_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, coroutine):
+        # Schedule a coroutine from any thread; returns a concurrent.futures.Future
+        if not self.running:
+            coroutine.close()
+            raise RuntimeError("The async runtime is not running.")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout=None):
+        # Run a coroutine from another thread and wait for its result
+        if self.in_loop_thread():
+            coroutine.close()
+            raise RuntimeError("AsyncRuntime.run() would block its own event loop.")
+        return self.submit(coroutine).result(timeout)
+
+    def call_soon(self, callback, *args):
+        # Thread-safe: run a plain callback on the loop thread
+        if self.running:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    async def run_blocking(self, function, *args, **kwargs):
+        # Await a blocking call on the runtime's executor
+        return await self.loop.run_in_executor(
+            None, functools.partial(function, *args, **kwargs)
+        )
+
+
+_default_runtime = None
+_default_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    # The process-wide runtime, started on first use
+    global _default_runtime
+    with _default_runtime_lock:
+        if _default_runtime is None:
+            _default_runtime = AsyncRuntime()
+        if not _default_runtime.running:
+            _default_runtime.start()
+        return _default_runtime
+
+
+class TkPump:
+    # Hands callbacks from other threads (runtime, tray, control server) to the Tk thread.
+    # Other threads append to a queue and, when it was empty, wake the pump: the Tk thread
+    # then drains it from an after_idle() callback. With nothing queued nothing is
+    # scheduled, so an idle UI never wakes up. The after_idle() call itself is made by a
+    # small waker thread, since Tk blocks any other thread calling into it until the Tk
+    # thread answers; callers of call_soon() never wait for the Tk thread.
+    MAX_CALLBACKS_PER_PASS = 100
+    # Retry delay while Tk's main loop has not started yet
+    WAKE_RETRY_SECONDS = 0.05
+
+    def __init__(self, root):
+        # Created on the Tk thread
+        self.root = root
+        self._tk_thread = threading.current_thread()
+        self._callbacks = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        # True from the first queued callback until a pass starts draining the queue
+        self._scheduled = False
+        self._running = False
+        self._wake = threading.Event()
+        self._waker = None
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            pending = self._scheduled
+        self._waker = threading.Thread(target=self._run_waker, daemon=True, name="tk-pump")
+        self._waker.start()
+        if pending:
+            self.root.after_idle(self._pump)
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        self._wake.set()
+
+    def call_soon(self, callback, *args):
+        # Thread-safe: callback(*args) runs on the Tk thread once it is idle
+        self._callbacks.put((callback, args))
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+            if not self._running:
+                # start() schedules the first pass
+                return
+        if threading.current_thread() is self._tk_thread:
+            self.root.after_idle(self._pump)
+        else:
+            self._wake.set()
+
+    def _run_waker(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while self._running:
+                try:
+                    self.root.after_idle(self._pump)
+                    break
+                except RuntimeError:
+                    # "main thread is not in main loop" during startup
+                    time.sleep(self.WAKE_RETRY_SECONDS)
+                except Exception as e:
+                    # The Tk root was destroyed
+                    logging.debug(f"UI pump stopped: {e}")
+                    return
+            if not self._running:
+                return
+
+    def _pump(self):
+        with self._lock:
+            if not self._running:
+                return
+            # Callbacks queued from now on schedule another pass
+            self._scheduled = False
+        processed = 0
+        while processed < self.MAX_CALLBACKS_PER_PASS:
+            try:
+                callback, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                return
+            processed += 1
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(f"UI callback {callback} failed: {e}")
+
+        # More work than one pass takes: continue after Tk has handled its own events
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.root.after(1, self._pump)
@@ -0,0 +1,394 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from model.ambient_model import AdaptiveSettings, blend_levels
+from model.compiled_schedule import CompiledSchedule, next_transition_after
+from model.display_model import displays_from_config
+from model.profile_model import apply_profile, next_profile_change, profile_calendar
+from services.latency_service import LatencyRecorder
+from services.runtime import get_runtime
+from services.transition_service import TransitionEngine
+
+
+class DisplayTarget:
+    # Binds a backend to one display, so a TransitionEngine can drive each display on its own.
+    # Every setter call is timed into the latency recorder, together with the schedule
+    # boundary and decision time of the level being applied.
+    def __init__(
+        self,
+        backend,
+        display_id,
+        clock=datetime.now,
+        latency_recorder=None,
+        on_applied=None,
+    ):
+        self.backend = backend
+        self.display_id = display_id
+        self.clock = clock
+        self.latency_recorder = latency_recorder
+        # on_applied(display_id, level, applied) after every setter call
+        self.on_applied = on_applied
+        self.boundary = None
+        self.decided_at = None
+
+    def begin(self, boundary, decided_at):
+        self.boundary = boundary
+        self.decided_at = decided_at
+
+    def quantize(self, level):
+        return self.backend.quantize(level, self.display_id)
+
+    def set_brightness(self, level):
+        started_at = self.clock()
+        error = None
+        try:
+            applied = self.backend.set_brightness(level, self.display_id)
+            if not applied:
+                error = "backend reported a failure"
+        except Exception as e:
+            logging.error(
+                "Brightness backend raised an error for display %s: %s", self.display_id, e
+            )
+            applied, error = False, str(e)
+        if self.latency_recorder:
+            self.latency_recorder.record(
+                self.display_id,
+                level,
+                self.boundary,
+                self.decided_at or started_at,
+                started_at,
+                self.clock(),
+                applied,
+                error,
+            )
+        if self.on_applied:
+            self.on_applied(self.display_id, level, applied)
+        return applied
+
+
+class SchedulerService:
+    # Upper bound for a single sleep so wall-clock jumps (hibernate, DST) are picked up
+    MAX_SLEEP_SECONDS = 15 * 60
+
+    def __init__(
+        self,
+        config_manager,
+        backend,
+        clock=datetime.now,
+        latency_recorder=None,
+        runtime=None,
+    ):
+        self.config_manager = config_manager
+        self.backend = backend
+        self.clock = clock
+        self.latency_recorder = latency_recorder or LatencyRecorder()
+        # The scheduling loop is a coroutine on this runtime (the shared one by default)
+        self.runtime = runtime
+        # One transition engine per display id, created on first use
+        self.engines = {}
+        # Guards self.engines: passes change it on the executor while the control server
+        # and the UI read it
+        self._engines_lock = threading.Lock()
+        self.next_boundary_time = None
+        # Config edits are applied at once; only boundary changes are ramped
+        self._config_changed = False
+        # Set by request_reapply(): send every display's level even if it did not change
+        self._force_reapply = False
+        # Guards the two flags above, which other threads set while a pass takes them
+        self._flags_lock = threading.Lock()
+        # Level the ambient light curve asks for (None: adaptive mode off); blended
+        # with the scheduled level of every display
+        self.ambient_level = None
+        # Day -> profile calendar of the current "ProfileRules", rebuilt on config changes
+        self._profile_calendar = None
+        self._profile_calendar_loaded = False
+        # Loop-side wake-up event and the task running _run()
+        self._wake = None
+        self._task = None
+        # Set once the first pass has applied (or failed to apply) the current level
+        self.first_pass_done = threading.Event()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        logging.info("SchedulerService initialized.")
+
+    @property
+    def last_level(self):
+        # Level of the first configured display (the only one without a "Displays" list)
+        return next(iter(self.levels().values()), None)
+
+    def levels(self):
+        with self._engines_lock:
+            engines = list(self.engines.items())
+        return {display_id: engine.target_level for display_id, engine in engines}
+
+    def _engine_for(self, display_id):
+        runtime = self._get_runtime()
+        with self._engines_lock:
+            engine = self.engines.get(display_id)
+            if engine is None:
+                engine = TransitionEngine(
+                    DisplayTarget(
+                        self.backend,
+                        display_id,
+                        self.clock,
+                        self.latency_recorder,
+                        self._on_level_applied,
+                    ),
+                    runtime,
+                )
+                self.engines[display_id] = engine
+        return engine
+
+    def _get_runtime(self):
+        self.runtime = self.runtime or get_runtime()
+        return self.runtime
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._get_runtime()
+        # Saved or externally edited configs wake the scheduler instead of it re-polling the file
+        self.config_manager.subscribe(self.on_config_changed)
+        self._task = self.runtime.submit(self._run())
+        logging.info("Brightness scheduler started.")
+
+    def stop(self):
+        self.config_manager.unsubscribe(self.on_config_changed)
+        with self._engines_lock:
+            engines = list(self.engines.values())
+        for engine in engines:
+            engine.cancel()
+        if self._task:
+            self._task.cancel()
+            if not self.runtime.in_loop_thread():
+                concurrent.futures.wait([self._task], timeout=1)
+            self._task = None
+        logging.info("Brightness scheduler stopped.")
+
+    def notify_config_changed(self):
+        # Wake the scheduler so the new schedule is applied without waiting for the next boundary
+        logging.debug("Scheduler notified of a configuration change.")
+        with self._flags_lock:
+            self._config_changed = True
+        self._wake_up()
+
+    def on_config_changed(self, config):
+        self.notify_config_changed()
+
+    def request_reapply(self):
+        # Re-send the current levels on the next pass (e.g. after the display was reset)
+        if hasattr(self.backend, "force_reapply"):
+            self.backend.force_reapply()
+        with self._flags_lock:
+            self._force_reapply = True
+        self._wake_up()
+
+    def _wake_up(self):
+        # Thread-safe: end the scheduler's current sleep
+        if self._wake is not None:
+            self.runtime.call_soon(self._wake.set)
+
+    def set_ambient_level(self, level):
+        # Called by AmbientService when the smoothed light reading maps to a new level
+        if level == self.ambient_level:
+            return
+        self.ambient_level = level
+        self._wake_up()
+
+    def set_level(self, level, display_id=None):
+        # Manual override of one display (the first configured one by default) until
+        # its next boundary or configuration change
+        if display_id is None:
+            config = self.config_manager.load_config()
+            display_id = displays_from_config(config)[0].display_id
+        engine = self._engine_for(display_id)
+        engine.backend.begin(None, self.clock())
+        return engine.set_immediately(level)
+
+    def subscribe(self, callback):
+        # callback(event) after every brightness write, including each ramp step:
+        # {"event": "brightness_applied" | "brightness_failed", "display", "level", "time"}
+        with self._subscribers_lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._subscribers_lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _on_level_applied(self, display_id, level, applied):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        event = {
+            "event": "brightness_applied" if applied else "brightness_failed",
+            "display": display_id,
+            "level": level,
+            "time": self.clock().isoformat(),
+        }
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error("Scheduler event subscriber failed: %s", e)
+
+    def write_stats(self):
+        # Applied vs. suppressed backend writes, when the backend tracks them
+        if hasattr(self.backend, "stats"):
+            return self.backend.stats()
+        return {}
+
+    def apply_now(self):
+        # Blocking version of apply_pass() for callers outside the event loop (the CLI)
+        return self._get_runtime().run(self.apply_pass())
+
+    async def apply_pass(self):
+        # Apply the level for the current time on every display in one pass and
+        # return the earliest next boundary to wake up at. Reading the configuration and
+        # planning run on the runtime's executor, then every display is written at once.
+        immediate_changes, boundary = await self.runtime.run_blocking(self._plan_pass)
+        await self._apply_concurrently(immediate_changes)
+        return boundary
+
+    def _plan_pass(self):
+        # Returns the displays to set right away and the next boundary; ramps are started
+        # Flags are taken before the configuration is read, so a change notified from
+        # here on is seen by the next pass instead of being cleared by this one
+        with self._flags_lock:
+            config_changed, self._config_changed = self._config_changed, False
+            force_reapply, self._force_reapply = self._force_reapply, False
+        config = self.config_manager.load_config()
+        now = self.clock()
+        # The boundary this pass was scheduled for, if it has been reached
+        boundary_reached = self.next_boundary_time
+        if boundary_reached is not None and now < boundary_reached:
+            boundary_reached = None
+
+        # Schedule and levels of the profile active today. The calendar holds every day's
+        # profile, so a pass costs the same whatever the number of rules.
+        if config_changed or not self._profile_calendar_loaded:
+            self._profile_calendar = profile_calendar(config)
+            self._profile_calendar_loaded = True
+        profile_change = next_profile_change(config, now, self._profile_calendar)
+        config = apply_profile(config, now.date(), self._profile_calendar)
+        displays = displays_from_config(config)
+        transition_config = config.get("Transition", {})
+        adaptive = AdaptiveSettings.from_config(config)
+        ambient_level = self.ambient_level if adaptive.enabled else None
+
+        # Forget displays that were removed from the configuration
+        display_ids = {display.display_id for display in displays}
+        with self._engines_lock:
+            removed = [
+                self.engines.pop(display_id)
+                for display_id in list(self.engines)
+                if display_id not in display_ids
+            ]
+        for engine in removed:
+            engine.cancel()
+
+        immediate_changes = []
+        boundaries = []
+        for display in displays:
+            engine = self._engine_for(display.display_id)
+            engine.configure(transition_config)
+            display_config = display.to_config()
+            compiled = CompiledSchedule.from_config(display_config, now.date())
+            level = compiled.level_at(now)
+            if level is not None and ambient_level is not None:
+                level = blend_levels(level, ambient_level, adaptive.weight, adaptive.step)
+            if level is None:
+                logging.warning(
+                    "Current time (%02d:%02d) is not covered by any brightness period "
+                    "of display %s.",
+                    now.hour,
+                    now.minute,
+                    display.display_id,
+                )
+            elif level != engine.target_level or force_reapply:
+                engine.backend.begin(boundary_reached, now)
+                if config_changed or force_reapply or engine.target_level is None:
+                    immediate_changes.append((display.display_id, engine, level))
+                else:
+                    logging.info(
+                        "Scheduler ramping display %s to brightness level %s.",
+                        display.display_id,
+                        level,
+                    )
+                    engine.start_ramp(engine.target_level, level)
+
+            boundary = next_transition_after(display_config, now, compiled)
+            if boundary:
+                boundaries.append(boundary)
+
+        if profile_change:
+            boundaries.append(profile_change)
+
+        self.next_boundary_time = min(boundaries) if boundaries else now + timedelta(
+            seconds=self.MAX_SLEEP_SECONDS
+        )
+        return immediate_changes, self.next_boundary_time
+
+    async def _apply_concurrently(self, changes):
+        # Send immediate levels to all displays at once on the runtime's executor, so the
+        # pass takes as long as the slowest display rather than the sum of all of them
+        results = await asyncio.gather(
+            *(self.runtime.run_blocking(self._apply_change, change) for change in changes)
+        )
+        for (display_id, _, level), (applied, latency_ms) in zip(changes, results):
+            fields = {
+                "event": "brightness_applied" if applied else "brightness_failed",
+                "display": display_id,
+                "level": level,
+                "latency_ms": latency_ms,
+            }
+            if applied:
+                logging.info(
+                    "Scheduler applied brightness level %s to display %s.",
+                    level,
+                    display_id,
+                    extra=fields,
+                )
+            else:
+                logging.error(
+                    "Scheduler failed to apply brightness level %s to display %s.",
+                    level,
+                    display_id,
+                    extra=fields,
+                )
+
+    def _apply_change(self, change):
+        # Returns (applied, latency in milliseconds)
+        _, engine, level = change
+        started = time.perf_counter()
+        applied = engine.set_immediately(level)
+        return applied, round((time.perf_counter() - started) * 1000, 3)
+
+    async def _run(self):
+        # Backend calls of each pass run on the runtime's executor, so they never block
+        # the loop; in between the coroutine sleeps until the next boundary or a wake-up
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                boundary = await self.apply_pass()
+                timeout = (boundary - self.clock()).total_seconds()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error("Unexpected error in brightness scheduler: %s", e)
+                timeout = self.MAX_SLEEP_SECONDS
+            self.first_pass_done.set()
+
+            timeout = min(max(timeout, 0), self.MAX_SLEEP_SECONDS)
+            logging.debug("Scheduler sleeping for %.1f seconds.", timeout)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
@@ -0,0 +1,70 @@
+# services/stub_worker.py
+#
+# Stand-in for adjust_brightness.ps1 -Worker that speaks the same stdin/stdout
+# protocol without touching the display, so PowerShellService can be exercised
+# on Linux:
+#
+#   PowerShellService(script_path, command=[sys.executable, "services/stub_worker.py"])
+#
+# Besides the worker protocol it crashes and misbehaves on cue, for exercising the
+# supervisor:
+#   "<id> crash [code]"   exit at once with the code (default 1), without answering
+#   "<id> noise <lines>"  write that many lines to stderr, then answer
+#   "<id> hang"           stop answering (for health-check restarts)
+#   --crash-on-start CODE exit right after starting (crash loops)
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from model.brightness import map_brightness
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crash-on-start", type=int)
+    # powershell.exe receives -Worker; accepted so the command lines match
+    parser.add_argument("-Worker", action="store_true")
+    args = parser.parse_args()
+    if args.crash_on_start is not None:
+        sys.stderr.write("stub worker crashing on start\n")
+        sys.exit(args.crash_on_start)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        if line == "quit":
+            break
+
+        parts = line.split()
+        request_id = parts[0]
+        command = parts[1] if len(parts) > 1 else ""
+        if command == "set" and len(parts) > 2:
+            try:
+                response = f"{request_id} ok {map_brightness(int(parts[2]))}"
+            except ValueError:
+                response = f"{request_id} err invalid level '{parts[2]}'"
+        elif command == "ping":
+            response = f"{request_id} ok pong"
+        elif command == "crash":
+            sys.exit(int(parts[2]) if len(parts) > 2 else 1)
+        elif command == "noise" and len(parts) > 2:
+            for index in range(int(parts[2])):
+                sys.stderr.write(f"noise line {index} " + "x" * 60 + "\n")
+            response = f"{request_id} ok noise"
+        elif command == "hang":
+            while True:
+                time.sleep(3600)
+        else:
+            response = f"{request_id} err unknown command '{command}'"
+
+        sys.stdout.write(response + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
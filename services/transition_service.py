@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import threading
+import time
+
+from model.brightness import map_brightness
+
+EASING_FUNCTIONS = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: 1 - (1 - t) * (1 - t),
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+}
+
+
+def inverse_easing(easing, progress, iterations=30):
+    # Easing curves are monotonic on [0, 1], so bisection finds the time for a given progress
+    low, high = 0.0, 1.0
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        if easing(middle) < progress:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+class TransitionEngine:
+    # Defaults used when config.json has no "Transition" block
+    DEFAULT_DURATION_SECONDS = 60
+    DEFAULT_EASING = "ease_in_out"
+    DEFAULT_MAX_STEPS_PER_SECOND = 4
+
+    def __init__(self, backend, runtime, clock=time.monotonic):
+        self.backend = backend
+        # Ramps are coroutines on this async runtime; their writes go to its executor
+        self.runtime = runtime
+        self.clock = clock
+        self.duration = self.DEFAULT_DURATION_SECONDS
+        self.easing_name = self.DEFAULT_EASING
+        self.max_steps_per_second = self.DEFAULT_MAX_STEPS_PER_SECOND
+        # Last level actually sent to the backend, and the level the engine is heading to
+        self.current_level = None
+        self.target_level = None
+        self._lock = threading.Lock()
+        # Held around every backend write, so a cancelled ramp's step in flight can never
+        # land after the level that replaced it
+        self._write_lock = threading.Lock()
+        # Identifies the current ramp; a new ramp or an immediate level replaces it
+        self._ramp_token = None
+        self._future = None
+
+    def configure(self, transition_config):
+        self.duration = max(
+            float(transition_config.get("DurationSeconds", self.DEFAULT_DURATION_SECONDS)), 0
+        )
+        easing_name = transition_config.get("Easing", self.DEFAULT_EASING)
+        if easing_name not in EASING_FUNCTIONS:
+            logging.warning("Unknown easing '%s', using %s.", easing_name, self.DEFAULT_EASING)
+            easing_name = self.DEFAULT_EASING
+        self.easing_name = easing_name
+        self.max_steps_per_second = max(
+            float(
+                transition_config.get(
+                    "MaxStepsPerSecond", self.DEFAULT_MAX_STEPS_PER_SECOND
+                )
+            ),
+            0.1,
+        )
+
+    def quantize(self, level):
+        # Value the backend really sends for a level (SDR boost, raw backlight value, ...)
+        quantize = getattr(self.backend, "quantize", None)
+        return quantize(level) if quantize else map_brightness(level)
+
+    def plan_steps(self, from_level, to_level, duration=None, easing_name=None):
+        # Return [(offset_seconds, level)], one entry per distinct quantised brightness,
+        # thinned so that consecutive calls are at least 1 / max_steps_per_second apart
+        duration = self.duration if duration is None else duration
+        easing = EASING_FUNCTIONS[easing_name or self.easing_name]
+        if from_level == to_level:
+            return []
+        if duration <= 0:
+            return [(0.0, to_level)]
+
+        direction = 1 if to_level > from_level else -1
+        span = to_level - from_level
+        steps = []
+        last_mapped = self.quantize(from_level)
+        for level in range(from_level + direction, to_level + direction, direction):
+            mapped = self.quantize(level)
+            if mapped == last_mapped:
+                continue
+            last_mapped = mapped
+            offset = duration * inverse_easing(easing, (level - from_level) / span)
+            steps.append((offset, level))
+
+        # Always finish on the exact target level
+        if steps and steps[-1][1] != to_level:
+            steps[-1] = (steps[-1][0], to_level)
+        elif not steps:
+            steps.append((0.0, to_level))
+
+        min_interval = 1.0 / self.max_steps_per_second
+        planned = []
+        last_offset = None
+        index = 0
+        while index < len(steps):
+            offset = steps[index][0]
+            if last_offset is not None:
+                offset = max(offset, last_offset + min_interval)
+            # Skip straight to the furthest step that is already due at this time
+            while index + 1 < len(steps) and steps[index + 1][0] <= offset:
+                index += 1
+            planned.append((offset, steps[index][1]))
+            last_offset = offset
+            index += 1
+        return planned
+
+    def start_ramp(self, from_level, to_level):
+        # Start a ramp in the background; an active ramp is replaced and the new
+        # one starts from the last level actually applied
+        with self._lock:
+            if self._stop_active_ramp() and self.current_level is not None:
+                from_level = self.current_level
+            self.target_level = to_level
+            token = self._ramp_token = object()
+            self._future = self.runtime.submit(self.run_ramp(from_level, to_level, token))
+
+    def _stop_active_ramp(self):
+        # Cancel the running ramp, if any; returns True when one was active. Its task is
+        # cancelled at the next await, and a step already being written is dropped.
+        self._ramp_token = None
+        future, self._future = self._future, None
+        if future is None or future.done():
+            return False
+        future.cancel()
+        return True
+
+    async def run_ramp(self, from_level, to_level, token=None):
+        steps = self.plan_steps(from_level, to_level)
+        logging.info(
+            "Ramping brightness from %s to %s in %d steps.", from_level, to_level, len(steps)
+        )
+        start = self.clock()
+        for offset, level in steps:
+            delay = start + offset - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            applied = await self.runtime.run_blocking(self._write_step, level, token)
+            if applied is None:
+                logging.debug("Brightness ramp cancelled.")
+                return False
+            if not applied:
+                logging.error("Brightness ramp stopped: failed to apply level %s.", level)
+                # Let the caller retry the remaining part of the ramp
+                self.target_level = self.current_level
+                return False
+        return True
+
+    def _write_step(self, level, token):
+        # Runs on the runtime's executor; None when the ramp was replaced meanwhile
+        with self._write_lock:
+            if token is not self._ramp_token:
+                return None
+            if not self.backend.set_brightness(level):
+                return False
+            self.current_level = level
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self._stop_active_ramp()
+
+    def set_immediately(self, level):
+        # Jump straight to a level (startup, manual apply), cancelling any ramp in progress
+        with self._lock:
+            self._stop_active_ramp()
+            with self._write_lock:
+                if self.backend.set_brightness(level):
+                    self.current_level = level
+                    self.target_level = level
+                    return True
+                return False
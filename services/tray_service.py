@@ -1,71 +1,177 @@
+import logging
 import threading
-from PIL import Image, ImageDraw
-import pystray
+
+
+def _import_tray_modules():
+    # pystray and Pillow are only needed once the tray icon is created
+    import pystray
+    from PIL import Image, ImageDraw
+
+    return pystray, Image, ImageDraw
+
 
 class TrayService:
-    def __init__(self, show_window_callback, exit_app_callback, lang_strings):
+    ICON_SIZE = 64
+    # Brightness levels are rounded to this step, so at most 11 images are ever rendered
+    LEVEL_STEP = 10
+
+    def __init__(
+        self,
+        show_window_callback,
+        exit_app_callback,
+        lang_strings,
+        diagnostics_callback=None,
+    ):
         self.show_window_callback = show_window_callback
         self.exit_app_callback = exit_app_callback
+        self.diagnostics_callback = diagnostics_callback
         self.lang_strings = lang_strings
         self.tray_icon = None
         self.tray_thread = None
+        self.level = None
+        self.visible = True
+        self._image_cache = {}
+        # Scheduler whose applied levels the icon shows (see follow_scheduler)
+        self.scheduler_service = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def icon_image(self, level=None):
+        # Render the tray artwork once per (rounded) brightness level
+        if level is not None:
+            level = max(0, min(100, int(round(level / self.LEVEL_STEP) * self.LEVEL_STEP)))
+        image = self._image_cache.get(level)
+        if image is None:
+            _, Image, ImageDraw = _import_tray_modules()
+            image = Image.new("RGBA", (self.ICON_SIZE, self.ICON_SIZE), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(image)
+            if level is None:
+                fill = "yellow"
+            else:
+                # Dim levels get a darker sun, from dark gold at 0 to full yellow at 100
+                intensity = 0.4 + 0.6 * level / 100
+                fill = (int(255 * intensity), int(255 * intensity), 0, 255)
+            draw.ellipse((8, 8, 56, 56), fill=fill, outline="orange", width=3)
+            self._image_cache[level] = image
+        return image
+
+    def icon_title(self):
+        title = self.lang_strings.get("MSG_04", "Brightness Control")
+        if self.level is not None:
+            title = f"{title} ({self.level}%)"
+        return title
 
     def create_tray_icon(self):
-        self.destroy_tray_icon()
-
-        image = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
-        draw.ellipse((8, 8, 56, 56), fill="yellow", outline="orange", width=3)
-
-        icon_text = self.lang_strings.get("MSG_04", "Brightness Control")
-
-        menu = pystray.Menu(
-            pystray.MenuItem(
-                self.lang_strings.get("MSG_12", "Open"),
-                lambda icon, item: self.on_menu_item_click('open'),
-                default=True
-            ),
-            pystray.MenuItem(
-                self.lang_strings.get("MSG_13", "Exit"),
-                lambda icon, item: self.on_menu_item_click('exit')
+        # The icon is created and its thread started once; later calls only make it visible
+        with self._lock:
+            if self.tray_icon is not None:
+                self.set_tray_icon_visibility(True)
+                return
+
+            pystray, _, _ = _import_tray_modules()
+            menu_items = [
+                pystray.MenuItem(
+                    lambda item: self.lang_strings.get("MSG_12", "Open"),
+                    lambda icon, item: self.on_menu_item_click("open"),
+                    default=True,
+                ),
+            ]
+            if self.diagnostics_callback:
+                menu_items.append(
+                    pystray.MenuItem(
+                        lambda item: self.lang_strings.get("MSG_30", "Diagnostics"),
+                        lambda icon, item: self.on_menu_item_click("diagnostics"),
+                    )
+                )
+            menu_items.append(
+                pystray.MenuItem(
+                    lambda item: self.lang_strings.get("MSG_13", "Exit"),
+                    lambda icon, item: self.on_menu_item_click("exit"),
+                )
+            )
+            menu = pystray.Menu(*menu_items)
+            self.tray_icon = pystray.Icon(
+                "BrightnessControl",
+                self.icon_image(self.level),
+                self.icon_title(),
+                menu=menu,
             )
-        )
+            self.tray_thread = threading.Thread(
+                target=self.tray_icon.run, args=(self._on_icon_ready,), daemon=True
+            )
+            self.tray_thread.start()
+
+    def _on_icon_ready(self, icon):
+        # Runs on the tray thread once the icon exists; apply the visibility requested so far
+        icon.visible = self.visible
+        self._ready.set()
 
-        self.tray_icon = pystray.Icon(icon_text, image, icon_text, menu=menu)
+    def follow_scheduler(self, scheduler_service):
+        # Show every level the scheduler applies to its first display, ramp steps included
+        self.scheduler_service = scheduler_service
+        scheduler_service.subscribe(self.on_brightness_event)
 
-        self.tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
-        self.tray_thread.start()
+    def on_brightness_event(self, event):
+        # Called on the thread that wrote the level
+        if event["event"] != "brightness_applied" or self.scheduler_service is None:
+            return
+        primary = next(iter(self.scheduler_service.levels()), None)
+        if event["display"] == primary:
+            self.set_level(event["level"])
 
     def destroy_tray_icon(self):
-        if self.tray_icon:
-            # Remove tray icon visibility to avoid interaction
-            self.tray_icon.visible = False
-            self.tray_icon.stop()
-            self.tray_icon = None
-            # Do not join if we are on the same thread to avoid RuntimeError
-            if threading.current_thread() != self.tray_thread and self.tray_thread.is_alive():
-                self.tray_thread.join(timeout=1)
-            self.tray_thread = None
+        if self.scheduler_service is not None:
+            self.scheduler_service.unsubscribe(self.on_brightness_event)
+            self.scheduler_service = None
+        with self._lock:
+            if self.tray_icon:
+                self.tray_icon.visible = False
+                # stop() makes run() return; the daemon thread is not joined
+                self.tray_icon.stop()
+                self.tray_icon = None
+                self.tray_thread = None
+                self._ready.clear()
 
     def hide_tray_icon(self):
-        if self.tray_icon:
-            self.tray_icon.visible = False
+        self.set_tray_icon_visibility(False)
 
     def show_tray_icon(self):
-        if self.tray_icon:
-            self.tray_icon.visible = True
+        # The icon, and with it pystray and Pillow, is only created the first time it is shown
+        if self.tray_icon is None:
+            self.visible = True
+            self.create_tray_icon()
+        else:
+            self.set_tray_icon_visibility(True)
+
+    def set_tray_icon_visibility(self, visible):
+        self.visible = visible
+        if self.tray_icon and self._ready.is_set() and self.tray_icon.visible != visible:
+            self.tray_icon.visible = visible
 
     def update_tray_icon(self, lang_strings):
+        # Refresh title and menu texts in place
         self.lang_strings = lang_strings
-        self.create_tray_icon()
+        if self.tray_icon:
+            self.tray_icon.title = self.icon_title()
+            self.tray_icon.update_menu()
+
+    def set_level(self, level):
+        # Show the current brightness level in the icon artwork and tooltip
+        if level == self.level:
+            return
+        self.level = level
+        if self.tray_icon:
+            try:
+                self.tray_icon.icon = self.icon_image(level)
+                self.tray_icon.title = self.icon_title()
+            except Exception as e:
+                logging.error(f"Failed to update tray icon: {e}")
 
     def on_menu_item_click(self, action):
-        if action == 'open':
+        if action == "open":
             self.show_window_callback()
             self.hide_tray_icon()
-        elif action == 'exit':
+        elif action == "diagnostics":
+            self.diagnostics_callback()
+        elif action == "exit":
             self.exit_app_callback()
-
-    def set_tray_icon_visibility(self, visible):
-        if self.tray_icon:
-            self.tray_icon.visible = visible
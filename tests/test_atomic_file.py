@@ -0,0 +1,49 @@
+# tests/test_atomic_file.py
+
+import os
+import stat
+import tempfile
+import unittest
+
+from model.atomic_file import atomic_write
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@unittest.skipIf(os.name == "nt", "POSIX permission bits")
+class AtomicWriteTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "config.json")
+        self.umask = os.umask(0o022)
+
+    def tearDown(self):
+        os.umask(self.umask)
+        self.temp_dir.cleanup()
+
+    def test_existing_file_keeps_its_mode(self):
+        with open(self.path, "w") as config_file:
+            config_file.write("{}")
+        os.chmod(self.path, 0o644)
+        atomic_write(self.path, '{"Language": "EN"}')
+        self.assertEqual(file_mode(self.path), 0o644)
+        with open(self.path) as config_file:
+            self.assertEqual(config_file.read(), '{"Language": "EN"}')
+
+    def test_new_file_follows_the_umask(self):
+        atomic_write(self.path, "{}")
+        self.assertEqual(file_mode(self.path), 0o644)
+
+    def test_explicit_mode(self):
+        atomic_write(self.path, "{}", mode=0o600)
+        self.assertEqual(file_mode(self.path), 0o600)
+
+    def test_no_temporary_file_left(self):
+        atomic_write(self.path, "{}")
+        self.assertEqual(os.listdir(self.temp_dir.name), ["config.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
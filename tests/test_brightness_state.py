@@ -0,0 +1,75 @@
+# tests/test_brightness_state.py
+
+import os
+import tempfile
+import unittest
+
+from services.brightness_backend import RecordingBackend, SysfsBacklightBackend
+from services.brightness_state import BrightnessStateTracker
+
+
+def make_backlight(root, name, max_brightness):
+    device = os.path.join(root, name)
+    os.makedirs(device)
+    for file_name, value in (("max_brightness", max_brightness), ("brightness", 0)):
+        with open(os.path.join(device, file_name), "w") as sysfs_file:
+            sysfs_file.write(str(value))
+
+
+def read_backlight(root, name):
+    with open(os.path.join(root, name, "brightness")) as sysfs_file:
+        return int(sysfs_file.read())
+
+
+class SysfsDeduplicationTest(unittest.TestCase):
+    # The sysfs backend takes the level as a raw backlight value, not an SDR boost, so
+    # levels that share a boost must still reach the hardware
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_consecutive_levels_are_written(self):
+        make_backlight(self.root, "panel", 100)
+        tracker = BrightnessStateTracker(SysfsBacklightBackend(root=self.root))
+        for level in (11, 12, 13):
+            self.assertTrue(tracker.set_brightness(level))
+            self.assertEqual(read_backlight(self.root, "panel"), level)
+        self.assertEqual(tracker.stats()["applied"], 3)
+        self.assertEqual(tracker.stats()["suppressed"], 0)
+
+    def test_levels_with_the_same_raw_value_are_suppressed(self):
+        # 10 hardware steps: levels 11 and 12 both write raw value 1
+        make_backlight(self.root, "panel", 10)
+        tracker = BrightnessStateTracker(SysfsBacklightBackend(root=self.root))
+        self.assertTrue(tracker.set_brightness(11))
+        self.assertTrue(tracker.set_brightness(12))
+        self.assertEqual(read_backlight(self.root, "panel"), 1)
+        self.assertEqual(tracker.stats(), {"applied": 1, "suppressed": 1, "external_changes": 0})
+
+    def test_external_change_is_rewritten(self):
+        make_backlight(self.root, "panel", 100)
+        tracker = BrightnessStateTracker(SysfsBacklightBackend(root=self.root))
+        tracker.set_brightness(40)
+        with open(os.path.join(self.root, "panel", "brightness"), "w") as sysfs_file:
+            sysfs_file.write("70")
+        self.assertTrue(tracker.set_brightness(40))
+        self.assertEqual(read_backlight(self.root, "panel"), 40)
+        self.assertEqual(tracker.stats()["external_changes"], 1)
+
+
+class RawLevelBackendTest(unittest.TestCase):
+    def test_identity_quantization_keeps_every_level(self):
+        backend = RecordingBackend()
+        tracker = BrightnessStateTracker(backend)
+        for level in (11, 12, 12, 13):
+            tracker.set_brightness(level)
+        self.assertEqual([level for level, _ in backend.calls], [11, 12, 13])
+        self.assertEqual(tracker.stats()["suppressed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# tests/test_compiled_schedule.py
+
+import unittest
+from datetime import datetime
+
+from model.compiled_schedule import CompiledSchedule
+from model.config_validation import schedule_errors, validate_config
+
+SCHEDULE = {
+    "MorningStart": 6,
+    "MorningEnd": 11,
+    "AfternoonStart": 11,
+    "AfternoonEnd": 17,
+    "EveningStart": 17,
+    "EveningEnd": 22,
+    "NightStart": 22,
+    "NightEnd": 6,
+}
+LEVEL_ERROR = "Brightness level for B1 must be between 0 and 100: 99999"
+
+
+class OutOfRangeLevelTest(unittest.TestCase):
+    def levels(self, **changes):
+        levels = {"B1": 30, "B2": 40, "B3": 15, "B4": 10}
+        levels.update(changes)
+        return levels
+
+    def test_level_too_large_for_the_table_is_an_error(self):
+        compiled = CompiledSchedule(SCHEDULE, self.levels(B1=99999))
+
+        self.assertIn(LEVEL_ERROR, compiled.errors)
+        self.assertIsNone(compiled.level_at(datetime(2026, 1, 1, 8, 0)))
+        self.assertEqual(compiled.level_at(datetime(2026, 1, 1, 12, 0)), 40)
+
+    def test_schedule_errors_report_the_level(self):
+        self.assertEqual(schedule_errors(SCHEDULE, self.levels(B1=99999)), [LEVEL_ERROR])
+
+    def test_validate_config_lists_the_level_once(self):
+        problems = validate_config(
+            {"Schedule": SCHEDULE, "BrightnessLevels": self.levels(B1=99999)}
+        )
+
+        self.assertEqual(problems, {"Schedule": [LEVEL_ERROR]})
+
+    def test_negative_level_is_an_error(self):
+        compiled = CompiledSchedule(SCHEDULE, self.levels(B2=-5))
+
+        self.assertFalse(compiled.is_valid)
+        self.assertIsNone(compiled.level_at(datetime(2026, 1, 1, 12, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
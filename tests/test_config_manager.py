@@ -0,0 +1,68 @@
+# tests/test_config_manager.py
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from model.data_model import ConfigManager
+
+
+class ConfigManagerUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.previous_cwd = os.getcwd()
+        os.makedirs(os.path.join(self.temp_dir.name, "data"))
+        with open(os.path.join(self.temp_dir.name, "data", "config.json"), "w") as config_file:
+            json.dump({"Language": "EN", "SaveDebounceSeconds": 0, "Counter": 0}, config_file)
+        os.chdir(self.temp_dir.name)
+        self.config_manager = ConfigManager()
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.temp_dir.cleanup()
+
+    def read_file(self):
+        with open(self.config_manager.CONFIG_PATH) as config_file:
+            return json.load(config_file)
+
+    def test_concurrent_updates_are_not_lost(self):
+        def increment(config):
+            config["Counter"] += 1
+
+        def worker():
+            for _ in range(25):
+                self.config_manager.update(increment)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.config_manager.load_config()["Counter"], 200)
+        self.assertEqual(self.read_file()["Counter"], 200)
+
+    def test_failed_update_changes_nothing(self):
+        def fail(config):
+            config["Counter"] = 99
+            raise ValueError("rejected")
+
+        with self.assertRaises(ValueError):
+            self.config_manager.update(fail)
+        self.assertEqual(self.config_manager.config["Counter"], 0)
+        self.assertEqual(self.read_file()["Counter"], 0)
+
+    def test_update_applies_to_external_edits(self):
+        # An edit made on disk since the last read is not overwritten by the update
+        config = self.read_file()
+        config["Language"] = "PT"
+        with open(self.config_manager.CONFIG_PATH, "w") as config_file:
+            json.dump(config, config_file)
+        os.utime(self.config_manager.CONFIG_PATH, ns=(1, 1))
+        self.config_manager.update(lambda config: config.update(Counter=5))
+        self.assertEqual(self.read_file(), dict(config, Counter=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# tests/test_process_supervisor.py
+
+import os
+import sys
+import time
+import unittest
+
+from services.powershell_service import PowerShellService
+from services.process_supervisor import (
+    STATE_BACKOFF,
+    STATE_CIRCUIT_OPEN,
+    STATE_RUNNING,
+    ProcessSupervisor,
+)
+from services.runtime import AsyncRuntime
+
+STUB_WORKER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services", "stub_worker.py"
+)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class BackoffTest(unittest.TestCase):
+    def supervisor(self, jitter):
+        return ProcessSupervisor(
+            "worker", [], runtime=AsyncRuntime(), random_source=lambda: jitter
+        )
+
+    def test_delay_doubles_up_to_the_maximum(self):
+        supervisor = self.supervisor(0.5)
+
+        delays = [supervisor.backoff_delay(failures) for failures in range(1, 9)]
+
+        self.assertEqual(delays, [0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0])
+
+    def test_jitter_spreads_the_delay(self):
+        self.assertAlmostEqual(self.supervisor(0.0).backoff_delay(2), 0.8)
+        self.assertAlmostEqual(self.supervisor(1.0).backoff_delay(2), 1.2)
+
+
+class SupervisorTest(unittest.TestCase):
+    # Runs the supervisor and PowerShellService against services/stub_worker.py
+
+    def setUp(self):
+        self.runtime = AsyncRuntime(name="test-runtime").start()
+        self.services = []
+
+    def tearDown(self):
+        for service in self.services:
+            service.stop_powershell()
+        self.runtime.stop()
+
+    def service(self, *worker_args):
+        service = PowerShellService(
+            "adjust_brightness.ps1",
+            command=[sys.executable, STUB_WORKER, *worker_args],
+            runtime=self.runtime,
+        )
+        supervisor = service.supervisor
+        supervisor.INITIAL_BACKOFF_SECONDS = 0.05
+        supervisor.CRASH_LOOP_THRESHOLD = 3
+        supervisor.CIRCUIT_OPEN_SECONDS = 60
+        self.services.append(service)
+        return service
+
+    def test_crashed_worker_is_restarted_after_a_backoff(self):
+        service = self.service()
+        self.assertTrue(service.set_brightness(50))
+
+        self.assertEqual(service.send_command("crash 7"), (False, "worker exited"))
+        self.assertTrue(
+            wait_for(lambda: service.supervisor.state in (STATE_BACKOFF, STATE_RUNNING))
+        )
+        self.assertTrue(service.set_brightness(60))
+
+        metrics = service.metrics()
+        self.assertEqual(metrics["state"], STATE_RUNNING)
+        self.assertEqual(metrics["crashes"], 1)
+        self.assertEqual(metrics["restarts"], 1)
+        self.assertEqual(metrics["starts"], 2)
+        self.assertEqual(metrics["last_exit_code"], 7)
+
+    def test_crash_loop_opens_the_circuit(self):
+        service = self.service("--crash-on-start", "3")
+
+        self.assertFalse(service.set_brightness(50))
+        self.assertTrue(wait_for(lambda: service.supervisor.state == STATE_CIRCUIT_OPEN))
+
+        metrics = service.metrics()
+        self.assertEqual(metrics["crashes"], 3)
+        self.assertEqual(metrics["circuit_opened"], 1)
+        self.assertEqual(metrics["last_exit_code"], 3)
+        self.assertGreater(metrics["next_start_in_seconds"], 50)
+        # Requests fail at once while the circuit is open
+        started = time.monotonic()
+        self.assertEqual(
+            service.send_command("set 50"), (False, "worker crashing repeatedly")
+        )
+        self.assertFalse(service.set_brightness(50))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_reset_circuit_allows_a_trial_start(self):
+        service = self.service("--crash-on-start", "3")
+        service.send_command("ping", timeout=5)
+        self.assertTrue(wait_for(lambda: service.supervisor.state == STATE_CIRCUIT_OPEN))
+
+        service.supervisor.reset_circuit()
+
+        self.assertTrue(wait_for(lambda: service.metrics()["starts"] > 3))
+        # The trial start crashed again, which reopens the circuit straight away
+        self.assertTrue(wait_for(lambda: service.supervisor.state == STATE_CIRCUIT_OPEN))
+        self.assertEqual(service.metrics()["circuit_opened"], 2)
+
+    def test_hung_worker_times_out_and_is_restarted(self):
+        service = self.service()
+        self.assertTrue(service.set_brightness(50))
+
+        self.assertEqual(service.send_command("hang", timeout=0.5), (False, "timeout"))
+        self.assertEqual(service.send_command("ping", timeout=0.3), (False, "timeout"))
+        service.supervisor.restart()
+
+        self.assertTrue(service.set_brightness(40))
+        metrics = service.metrics()
+        self.assertEqual(metrics["restarts"], 1)
+        self.assertEqual(metrics["starts"], 2)
+
+    def test_stderr_is_drained_while_the_worker_writes(self):
+        service = self.service()
+
+        # Far more than a pipe buffer holds; an undrained stderr would block the worker
+        self.assertEqual(service.send_command("noise 5000", timeout=10), (True, "noise"))
+        self.assertTrue(service.set_brightness(30))
+        self.assertEqual(service.metrics()["crashes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+# tests/test_scheduler_service.py
+
+import copy
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from services.brightness_backend import FakeMultiDisplayBackend, RecordingBackend
+from services.runtime import AsyncRuntime
+from services.scheduler_service import SchedulerService
+
+SCHEDULE = {
+    "MorningStart": 6,
+    "MorningEnd": 11,
+    "AfternoonStart": 11,
+    "AfternoonEnd": 17,
+    "EveningStart": 17,
+    "EveningEnd": 22,
+    "NightStart": 22,
+    "NightEnd": 6,
+}
+LEVELS = {"B1": 30, "B2": 40, "B3": 15, "B4": 10}
+
+
+class FakeConfigManager:
+    def __init__(self, config):
+        self.config = config
+        self.subscribers = []
+
+    def load_config(self):
+        return copy.deepcopy(self.config)
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+
+class MultiDisplayTest(unittest.TestCase):
+    def setUp(self):
+        self.runtime = AsyncRuntime(name="test-runtime").start()
+
+    def tearDown(self):
+        self.runtime.stop()
+
+    def scheduler(self, config, backend):
+        return SchedulerService(
+            FakeConfigManager(config),
+            backend,
+            clock=lambda: datetime(2026, 3, 2, 12, 0),
+            runtime=self.runtime,
+        )
+
+    def test_every_display_is_applied_in_one_pass(self):
+        backend = FakeMultiDisplayBackend(("LEFT", "CENTER", "RIGHT"), latency=0.2)
+        config = {
+            "Schedule": SCHEDULE,
+            "BrightnessLevels": LEVELS,
+            "Displays": [
+                {"Id": "LEFT", "BrightnessLevels": dict(LEVELS, B2=55)},
+                {"Id": "CENTER"},
+                {"Id": "RIGHT", "BrightnessLevels": dict(LEVELS, B2=70)},
+            ],
+        }
+        scheduler = self.scheduler(config, backend)
+
+        scheduler.apply_now()
+
+        self.assertEqual(scheduler.levels(), {"LEFT": 55, "CENTER": 40, "RIGHT": 70})
+        self.assertEqual(
+            sorted((display, level) for display, level, _, _, _ in backend.calls),
+            [("CENTER", 40), ("LEFT", 55), ("RIGHT", 70)],
+        )
+        # Written side by side: every call started before the first one finished
+        first_finished = min(finished for _, _, _, finished, _ in backend.calls)
+        self.assertTrue(all(started < first_finished for _, _, started, _, _ in backend.calls))
+        self.assertEqual(len({thread for _, _, _, _, thread in backend.calls}), 3)
+
+    def test_levels_can_be_read_while_displays_change(self):
+        backend = FakeMultiDisplayBackend([f"D{index}" for index in range(40)])
+        config = {"Schedule": SCHEDULE, "BrightnessLevels": LEVELS}
+        scheduler = self.scheduler(config, backend)
+        errors = []
+        done = threading.Event()
+
+        def read_levels():
+            while not done.is_set():
+                try:
+                    scheduler.levels()
+                except RuntimeError as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read_levels)
+        reader.start()
+        try:
+            for round_number in range(20):
+                count = 40 if round_number % 2 else 1
+                config["Displays"] = [{"Id": f"D{index}"} for index in range(count)]
+                scheduler.apply_now()
+                self.assertEqual(len(scheduler.levels()), count)
+        finally:
+            done.set()
+            reader.join()
+        self.assertEqual(errors, [])
+
+
+class EditDuringPassConfigManager(FakeConfigManager):
+    # The first read returns the configuration as it was, then an edit lands and is
+    # notified while the scheduler's pass is still running
+    def __init__(self, config, edit):
+        super().__init__(config)
+        self.edit = edit
+
+    def load_config(self):
+        config = super().load_config()
+        if self.edit:
+            self.edit(self.config)
+            self.edit = None
+            for callback in list(self.subscribers):
+                callback(self.load_config())
+        return config
+
+
+class SchedulerLoopTest(unittest.TestCase):
+    # The scheduler's own loop, with a clock that starts at a chosen time and then
+    # follows real time, against a backend that records every call
+
+    def setUp(self):
+        self.runtime = AsyncRuntime(name="test-runtime").start()
+        self.backend = RecordingBackend(clock=time.monotonic)
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler:
+            self.scheduler.stop()
+        self.runtime.stop()
+
+    def start(self, config_manager, start_at):
+        started = time.monotonic()
+        self.started = started
+        self.scheduler = SchedulerService(
+            config_manager,
+            self.backend,
+            clock=lambda: start_at + timedelta(seconds=time.monotonic() - started),
+            runtime=self.runtime,
+        )
+        self.scheduler.start()
+        self.assertTrue(self.scheduler.first_pass_done.wait(5))
+
+    def levels(self):
+        return [level for level, _ in self.backend.calls]
+
+    def wait_for_level(self, level, timeout=3):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.backend.calls and self.backend.calls[-1][0] == level:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def config(self, duration):
+        return {
+            "Schedule": SCHEDULE,
+            "BrightnessLevels": dict(LEVELS),
+            "Transition": {"DurationSeconds": duration},
+        }
+
+    def test_wakes_up_at_the_next_boundary(self):
+        self.start(
+            FakeConfigManager(self.config(0)), datetime(2026, 3, 2, 10, 59, 59, 700000)
+        )
+
+        self.assertEqual(self.levels(), [30])
+        self.assertEqual(self.scheduler.next_boundary_time, datetime(2026, 3, 2, 11, 0))
+        self.assertTrue(self.wait_for_level(40))
+
+        self.assertEqual(self.levels(), [30, 40])
+        self.assertGreaterEqual(self.backend.calls[1][1] - self.started, 0.25)
+        self.assertEqual(self.scheduler.next_boundary_time, datetime(2026, 3, 2, 17, 0))
+
+    def test_config_change_is_applied_at_once(self):
+        config_manager = FakeConfigManager(self.config(60))
+        self.start(config_manager, datetime(2026, 3, 2, 12, 0))
+
+        config_manager.config["BrightnessLevels"]["B2"] = 80
+        for callback in list(config_manager.subscribers):
+            callback(config_manager.load_config())
+
+        # No ramp: the new level is written in a single call
+        self.assertTrue(self.wait_for_level(80))
+        self.assertEqual(self.levels(), [40, 80])
+
+    def test_change_notified_during_a_pass_is_not_lost(self):
+        def edit(config):
+            config["BrightnessLevels"]["B2"] = 80
+
+        self.start(
+            EditDuringPassConfigManager(self.config(60), edit), datetime(2026, 3, 2, 12, 0)
+        )
+
+        self.assertTrue(self.wait_for_level(80))
+        self.assertEqual(self.levels(), [40, 80])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+# tests/test_transition_engine.py
+
+import time
+import unittest
+
+from model.brightness import map_brightness
+from services.brightness_backend import RecordingBackend
+from services.runtime import AsyncRuntime
+from services.transition_service import TransitionEngine
+
+
+class SdrRecordingBackend(RecordingBackend):
+    # Sends the SDR boost like the DWM and PowerShell backends: two levels can share a value
+    def quantize(self, level, display=None):
+        return map_brightness(level)
+
+
+class PlanStepsTest(unittest.TestCase):
+    def engine(self, backend=None, **transition):
+        engine = TransitionEngine(backend or RecordingBackend(), None)
+        engine.configure(transition)
+        return engine
+
+    def test_levels_of_a_one_second_ramp(self):
+        engine = self.engine(DurationSeconds=1, MaxStepsPerSecond=10)
+
+        levels = [level for _, level in engine.plan_steps(40, 10)]
+
+        self.assertEqual(levels, [39, 37, 34, 30, 25, 21, 17, 13, 11, 10])
+
+    def test_steps_respect_the_rate_cap(self):
+        engine = self.engine(DurationSeconds=1, MaxStepsPerSecond=4)
+
+        offsets = [offset for offset, _ in engine.plan_steps(0, 100)]
+
+        for earlier, later in zip(offsets, offsets[1:]):
+            self.assertGreaterEqual(later - earlier, 0.25 - 1e-9)
+        self.assertLessEqual(len(offsets), 6)
+
+    def test_levels_with_the_same_quantised_value_are_skipped(self):
+        engine = self.engine(
+            SdrRecordingBackend(), DurationSeconds=1, MaxStepsPerSecond=1000, Easing="linear"
+        )
+
+        levels = [0] + [level for _, level in engine.plan_steps(0, 10)]
+
+        self.assertEqual(levels[-1], 10)
+        self.assertLess(len(levels), 11)
+        mapped = [map_brightness(level) for level in levels]
+        self.assertEqual(len(mapped), len(set(mapped)))
+
+    def test_no_duration_jumps_to_the_target(self):
+        engine = self.engine(DurationSeconds=0)
+
+        self.assertEqual(engine.plan_steps(40, 10), [(0.0, 10)])
+        self.assertEqual(engine.plan_steps(10, 10), [])
+
+
+class RampTest(unittest.TestCase):
+    def setUp(self):
+        self.runtime = AsyncRuntime(name="test-runtime").start()
+        self.backend = RecordingBackend()
+        self.engine = TransitionEngine(self.backend, self.runtime)
+
+    def tearDown(self):
+        self.runtime.stop()
+
+    def levels(self):
+        return [level for level, _ in self.backend.calls]
+
+    def wait_for_level(self, level, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.engine.current_level != level and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_ramp_sends_the_planned_levels_in_order(self):
+        self.engine.configure({"DurationSeconds": 1, "MaxStepsPerSecond": 10})
+        self.engine.set_immediately(40)
+
+        self.assertTrue(self.runtime.run(self.engine.run_ramp(40, 10), timeout=5))
+
+        self.assertEqual(self.levels(), [40, 39, 37, 34, 30, 25, 21, 17, 13, 11, 10])
+        self.assertEqual(self.engine.current_level, 10)
+
+    def test_steps_are_spaced_by_the_rate_cap(self):
+        self.engine.configure({"DurationSeconds": 0.5, "MaxStepsPerSecond": 10})
+        self.engine.set_immediately(0)
+
+        self.runtime.run(self.engine.run_ramp(0, 100), timeout=5)
+
+        times = [called_at for _, called_at in self.backend.calls[1:]]
+        for earlier, later in zip(times, times[1:]):
+            self.assertGreaterEqual(later - earlier, 0.09)
+
+    def test_new_target_continues_from_the_level_reached(self):
+        self.engine.configure({"DurationSeconds": 1, "MaxStepsPerSecond": 10})
+        self.engine.set_immediately(40)
+        self.engine.start_ramp(40, 10)
+        time.sleep(0.45)
+
+        self.engine.start_ramp(10, 60)
+        self.wait_for_level(60)
+
+        levels = self.levels()
+        turn = levels.index(min(levels))
+        # Down until the new target arrived, then straight up from there: the first ramp
+        # never finished and sent nothing after it was replaced
+        self.assertGreater(min(levels), 10)
+        self.assertEqual(levels[: turn + 1], sorted(levels[: turn + 1], reverse=True))
+        self.assertEqual(levels[turn:], sorted(levels[turn:]))
+        self.assertEqual(levels[-1], 60)
+        self.assertEqual(self.engine.target_level, 60)
+
+    def test_immediate_level_cancels_the_ramp(self):
+        self.engine.configure({"DurationSeconds": 0.5, "MaxStepsPerSecond": 20})
+        self.engine.set_immediately(0)
+        self.engine.start_ramp(0, 100)
+        time.sleep(0.15)
+
+        self.assertTrue(self.engine.set_immediately(5))
+        time.sleep(0.5)
+
+        self.assertEqual(self.levels()[-1], 5)
+        self.assertEqual(self.engine.current_level, 5)
+        self.assertEqual(self.engine.target_level, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_tray_service.py
+
+import unittest
+
+from services.tray_service import TrayService
+
+
+class FakeScheduler:
+    def __init__(self, levels):
+        self.current_levels = levels
+        self.subscribers = []
+
+    def levels(self):
+        return dict(self.current_levels)
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def publish(self, display, level, event="brightness_applied"):
+        for callback in list(self.subscribers):
+            callback({"event": event, "display": display, "level": level, "time": ""})
+
+
+class TrayLevelTest(unittest.TestCase):
+    def setUp(self):
+        # The icon itself is never created, so pystray and Pillow are not needed
+        self.tray_service = TrayService(lambda: None, lambda: None, {})
+        self.scheduler = FakeScheduler({"LEFT": 30, "RIGHT": 50})
+        self.tray_service.follow_scheduler(self.scheduler)
+
+    def test_follows_levels_applied_to_the_first_display(self):
+        for level in (31, 32, 35):
+            self.scheduler.publish("LEFT", level)
+
+        self.assertEqual(self.tray_service.level, 35)
+        self.assertEqual(self.tray_service.icon_title(), "Brightness Control (35%)")
+
+    def test_ignores_other_displays_and_failures(self):
+        self.scheduler.publish("LEFT", 40)
+        self.scheduler.publish("RIGHT", 90)
+        self.scheduler.publish("LEFT", 10, event="brightness_failed")
+
+        self.assertEqual(self.tray_service.level, 40)
+
+    def test_destroy_stops_following(self):
+        self.tray_service.destroy_tray_icon()
+        self.scheduler.publish("LEFT", 70)
+
+        self.assertEqual(self.scheduler.subscribers, [])
+        self.assertIsNone(self.tray_service.level)
+
+
+if __name__ == "__main__":
+    unittest.main()
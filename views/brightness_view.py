@@ -1,8 +1,15 @@
+from datetime import datetime
+from model.schedule_model import ScheduleModel
 from views.view_helper import ViewHelper
 import tkinter as tk
 
+ACTIVE_PERIOD_COLOR = "#FFD700"
+
 
 class BrightnessView:
+    ROW_START_Y = 60
+    ROW_HEIGHT = 40
+
     def __init__(self, lang_strings, root, controller):
         self.window = root
         self.helper = ViewHelper(self.window)
@@ -11,15 +18,31 @@ class BrightnessView:
         self.lang_strings = lang_strings
         self.controller = controller
         self.widgets_to_update = {}
+        self.highlight_job = None
+        self.rows_bottom = self.ROW_START_Y
+        # Period rows by key: {"label", "entry", "label_text", "value", "y_pos"}
+        self.rows = {}
+        self.brightness_levels = {}
+        self.schedule = {}
+        # Name of the active schedule profile (None when config.json defines no profiles)
+        self.profile = None
+        self.profile_label = None
+        # Changes queued for the next idle callback
+        self.pending_update = {}
+        self.update_job = None
 
         # Setup the window
         self.helper.setup_window(width=320, height=300, bg_color="#2E2E2E")
 
     def create_widgets(self, brightness_levels, schedule):
+        self.brightness_levels = brightness_levels
+        self.schedule = schedule
         self.create_title()
+        self.create_profile_label()
         self.create_separator()
         self.create_brightness_inputs(brightness_levels, schedule)
         self.create_buttons()
+        self.layout()
 
     def create_title(self):
         # Create title label
@@ -33,108 +56,193 @@ class BrightnessView:
         )
         self.widgets_to_update["title_label"] = self.title_label
 
+    def create_profile_label(self):
+        # Small caption under the title naming the profile whose levels are shown
+        self.profile_label = self.helper.create_label(
+            text="",
+            x=20,
+            y=33,
+            font=("Segoe UI", 8),
+            bg="#2E2E2E",
+            fg="#AAAAAA",
+        )
+        self.widgets_to_update["profile_label"] = self.profile_label
+        self.update_profile_label(self.controller.profile)
+
+    def update_profile_label(self, profile):
+        self.profile = profile
+        text = ""
+        if profile is not None:
+            text = self.lang_strings.get("MSG_35", "Profile: {name}").format(
+                name=self.controller.profile_display_name(profile)
+            )
+        if self.profile_label.cget("text") != text:
+            self.profile_label.config(text=text)
+
     def create_separator(self):
         # Create a separator
         self.helper.create_separator(x=20, y=50, width=280, height=2, bg="#444444")
 
     def create_brightness_inputs(self, brightness_levels, schedule):
-        # Define brightness periods with time schedules
-        periods = [
-            {
-                "label_key": "MSG_20",
-                "default_name": "Morning",
-                "key": "B1",
-                "start_key": "MorningStart",
-                "end_key": "MorningEnd",
-                "y_pos": 60,
-            },
-            {
-                "label_key": "MSG_21",
-                "default_name": "Afternoon",
-                "key": "B2",
-                "start_key": "AfternoonStart",
-                "end_key": "AfternoonEnd",
-                "y_pos": 100,
-            },
-            {
-                "label_key": "MSG_22",
-                "default_name": "Evening",
-                "key": "B3",
-                "start_key": "EveningStart",
-                "end_key": "EveningEnd",
-                "y_pos": 140,
-            },
-            {
-                "label_key": "MSG_23",
-                "default_name": "Night",
-                "key": "B4",
-                "start_key": "NightStart",
-                "end_key": "NightEnd",
-                "y_pos": 180,
-            },
-        ]
-
-        for period in periods:
-            self.create_brightness_input(period, brightness_levels, schedule)
-
-    def create_brightness_input(self, period, brightness_levels, schedule):
-        # Set period name and time range
-        period_name = self.lang_strings.get(period["label_key"], period["default_name"])
-        start_time = schedule.get(period["start_key"], "")
-        end_time = schedule.get(period["end_key"], "")
-
-        label_text = self.format_period_label(period_name, start_time, end_time)
+        # One row per schedule period, whatever the number of periods
+        self.sync_rows(brightness_levels, schedule)
+
+    def sync_rows(self, brightness_levels, schedule):
+        # Reconcile the period rows with the schedule: existing widgets are kept and only
+        # reconfigured where their text, value or position changed
+        self.schedule_model = ScheduleModel.from_schedule(schedule)
+        entries = {}
+        for index, period in enumerate(self.schedule_model.periods):
+            y_pos = self.ROW_START_Y + self.ROW_HEIGHT * index
+            label_text = self.format_period_label(
+                period.display_name(self.lang_strings), period.start, period.end
+            )
+            value = str(brightness_levels.get(period.key, ""))
+            row = self.rows.get(period.key)
+            if row is None:
+                row = self.create_brightness_input(period.key, label_text, value, y_pos)
+            else:
+                self.update_brightness_input(row, label_text, value, y_pos)
+            entries[period.key] = row["entry"]
+
+        # Drop the rows of periods that no longer exist
+        for key in [key for key in self.rows if key not in entries]:
+            row = self.rows.pop(key)
+            row["label"].destroy()
+            row["entry"].destroy()
+            self.widgets_to_update.pop(f"label_{key}", None)
+
+        rows_changed = list(entries) != list(self.entries)
+        self.entries.clear()
+        self.entries.update(entries)
+        if rows_changed and hasattr(self, "apply_button"):
+            self.layout()
+
+        self.highlight_active_period()
+
+    def highlight_active_period(self):
+        # Mark the label of the period active right now and re-arm at the next transition
+        compiled = self.controller.get_compiled_schedule()
+        now = datetime.now()
+        active_key = compiled.period_at(now)
+        for key, row in self.rows.items():
+            color = ACTIVE_PERIOD_COLOR if key == active_key else "white"
+            if row.get("color") != color:
+                row["label"].config(fg=color)
+                row["color"] = color
+
+        if self.highlight_job:
+            self.window.after_cancel(self.highlight_job)
+            self.highlight_job = None
+        next_transition = compiled.next_transition(now)
+        if next_transition:
+            delay_ms = int((next_transition - now).total_seconds() * 1000) + 1
+            self.highlight_job = self.window.after(
+                delay_ms, self.highlight_active_period
+            )
 
+    def create_brightness_input(self, key, label_text, value, y_pos):
         # Create label and entry for brightness level
         label_widget = self.helper.create_label(
             text=label_text,
             x=40,
-            y=period["y_pos"],
+            y=y_pos,
             font=("Segoe UI", 10),
             bg="#2E2E2E",
             fg="white",
         )
-        self.widgets_to_update[f'label_{period["key"]}'] = label_widget
+        self.widgets_to_update[f"label_{key}"] = label_widget
 
         entry = self.helper.create_entry(
             x=220,
-            y=period["y_pos"],
-            initial_value=brightness_levels.get(period["key"], ""),
+            y=y_pos,
+            initial_value=value,
         )
-        self.entries[period["key"]] = entry
-
-    def format_period_label(self, period_name, start_time, end_time):
-        # Format the label for each period with the correct time format
+        row = {
+            "label": label_widget,
+            "entry": entry,
+            "label_text": label_text,
+            "value": value,
+            "y_pos": y_pos,
+        }
+        self.rows[key] = row
+        return row
+
+    def update_brightness_input(self, row, label_text, value, y_pos):
+        if row["label_text"] != label_text:
+            row["label"].config(text=label_text)
+            row["label_text"] = label_text
+        if row["value"] != value:
+            if row["entry"].get() != value:
+                row["entry"].delete(0, tk.END)
+                row["entry"].insert(0, value)
+            row["value"] = value
+        if row["y_pos"] != y_pos:
+            row["label"].place(x=40, y=y_pos)
+            row["entry"].place(x=220, y=y_pos)
+            row["y_pos"] = y_pos
+
+    def format_time(self, minutes):
+        # Format minutes since midnight as "6 AM"/"6:30 AM" (EN) or "6h"/"6h30"
+        hour, minute = divmod(minutes, 60)
         if self.lang_strings.get("Language", "EN") == "EN":
             # Convert to 12-hour format with AM/PM using controller's method
-            start_hour_12, start_ampm = self.controller.convert_to_12_hour_format(
-                start_time
-            )
-            end_hour_12, end_ampm = self.controller.convert_to_12_hour_format(end_time)
-
-            if start_hour_12 is not None and end_hour_12 is not None:
-                return f"{period_name} ({start_hour_12} {start_ampm} - {end_hour_12} {end_ampm}):"
-            else:
-                return f"{period_name} ():"
-        else:
-            # Keep in 24-hour format
-            if start_time != "" and end_time != "":
-                return f"{period_name} ({start_time}h - {end_time}h):"
-            else:
-                return f"{period_name} ():"
-
-    def update_brightness_inputs(self, schedule):
-        # Clear existing entries and widgets
-        for widget_key in list(self.widgets_to_update):
-            if widget_key.startswith("label_"):
-                widget = self.widgets_to_update.pop(widget_key)
-                widget.destroy()
-        for entry in self.entries.values():
-            entry.destroy()
-        self.entries.clear()
+            hour_12, ampm = self.controller.convert_to_12_hour_format(hour % 24)
+            if minute == 0:
+                return f"{hour_12} {ampm}"
+            return f"{hour_12}:{minute:02d} {ampm}"
+        # Keep in 24-hour format
+        if minute == 0:
+            return f"{hour}h"
+        return f"{hour}h{minute:02d}"
+
+    def format_period_label(self, period_name, start, end):
+        # Format the label for each period with the correct time format
+        return f"{period_name} ({self.format_time(start)} - {self.format_time(end)}):"
+
+    def layout(self):
+        # Place the buttons below the period rows and resize the window to fit them
+        self.rows_bottom = self.ROW_START_Y + self.ROW_HEIGHT * len(self.entries)
+        self.apply_button.place(x=100, y=self.rows_bottom + 10)
+        self.helper.setup_window(
+            width=320, height=self.rows_bottom + 80, bg_color="#2E2E2E"
+        )
 
-        # Recreate brightness inputs with updated schedule
-        self.create_brightness_inputs(self.controller.brightness_levels, schedule)
+    def update_brightness_inputs(self, schedule, brightness_levels=None):
+        self.request_update(brightness_levels=brightness_levels, schedule=schedule)
+
+    def request_update(self, lang_strings=None, brightness_levels=None, schedule=None):
+        # Queue changes and apply them together in a single idle callback
+        if lang_strings is not None:
+            self.pending_update["lang_strings"] = lang_strings
+        if brightness_levels is not None:
+            self.pending_update["brightness_levels"] = brightness_levels
+        if schedule is not None:
+            self.pending_update["schedule"] = schedule
+        if self.update_job is None:
+            self.update_job = self.window.after_idle(self.flush_update)
+
+    def flush_update(self):
+        self.update_job = None
+        pending, self.pending_update = self.pending_update, {}
+        if not pending:
+            return
+
+        if "lang_strings" in pending:
+            self.lang_strings = pending["lang_strings"]
+            title_text = self.lang_strings.get("MSG_04", "Brightness Settings")
+            if self.title_label.cget("text") != title_text:
+                self.title_label.config(text=title_text)
+            apply_text = self.lang_strings.get("MSG_08", "Apply")
+            if self.apply_button.itemcget(self.apply_button.text_id, "text") != apply_text:
+                self.apply_button.itemconfig(self.apply_button.text_id, text=apply_text)
+
+        self.brightness_levels = pending.get(
+            "brightness_levels", self.controller.brightness_levels
+        )
+        self.schedule = pending.get("schedule", self.schedule)
+        self.update_profile_label(self.controller.profile)
+        self.sync_rows(self.brightness_levels, self.schedule)
 
     def create_buttons(self):
         # Create Apply button
@@ -142,7 +250,6 @@ class BrightnessView:
             text=self.lang_strings.get("MSG_08", "Apply"),
             command=self.controller.apply_settings,
         )
-        self.apply_button.place(x=100, y=230)
         self.widgets_to_update["apply_button"] = self.apply_button
 
         # Create Minimize button
@@ -185,80 +292,7 @@ class BrightnessView:
         self.widgets_to_update["settings_button"] = self.settings_button
 
     def update_language(self, lang_strings, schedule):
-        # Update language strings
-        self.lang_strings = lang_strings
-
-        # Update title label
-        self.widgets_to_update["title_label"].config(
-            text=self.lang_strings.get("MSG_04", "Brightness Settings")
-        )
-
-        self.update_brightness_inputs(schedule)
-
-        # Define brightness periods again
-        periods = [
-            {
-                "key": "B1",
-                "label_key": "MSG_20",
-                "default_name": "Morning",
-                "start_key": "MorningStart",
-                "end_key": "MorningEnd",
-            },
-            {
-                "key": "B2",
-                "label_key": "MSG_21",
-                "default_name": "Afternoon",
-                "start_key": "AfternoonStart",
-                "end_key": "AfternoonEnd",
-            },
-            {
-                "key": "B3",
-                "label_key": "MSG_22",
-                "default_name": "Evening",
-                "start_key": "EveningStart",
-                "end_key": "EveningEnd",
-            },
-            {
-                "key": "B4",
-                "label_key": "MSG_23",
-                "default_name": "Night",
-                "start_key": "NightStart",
-                "end_key": "NightEnd",
-            },
-        ]
-
-        for period in periods:
-            period_name = self.lang_strings.get(
-                period["label_key"], period["default_name"]
-            )
-            start_time = schedule.get(period["start_key"], "")
-            end_time = schedule.get(period["end_key"], "")
-
-            if self.lang_strings.get("Language", "EN") == "EN":
-                # Convert to 12-hour format using controller's method
-                start_hour_12, start_ampm = self.controller.convert_to_12_hour_format(
-                    start_time
-                )
-                end_hour_12, end_ampm = self.controller.convert_to_12_hour_format(
-                    end_time
-                )
-
-                if start_hour_12 and end_hour_12:
-                    label_text = f"{period_name} ({start_hour_12} {start_ampm} - {end_hour_12} {end_ampm}):"
-                else:
-                    label_text = f"{period_name} ():"
-            else:
-                # Keep in 24-hour format
-                label_text = f"{period_name} ({start_time}h - {end_time}h):"
-
-            # Update label text
-            label = self.widgets_to_update.get(f'label_{period["key"]}')
-            if label:
-                label.config(text=label_text)
-
-        self.apply_button.itemconfig(
-            self.apply_button.text_id, text=self.lang_strings.get("MSG_08", "Apply")
-        )
+        self.request_update(lang_strings=lang_strings, schedule=schedule)
 
     def show_success_message(self):
         # Show success message
@@ -268,7 +302,7 @@ class BrightnessView:
         self.success_label = self.helper.create_label(
             text=self.lang_strings.get("MSG_10", "Success! Settings saved."),
             x=20,
-            y=270,
+            y=self.rows_bottom + 50,
             font=("Segoe UI", 10, "bold"),
             bg="#2E2E2E",
             fg="#32CD32",
@@ -1,8 +1,12 @@
 # views/settings_view.py
 
+import re
 import tkinter as tk
 from views.view_helper import ViewHelper
 from tkinter import messagebox
+from model.schedule_model import MINUTES_PER_DAY, TIME_PATTERN, format_time, parse_time
+
+PARTIAL_TIME_PATTERN = re.compile(r"^(\d{1,2})(?::(\d{0,2}))?$")
 
 
 class Tooltip:
@@ -42,6 +46,10 @@ class Tooltip:
 
 
 class SettingsView:
+    ROW_START_Y = 70
+    ROW_HEIGHT = 40
+    WINDOW_WIDTH = 500
+
     def __init__(self, parent_window, controller):
         self.controller = controller
         self.window = tk.Toplevel(parent_window)
@@ -56,7 +64,9 @@ class SettingsView:
         self.vcmd = (self.window.register(self.validate_time_input), "%P", "%W")
 
         # Window configuration
-        self.helper.setup_window(width=470, height=400, bg_color="#2E2E2E")
+        self.helper.setup_window(
+            width=self.WINDOW_WIDTH, height=400, bg_color="#2E2E2E"
+        )
 
         # Create widgets
         self.create_widgets()
@@ -74,22 +84,24 @@ class SettingsView:
                 widget.tooltip.hide_tooltip()
             return True
 
-        try:
-            value = int(proposed_value)
-        except ValueError:
+        # Accept "H", "H:" and "H:MM" while the user is typing
+        match = PARTIAL_TIME_PATTERN.match(proposed_value)
+        if not match:
             widget.config(bg="#FFCCCC")  # Error color
             if not hasattr(widget, "tooltip"):
-                widget.tooltip = Tooltip(widget, "Please enter a valid integer.")
+                widget.tooltip = Tooltip(widget, "Please enter a valid time (H or H:MM).")
             return False
 
+        hour = int(match.group(1))
+        minute = int(match.group(2)) if match.group(2) else 0
+
         language_code = self.language_var.get()
 
+        # 12-hour clock for English, 24-hour clock for every other language
         if language_code == "EN":
-            is_valid = 0 <= value <= 12
-        elif language_code == "PT":
-            is_valid = 0 <= value <= 24
+            is_valid = 0 <= hour <= 12 and minute < 60
         else:
-            is_valid = False
+            is_valid = 0 <= hour <= 24 and minute < 60
 
         if is_valid:
             widget.config(bg="#3A3A3A")  # Default color
@@ -99,9 +111,9 @@ class SettingsView:
             widget.config(bg="#FFCCCC")  # Error color
             if not hasattr(widget, "tooltip"):
                 if language_code == "EN":
-                    error_msg = "Please enter a value between 0 and 12."
+                    error_msg = "Please enter a time between 0:00 and 12:59."
                 else:
-                    error_msg = "Please enter a value between 0 and 24."
+                    error_msg = "Please enter a time between 0:00 and 24:00."
                 widget.tooltip = Tooltip(widget, error_msg)
 
         return is_valid
@@ -117,11 +129,27 @@ class SettingsView:
             fg="white",
         )
 
+        # Profile whose schedule is being edited (empty without profiles)
+        self.profile_label = self.helper.create_label(
+            text=self.controller.profile_caption(),
+            x=20,
+            y=33,
+            font=("Segoe UI", 8),
+            bg="#2E2E2E",
+            fg="#AAAAAA",
+        )
+
         # Separator
-        self.helper.create_separator(x=20, y=50, width=430, height=2, bg="#444444")
+        self.helper.create_separator(
+            x=20, y=50, width=self.WINDOW_WIDTH - 40, height=2, bg="#444444"
+        )
 
-        # Available languages list
-        languages = [("EN", "English"), ("PT", "Português")]
+        # Available languages list (lang.json plus any data/lang/<CODE>.json file)
+        catalog = self.controller.config_manager.language_catalog
+        languages = [
+            (code, catalog.language_name(code))
+            for code in catalog.available_languages()
+        ]
 
         # Map code to name and name to code
         self.code_to_name = {code: name for code, name in languages}
@@ -138,7 +166,6 @@ class SettingsView:
         )
 
         # Create custom buttons for language selection
-        x_position = 100
         self.language_buttons = {}
         for lang_code, lang_name in languages:
             button = self.helper.create_rounded_button(
@@ -149,61 +176,38 @@ class SettingsView:
                 fg_color="white",
                 font=("Segoe UI", 10),
             )
-            button.place(x=x_position, y=250)
             # Bind the button with the language code
             button.bind(
                 "<Button-1>", lambda event, code=lang_code: self.select_language(code)
             )
             self.language_buttons[lang_code] = button  # Store the button with its code
-            x_position += 120
 
         # Highlight the selected language button
         self.highlight_selected_language()
 
-        # Set time settings
-        self.settings = [
-            {
-                "label": self.controller.lang_strings.get(
-                    "MSG_16", "Morning (Start - End):"
-                ),
-                "msg_id": "MSG_16",
-                "default_label": "Morning (Start - End):",
-                "start_key": "MorningStart",
-                "end_key": "MorningEnd",
-                "y_pos": 70,
-            },
-            {
-                "label": self.controller.lang_strings.get(
-                    "MSG_17", "Afternoon (Start - End):"
-                ),
-                "msg_id": "MSG_17",
-                "default_label": "Afternoon (Start - End):",
-                "start_key": "AfternoonStart",
-                "end_key": "AfternoonEnd",
-                "y_pos": 110,
-            },
+        # One row per schedule period (any number of periods, minute precision)
+        self.period_rows = [
             {
-                "label": self.controller.lang_strings.get(
-                    "MSG_18", "Evening (Start - End):"
-                ),
-                "msg_id": "MSG_18",
-                "default_label": "Evening (Start - End):",
-                "start_key": "EveningStart",
-                "end_key": "EveningEnd",
-                "y_pos": 150,
-            },
-            {
-                "label": self.controller.lang_strings.get(
-                    "MSG_19", "Night (Start - End):"
-                ),
-                "msg_id": "MSG_19",
-                "default_label": "Night (Start - End):",
-                "start_key": "NightStart",
-                "end_key": "NightEnd",
-                "y_pos": 190,
-            },
+                "key": period.key,
+                "name": period.name,
+                "label_key": period.label_key,
+                "start": period.start,
+                "end": period.end,
+            }
+            for period in self.controller.get_schedule_model().periods
         ]
 
+        # Add period button
+        self.add_period_button = self.helper.create_rounded_button(
+            text=self.controller.lang_strings.get("MSG_28", "Add period"),
+            width=120,
+            height=30,
+            bg_color="#3A3A3A",
+            fg_color="white",
+            font=("Segoe UI", 10),
+            command=self.add_period,
+        )
+
         self.time_labels = []
         self.create_time_inputs()
 
@@ -211,7 +215,6 @@ class SettingsView:
         self.apply_button = self.helper.create_apply_button(
             text=self.controller.lang_strings.get("MSG_08", "Apply")
         )
-        self.apply_button.place(x=175, y=330)
         self.apply_button.bind("<Button-1>", self.on_apply)
 
         # Close Button
@@ -223,32 +226,110 @@ class SettingsView:
             fg_color="white",
             font=("Segoe UI", 12, "bold"),
         )
-        self.close_button.place(x=435, y=10)  # Adjust position to the new width
+        self.close_button.place(x=self.WINDOW_WIDTH - 35, y=10)
         self.close_button.bind("<Button-1>", lambda event: self.close())
 
-    def on_apply(self, event):
-        schedule = {}
+        self.layout()
+
+    def layout(self):
+        # Place the widgets below the period rows and resize the window to fit them
+        rows_bottom = self.ROW_START_Y + self.ROW_HEIGHT * len(self.period_rows)
+
+        self.add_period_button.place(x=20, y=rows_bottom)
+
+        language_y = rows_bottom + 50
+        self.language_label.place(x=20, y=language_y)
+        x_position = 100
+        for button in self.language_buttons.values():
+            button.place(x=x_position, y=language_y)
+            x_position += 120
+
+        self.apply_button.place(x=(self.WINDOW_WIDTH - 120) // 2, y=rows_bottom + 120)
+
+        self.helper.setup_window(
+            width=self.WINDOW_WIDTH, height=rows_bottom + 190, bg_color="#2E2E2E"
+        )
+
+    def period_label_text(self, row):
+        if row["label_key"]:
+            name = self.controller.lang_strings.get(row["label_key"], row["name"])
+        else:
+            name = row["name"]
+        return self.controller.lang_strings.get(
+            "MSG_27", "{name} (Start - End):"
+        ).format(name=name)
+
+    def format_entry_time(self, minutes, language_code):
+        hour_24, minute = divmod(minutes, 60)
+        if language_code == "EN":
+            hour, ampm = self.controller.convert_to_12_hour(hour_24 % 24)
+        else:
+            hour, ampm = hour_24, None
+        text = str(hour) if minute == 0 else f"{hour}:{minute:02d}"
+        return text, ampm
+
+    def parse_entry_time(self, entry_key, language_code):
+        # Return minutes since midnight for an entry, raising ValueError when invalid
+        match = TIME_PATTERN.match(self.entries[entry_key].get().strip())
+        if not match:
+            raise ValueError(f"Invalid time for {entry_key}")
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if language_code == "EN":
+            ampm = self.entries[entry_key + "_ampm"].get()
+            hour = self.controller.convert_to_24_hour(hour, ampm)
+        return parse_time(f"{hour}:{minute:02d}")
+
+    def collect_rows(self):
+        # Keep the times typed so far when rows are rebuilt (language change, add/remove)
         language_code = self.language_var.get()
+        for row in self.period_rows:
+            for field in ("start", "end"):
+                try:
+                    row[field] = self.parse_entry_time(
+                        f'{row["key"]}_{field}', language_code
+                    )
+                except (KeyError, ValueError):
+                    pass
 
-        for setting in self.settings:
-            start_key = setting["start_key"]
-            end_key = setting["end_key"]
+    def add_period(self):
+        self.collect_rows()
+        used_numbers = [
+            int(row["key"][1:])
+            for row in self.period_rows
+            if row["key"][:1] == "B" and row["key"][1:].isdigit()
+        ]
+        number = max(used_numbers, default=0) + 1
+        start = self.period_rows[-1]["end"] % MINUTES_PER_DAY if self.period_rows else 0
+        self.period_rows.append(
+            {
+                "key": f"B{number}",
+                "name": self.controller.lang_strings.get(
+                    "MSG_29", "Period {number}"
+                ).format(number=number),
+                "label_key": None,
+                "start": start,
+                "end": (start + 60) % MINUTES_PER_DAY,
+            }
+        )
+        self.create_time_inputs()
+        self.layout()
 
-            start_time_str = self.entries[start_key].get()
-            end_time_str = self.entries[end_key].get()
+    def remove_period(self, key):
+        if len(self.period_rows) <= 1:
+            return
+        self.collect_rows()
+        self.period_rows = [row for row in self.period_rows if row["key"] != key]
+        self.create_time_inputs()
+        self.layout()
 
-            if start_time_str == "" or end_time_str == "":
-                messagebox.showerror(
-                    self.controller.lang_strings.get("MSG_07", "Error"),
-                    self.controller.lang_strings.get(
-                        "MSG_06", "All values must be integers!"
-                    ),
-                )
-                return
+    def on_apply(self, event):
+        language_code = self.language_var.get()
+        periods = []
 
+        for row in self.period_rows:
             try:
-                start_time = int(start_time_str)
-                end_time = int(end_time_str)
+                start = self.parse_entry_time(f'{row["key"]}_start', language_code)
+                end = self.parse_entry_time(f'{row["key"]}_end', language_code)
             except ValueError:
                 messagebox.showerror(
                     self.controller.lang_strings.get("MSG_07", "Error"),
@@ -258,25 +339,15 @@ class SettingsView:
                 )
                 return
 
-            if language_code == "EN":
-                # Get AM/PM from buttons
-                start_ampm = self.entries[start_key + "_ampm"].get()
-                end_ampm = self.entries[end_key + "_ampm"].get()
-                # Delegate conversion to the Controller
-                start_time_24 = self.controller.convert_to_24_hour(
-                    start_time, start_ampm
-                )
-                end_time_24 = self.controller.convert_to_24_hour(end_time, end_ampm)
-            else:
-                # Assume 24-hour format
-                start_time_24 = start_time
-                end_time_24 = end_time
-
-            schedule[start_key] = start_time_24
-            schedule[end_key] = end_time_24
+            period = {"Key": row["key"], "Name": row["name"]}
+            if row["label_key"]:
+                period["LabelKey"] = row["label_key"]
+            period["Start"] = format_time(start)
+            period["End"] = format_time(end)
+            periods.append(period)
 
         # Delegate applying settings to the Controller
-        self.controller.apply_settings(schedule, language_code)
+        self.controller.apply_settings({"Periods": periods}, language_code)
 
     def create_time_inputs(self):
         # Destroy existing time widgets if any
@@ -290,23 +361,16 @@ class SettingsView:
         # Get the current language
         selected_language_code = self.language_var.get()
 
-        # Load current settings
-        schedule = self.controller.model.get("Schedule", {})
-
         # Define constants for button width and padding
         BUTTON_WIDTH = 36
         BUTTON_HEIGHT = 30
         BUTTON_PADDING = 10
 
         # Create time fields
-        for setting in self.settings:
-            y_pos = setting["y_pos"]
-            # Update label text if language has changed
-            label_text = self.controller.lang_strings.get(
-                setting["msg_id"], setting["default_label"]
-            )
+        for index, row in enumerate(self.period_rows):
+            y_pos = self.ROW_START_Y + self.ROW_HEIGHT * index
             label_widget = self.helper.create_label(
-                text=label_text,
+                text=self.period_label_text(row),
                 x=20,
                 y=y_pos,
                 font=("Segoe UI", 10),
@@ -316,34 +380,26 @@ class SettingsView:
             self.time_labels.append(label_widget)
             self.time_input_widgets.append(label_widget)
 
-            if selected_language_code == "EN":
-                # Get stored times and convert to 12-hour format
-                start_time_24 = schedule.get(setting["start_key"], "")
-                end_time_24 = schedule.get(setting["end_key"], "")
-
-                if start_time_24 != "":
-                    start_time_12, start_ampm = self.controller.convert_to_12_hour(
-                        start_time_24
-                    )
-                else:
-                    start_time_12, start_ampm = "", "AM"
-                if end_time_24 != "":
-                    end_time_12, end_ampm = self.controller.convert_to_12_hour(
-                        end_time_24
-                    )
-                else:
-                    end_time_12, end_ampm = "", "AM"
+            start_key = f'{row["key"]}_start'
+            end_key = f'{row["key"]}_end'
+            start_text, start_ampm = self.format_entry_time(
+                row["start"], selected_language_code
+            )
+            end_text, end_ampm = self.format_entry_time(
+                row["end"], selected_language_code
+            )
 
+            if selected_language_code == "EN":
                 # Entry field for start time with validation
                 entry_start = self.helper.create_entry(
                     x=165,
                     y=y_pos,
-                    initial_value=str(start_time_12),
+                    initial_value=start_text,
                     width=5,
                     validate="key",
                     validatecommand=self.vcmd,
                 )
-                self.entries[setting["start_key"]] = entry_start
+                self.entries[start_key] = entry_start
                 self.time_input_widgets.append(entry_start)
 
                 # AM/PM selection buttons for start time
@@ -354,7 +410,7 @@ class SettingsView:
                     bg_color="#3A3A3A",
                     fg_color="white",
                     font=("Segoe UI", 10),
-                    command=lambda key=setting["start_key"]: self.set_ampm(key, "AM"),
+                    command=lambda key=start_key: self.set_ampm(key, "AM"),
                 )
                 am_button.place(x=210, y=y_pos - 4)
                 pm_button = self.helper.create_rounded_button(
@@ -364,31 +420,29 @@ class SettingsView:
                     bg_color="#3A3A3A",
                     fg_color="white",
                     font=("Segoe UI", 10),
-                    command=lambda key=setting["start_key"]: self.set_ampm(key, "PM"),
+                    command=lambda key=start_key: self.set_ampm(key, "PM"),
                 )
                 pm_button.place(x=210 + BUTTON_WIDTH + BUTTON_PADDING, y=y_pos - 4)
 
                 # Store button references for future updates
-                self.entries[setting["start_key"] + "_ampm"] = tk.StringVar(
-                    value=start_ampm
-                )
-                self.entries[setting["start_key"] + "_am_button"] = am_button
-                self.entries[setting["start_key"] + "_pm_button"] = pm_button
+                self.entries[start_key + "_ampm"] = tk.StringVar(value=start_ampm)
+                self.entries[start_key + "_am_button"] = am_button
+                self.entries[start_key + "_pm_button"] = pm_button
                 self.time_input_widgets.extend([am_button, pm_button])
 
                 # Initialize button color based on current selection
-                self.update_ampm_buttons(setting["start_key"], start_ampm)
+                self.update_ampm_buttons(start_key, start_ampm)
 
                 # Entry field for end time with validation
                 entry_end = self.helper.create_entry(
                     x=330,
                     y=y_pos,
-                    initial_value=str(end_time_12),
+                    initial_value=end_text,
                     width=5,
                     validate="key",
                     validatecommand=self.vcmd,
                 )
-                self.entries[setting["end_key"]] = entry_end
+                self.entries[end_key] = entry_end
                 self.time_input_widgets.append(entry_end)
 
                 # AM/PM selection buttons for end time
@@ -399,7 +453,7 @@ class SettingsView:
                     bg_color="#3A3A3A",
                     fg_color="white",
                     font=("Segoe UI", 10),
-                    command=lambda key=setting["end_key"]: self.set_ampm(key, "AM"),
+                    command=lambda key=end_key: self.set_ampm(key, "AM"),
                 )
                 am_button_end.place(x=375, y=y_pos - 4)
                 pm_button_end = self.helper.create_rounded_button(
@@ -409,47 +463,60 @@ class SettingsView:
                     bg_color="#3A3A3A",
                     fg_color="white",
                     font=("Segoe UI", 10),
-                    command=lambda key=setting["end_key"]: self.set_ampm(key, "PM"),
+                    command=lambda key=end_key: self.set_ampm(key, "PM"),
                 )
                 pm_button_end.place(x=375 + BUTTON_WIDTH + BUTTON_PADDING, y=y_pos - 4)
 
                 # Store button references for future updates
-                self.entries[setting["end_key"] + "_ampm"] = tk.StringVar(
-                    value=end_ampm
-                )
-                self.entries[setting["end_key"] + "_am_button"] = am_button_end
-                self.entries[setting["end_key"] + "_pm_button"] = pm_button_end
+                self.entries[end_key + "_ampm"] = tk.StringVar(value=end_ampm)
+                self.entries[end_key + "_am_button"] = am_button_end
+                self.entries[end_key + "_pm_button"] = pm_button_end
                 self.time_input_widgets.extend([am_button_end, pm_button_end])
 
                 # Initialize button color based on current selection
-                self.update_ampm_buttons(setting["end_key"], end_ampm)
+                self.update_ampm_buttons(end_key, end_ampm)
 
             else:
                 # For other languages (e.g., Portuguese), use 24-hour format
                 entry_start = self.helper.create_entry(
                     x=220,
                     y=y_pos,
-                    initial_value=str(schedule.get(setting["start_key"], "")),
+                    initial_value=start_text,
                     width=5,
                     validate="key",
                     validatecommand=self.vcmd,
                 )
 
-                self.entries[setting["start_key"]] = entry_start
+                self.entries[start_key] = entry_start
                 self.time_input_widgets.append(entry_start)
 
                 entry_end = self.helper.create_entry(
                     x=300,
                     y=y_pos,
-                    initial_value=str(schedule.get(setting["end_key"], "")),
+                    initial_value=end_text,
                     width=5,
                     validate="key",
                     validatecommand=self.vcmd,
                 )
-                self.entries[setting["end_key"]] = entry_end
+                self.entries[end_key] = entry_end
                 self.time_input_widgets.append(entry_end)
 
+            # Remove button (at least one period must remain)
+            if len(self.period_rows) > 1:
+                remove_button = self.helper.create_rounded_button(
+                    text="-",
+                    width=25,
+                    height=25,
+                    bg_color="#555555",
+                    fg_color="white",
+                    font=("Segoe UI", 12, "bold"),
+                    command=lambda key=row["key"]: self.remove_period(key),
+                )
+                remove_button.place(x=self.WINDOW_WIDTH - 35, y=y_pos - 2)
+                self.time_input_widgets.append(remove_button)
+
     def select_language(self, lang_code):
+        self.collect_rows()
         self.language_var.set(lang_code)
         self.highlight_selected_language()
         self.controller.language_code = lang_code
@@ -478,16 +545,14 @@ class SettingsView:
         self.title_label.config(
             text=self.controller.lang_strings.get("MSG_15", "Time Settings")
         )
+        self.profile_label.config(text=self.controller.profile_caption())
         self.language_label.config(
             text=self.controller.lang_strings.get("MSG_24", "Language:")
         )
-
-        # Update labels for time fields
-        for setting, label_widget in zip(self.settings, self.time_labels):
-            label_text = self.controller.lang_strings.get(
-                setting["msg_id"], setting["default_label"]
-            )
-            label_widget.config(text=label_text)
+        self.add_period_button.itemconfig(
+            self.add_period_button.text_id,
+            text=self.controller.lang_strings.get("MSG_28", "Add period"),
+        )
 
         # Update text for the Apply button
         try: